@@ -0,0 +1,67 @@
+"""
+Measures memory allocated while checking the example histories of the test suite.
+
+For every history and criterion, this reports the peak traced memory of a full check,
+and, for causal histories, the peak allocation of building the causal history of every
+operation with `History.causal_hist` compared to deep-copying the history first (which
+the checkers used to do for every candidate causal order and operation).
+
+    rye run python benchmarks/allocations.py
+"""
+
+import sys
+import tracemalloc
+from copy import deepcopy
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from c3py.history import (  # noqa: E402
+    RWMemorySpecification,
+    check_CC,
+    check_CCv,
+    check_CM,
+)
+from c3py.history_test import TestHistory  # noqa: E402
+
+
+def peak(f) -> int:
+    tracemalloc.start()
+    try:
+        f()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def causal_hists_shared(h):
+    for op_id in h.operations:
+        h.causal_hist(op_id, {op_id})
+
+
+def causal_hists_deepcopy(h):
+    for op_id in h.operations:
+        ch = deepcopy(h)
+        ch.causal_hist(op_id, {op_id})
+
+
+def main():
+    spec = RWMemorySpecification()
+    print(f"{'history':<8} {'check':<6} {'peak KiB':>10}")
+    for name in "abcde":
+        h = getattr(TestHistory(), f"make_history_{name}")()
+        for check in (check_CC, check_CM, check_CCv):
+            size = peak(lambda: check(h, spec))
+            print(f"{name:<8} {check.__name__[6:]:<6} {size / 1024:>10.1f}")
+
+    print()
+    print(f"{'history':<8} {'deepcopy KiB':>14} {'shared KiB':>12}")
+    for name in "abcde":
+        h = getattr(TestHistory(), f"make_history_{name}")()
+        before = peak(lambda: causal_hists_deepcopy(h))
+        after = peak(lambda: causal_hists_shared(h))
+        print(f"{name:<8} {before / 1024:>14.1f} {after / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,55 @@
+from .budget import Budget, BudgetExceeded  # noqa: F401
+from .cache import ResultCache, fingerprint, set_default_cache  # noqa: F401
+from .compact import CompactHistory  # noqa: F401
+from .differentiated import (  # noqa: F401
+    BadPattern,
+    check_CC_differentiated,
+    check_CCv_differentiated,
+    check_CM_differentiated,
+    find_bad_pattern,
+    is_differentiated,
+)
+from .export import covering_edges, involved, write_dot, write_json  # noqa: F401
 from .history import (  # noqa: F401
+    AllResult,
     CCResult,
     CCvResult,
     CMResult,
+    Hints,
     History,
     Instruction,
+    Machine,
     Operation,
     RWMemorySpecification,
     Specification,
+    check_all,
     check_CC,
     check_CCv,
     check_CM,
 )
+from .incremental import IncrementalChecker  # noqa: F401
+from .loader import (  # noqa: F401
+    ColumnarHistory,
+    load_columnar,
+    load_csv,
+    load_jsonl,
+    read_csv,
+    read_jsonl,
+    write_columnar,
+)
+from .poset import BitPoset, Poset  # noqa: F401
+from .sampling import SampleResult, sample  # noqa: F401
+from .specifications import (  # noqa: F401
+    CounterSpecification,
+    QueueSpecification,
+    RegisterSpecification,
+    SetSpecification,
+)
+from .stats import Stats, Tracer, log_tracer  # noqa: F401
+from .symmetry import find_symmetries  # noqa: F401
+from .verify import (  # noqa: F401
+    Verification,
+    edges_from_clocks,
+    edges_from_dependencies,
+    verify,
+)
@@ -0,0 +1,108 @@
+"""
+Limits on the time, search states and memory a check may use.
+"""
+
+import os
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised by a search that runs out of its budget. `reason` is the limit that was
+    reached: "deadline", "max_states" or "max_memory". `pending` holds the edges of
+    the causal orders that were being checked and must be checked again on resume.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(f"{reason} exceeded")
+        self.reason = reason
+        self.pending: list[list[tuple[str, str]]] = []
+
+
+def memory_usage() -> int | None:
+    """Returns the resident memory of this process in bytes, if it can be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # the peak, in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Budget:
+    """
+    The limits of a check: `deadline` seconds from now, `max_states` search states
+    (causal orders tried and calls to `Specification.step`) and `max_memory` bytes of
+    resident memory of this process. Worker processes (see the `workers` option of
+    `check_CC`) are not counted in `max_memory`.
+
+    Searches `charge` the states they explore. Limits are only compared every
+    `interval` states, so that charging stays cheap in hot loops, except `max_states`,
+    which is exact.
+    """
+
+    def __init__(
+        self,
+        deadline: float | None = None,
+        max_states: int | None = None,
+        max_memory: int | None = None,
+        interval: int = 1024,
+    ):
+        self.end = None if deadline is None else time.monotonic() + deadline
+        self.max_states = max_states
+        self.max_memory = max_memory
+        self.interval = interval
+        self.states = 0
+        self._next_check = 0
+        self._suspended = 0
+
+    def remaining(self) -> float | None:
+        """Returns the seconds left before the deadline, if there is one."""
+        if self.end is None:
+            return None
+        return max(0.0, self.end - time.monotonic())
+
+    def charge(self, states: int) -> None:
+        """Counts `states` explored states and raises `BudgetExceeded` past a limit."""
+        self.states += states
+        if self.states >= self._next_check:
+            self.check()
+
+    @contextmanager
+    def suspended(self) -> Iterator[None]:
+        """
+        Counts the states explored in the block without raising `BudgetExceeded`, e.g.
+        to finish a candidate that a previous run was interrupted in.
+        """
+        self._suspended += 1
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+            # compare the limits at the next charge
+            self._next_check = self.states
+
+    def check(self) -> None:
+        """Raises `BudgetExceeded` if a limit is reached."""
+        self._next_check = self.states + self.interval
+        if self._suspended > 0:
+            return
+        if self.max_states is not None:
+            if self.states >= self.max_states:
+                raise BudgetExceeded("max_states")
+            self._next_check = min(self._next_check, self.max_states)
+        if self.end is not None and time.monotonic() >= self.end:
+            raise BudgetExceeded("deadline")
+        if self.max_memory is not None:
+            usage = memory_usage()
+            if usage is not None and usage >= self.max_memory:
+                raise BudgetExceeded("max_memory")
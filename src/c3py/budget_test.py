@@ -0,0 +1,167 @@
+import json
+
+import pytest
+
+from c3py.budget import Budget, BudgetExceeded
+from c3py.cache import ResultCache
+from c3py.history import (
+    History,
+    Operation,
+    RWMemorySpecification,
+    check_all,
+    check_CC,
+    check_CCv,
+    check_CM,
+)
+
+from . import history_test
+
+
+def same_value_writes():
+    return History(
+        {
+            "a": [Operation("wr", ("x", 1)), Operation("rd", "y", 2)],
+            "b": [Operation("wr", ("x", 1)), Operation("wr", ("y", 2))],
+            "c": [Operation("rd", "x", 1), Operation("rd", "y", None)],
+        }
+    )
+
+
+def resume_until_done(check, h, spec, **options):
+    result = check(h, spec, **options)
+    runs = 1
+    while result[0] is None:
+        assert runs < 100, "the search does not progress"
+        # frontiers survive a round trip through JSON
+        frontier = json.loads(json.dumps(result.frontier))
+        result = check(h, spec, resume=frontier, **options)
+        runs += 1
+    return result, runs
+
+
+class TestBudget:
+    def test_max_states(self):
+        budget = Budget(max_states=3)
+        budget.charge(2)
+        with pytest.raises(BudgetExceeded) as e:
+            budget.charge(1)
+        assert e.value.reason == "max_states"
+
+    def test_deadline(self):
+        budget = Budget(deadline=0)
+        assert budget.remaining() == 0
+        with pytest.raises(BudgetExceeded) as e:
+            budget.check()
+        assert e.value.reason == "deadline"
+
+    def test_max_memory(self):
+        with pytest.raises(BudgetExceeded) as e:
+            Budget(max_memory=1).check()
+        assert e.value.reason == "max_memory"
+
+    def test_suspended(self):
+        budget = Budget(max_states=3)
+        with budget.suspended():
+            budget.charge(5)
+        assert budget.states == 5
+        with pytest.raises(BudgetExceeded):
+            budget.charge(1)
+
+    def test_interval(self):
+        budget = Budget(deadline=0, interval=10)
+        with pytest.raises(BudgetExceeded):
+            budget.charge(1)
+        # limits other than max_states are only compared every 10 states
+        budget.charge(9)
+        with pytest.raises(BudgetExceeded):
+            budget.charge(1)
+
+
+class TestBoundedCheck:
+    @pytest.mark.parametrize("check", [check_CC, check_CM, check_CCv])
+    def test_unknown(self, check):
+        h = same_value_writes()
+        result = check(h, RWMemorySpecification(), saturate=False, max_states=5)
+        assert result[0] is None
+        assert result.frontier["reason"] == "max_states"
+        assert result.stats.steps > 0
+
+    # enough states for any single causal order, so that every run makes progress
+    @pytest.mark.parametrize(
+        "check, name, max_states",
+        [(check_CM, "b", 100), (check_CM, "c", 20), (check_CCv, "a", 50)],
+    )
+    def test_resume(self, check, name, max_states):
+        h = getattr(history_test.TestHistory(), f"make_history_{name}")()
+        spec = RWMemorySpecification()
+        expected = check(h, spec, saturate=False)
+        options = {"saturate": False, "max_states": max_states}
+        result, runs = resume_until_done(check, h, spec, **options)
+        assert runs > 1
+        assert result[0] == expected[0]
+
+    @pytest.mark.parametrize("check", [check_CC, check_CM, check_CCv])
+    def test_resume_progresses_past_costly_candidates(self, check):
+        # some causal orders cost more than 20 states to check
+        h = History(
+            {
+                "a": [Operation("wr", ("x", 1))],
+                "c": [
+                    Operation("rd", "x", None),
+                    Operation("wr", ("x", 2)),
+                    Operation("wr", ("x", 1)),
+                    Operation("rd", "x", 2),
+                ],
+            }
+        )
+        spec = RWMemorySpecification()
+        result, _ = resume_until_done(check, h, spec, max_states=20)
+        assert result[0] == check(h, spec)[0]
+
+    def test_resume_skips_checked_refinements(self):
+        h = history_test.TestHistory().make_history_b()
+        spec = RWMemorySpecification()
+        total = check_CM(h, spec, saturate=False).stats.refinements
+        first = check_CM(h, spec, saturate=False, max_states=200)
+        assert first.is_CM is None
+        rest = check_CM(h, spec, saturate=False, resume=first.frontier)
+        assert rest.is_CM is False
+        assert rest.stats.refinements <= total - first.stats.refinements + 1
+
+    def test_resume_other_history(self):
+        spec = RWMemorySpecification()
+        result = check_CC(same_value_writes(), spec, saturate=False, max_states=5)
+        h = history_test.TestHistory().make_history_b()
+        with pytest.raises(ValueError):
+            check_CC(h, spec, saturate=False, resume=result.frontier)
+
+    def test_deadline(self):
+        h = same_value_writes()
+        result = check_CC(h, RWMemorySpecification(), saturate=False, deadline=0)
+        assert result.is_CC is None
+        assert result.frontier["reason"] == "deadline"
+
+    def test_workers(self):
+        h = history_test.TestHistory().make_history_b()
+        spec = RWMemorySpecification()
+        first = check_CM(h, spec, saturate=False, workers=2, max_states=1)
+        assert first.is_CM is None
+        assert len(first.frontier["pending"]) > 0
+        result = check_CM(h, spec, saturate=False, resume=first.frontier)
+        assert result.is_CM is False
+
+    def test_result_cache(self, tmp_path):
+        cache = ResultCache(tmp_path / "results.sqlite")
+        h = same_value_writes()
+        spec = RWMemorySpecification()
+        assert check_CC(h, spec, max_states=1, result_cache=cache).is_CC is None
+        assert len(cache) == 0
+        assert check_CC(h, spec, result_cache=cache).is_CC is True
+        assert len(cache) == 1
+
+    def test_check_all(self):
+        h = same_value_writes()
+        results = check_all(h, RWMemorySpecification(), saturate=False, max_states=5)
+        assert [r[0] for r in results] == [None, None, None]
+        results = check_all(h, RWMemorySpecification(), saturate=False)
+        assert [r[0] for r in results] == [True, True, True]
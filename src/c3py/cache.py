@@ -0,0 +1,152 @@
+"""
+A persistent cache of check results, shared across processes and runs.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from c3py.history import History, Specification
+
+
+def _process_of(op_id: str) -> tuple[str, int]:
+    process, i = op_id.rsplit(".", 1)
+    return process, int(i)
+
+
+def fingerprint(
+    h: "History", spec: "Specification", criterion: str
+) -> tuple[str, dict[str, str]]:
+    """
+    Returns a content-addressed key for checking `h` against `spec` for `criterion`,
+    and the renaming of operation ids to the canonical ids the key is based on.
+
+    Processes are renamed by sorting them by their sequences of operations, so two
+    histories that differ only in the names of their processes get the same key.
+    Causal edges other than program order are part of the key; processes with
+    identical operations keep their relative order by name to place those edges.
+
+    The specification is identified by its class, its `version` attribute, which
+    should be changed whenever its behavior changes, and its parameters (see
+    `Specification.cache_key`).
+    """
+    ops: dict[str, list[tuple[int, str]]] = {}
+    for op_id, op in h.label.items():
+        process, i = _process_of(op_id)
+        ops.setdefault(process, []).append((i, repr(tuple(op[:3]))))
+    sequences = {p: [r for _, r in sorted(seq)] for p, seq in ops.items()}
+    processes = sorted(sequences, key=lambda p: (sequences[p], p))
+    rename = {}
+    for n, process in enumerate(processes):
+        for i, _ in sorted(ops[process]):
+            rename[f"{process}.{i}"] = f"{n}.{i}"
+    # the transitive closure, so that the key does not depend on the poset class
+    edges = sorted(
+        (rename[a], rename[b])
+        for a in h.label
+        for b in h.poset.successors(a)
+        if _process_of(a)[0] != _process_of(b)[0]
+    )
+    spec_cls = type(spec)
+    content = repr(
+        (
+            f"{spec_cls.__module__}.{spec_cls.__qualname__}",
+            getattr(spec, "version", None),
+            spec.cache_key(),
+            criterion,
+            [sequences[p] for p in processes],
+            edges,
+        )
+    )
+    return hashlib.sha256(content.encode()).hexdigest(), rename
+
+
+class ResultCache:
+    """
+    Check results stored in a SQLite database at `path`.
+
+    Entries are JSON objects keyed by `fingerprint`. When the stored entries exceed
+    `max_size` bytes, the least recently used ones are evicted. The database can be
+    shared by concurrent processes, and a `ResultCache` can be sent to worker processes:
+    each process opens its own connection.
+    """
+
+    def __init__(self, path: str | os.PathLike, max_size: int = 64 * 1024 * 1024):
+        self.path = os.fspath(path)
+        self.max_size = max_size
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"path": self.path, "max_size": self.max_size}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._pid = os.getpid()
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, value TEXT, size INTEGER, used REAL)"
+                )
+        return self._connection
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        db = self._connect()
+        with db:
+            row = db.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        data = json.dumps(value)
+        db = self._connect()
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+            (size,) = db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+            if size <= self.max_size:
+                return
+            for row_key, row_size in db.execute(
+                "SELECT key, size FROM results ORDER BY used, rowid"
+            ).fetchall():
+                db.execute("DELETE FROM results WHERE key = ?", (row_key,))
+                size -= row_size
+                if size <= self.max_size:
+                    break
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self) -> None:
+        db = self._connect()
+        with db:
+            db.execute("DELETE FROM results")
+
+
+_default_cache: ResultCache | None = None
+
+
+def set_default_cache(cache: ResultCache | None) -> None:
+    """Sets the cache that checks consult when no `result_cache` is passed."""
+    global _default_cache
+    _default_cache = cache
+
+
+def get_default_cache() -> ResultCache | None:
+    return _default_cache
@@ -0,0 +1,157 @@
+import pytest
+
+from c3py import search
+from c3py.cache import ResultCache, fingerprint, set_default_cache
+from c3py.differentiated import BadPattern, check_CC_differentiated
+from c3py.history import (
+    History,
+    Operation,
+    RWMemorySpecification,
+    check_all,
+    check_CC,
+    check_CCv,
+    check_CM,
+)
+from c3py.specifications import RegisterSpecification
+
+from . import history_test
+
+
+def renamed(h: History, names: dict[str, str]) -> History:
+    data = {}
+    for op_id in sorted(h.operations, key=lambda o: int(o.rsplit(".", 1)[1])):
+        process = op_id.rsplit(".", 1)[0]
+        data.setdefault(names[process], []).append(h.label[op_id])
+    return History(data)
+
+
+class VersionedRWMemorySpecification(RWMemorySpecification):
+    version = "2"
+
+
+class UncachedRWMemorySpecification(RWMemorySpecification):
+    def cache_key(self):
+        return None
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / "results.sqlite")
+
+
+def no_search(*args, **kwargs):
+    raise AssertionError("the search should not run")
+
+
+class TestFingerprint:
+    def test_process_renaming(self):
+        h = history_test.TestHistory().make_history_b()
+        spec = RWMemorySpecification()
+        key, _ = fingerprint(h, spec, "CC")
+        assert fingerprint(renamed(h, {"a": "q", "b": "p"}), spec, "CC")[0] == key
+        assert fingerprint(h, spec, "CM")[0] != key
+        assert fingerprint(h, VersionedRWMemorySpecification(), "CC")[0] != key
+
+    def test_operations(self):
+        spec = RWMemorySpecification()
+        h1 = History({"a": [Operation("wr", ("x", 1)), Operation("rd", "x", 1)]})
+        h2 = History({"a": [Operation("rd", "x", 1), Operation("wr", ("x", 1))]})
+        assert fingerprint(h1, spec, "CC")[0] != fingerprint(h2, spec, "CC")[0]
+
+
+class TestResultCache:
+    @pytest.mark.parametrize("check", [check_CC, check_CM, check_CCv])
+    @pytest.mark.parametrize("name", ["a", "b", "c"])
+    def test_hit(self, cache, monkeypatch, check, name):
+        h = getattr(history_test.TestHistory(), f"make_history_{name}")()
+        spec = RWMemorySpecification()
+        expected = check(h, spec, result_cache=cache)
+        assert len(cache) == 1
+        monkeypatch.setattr(search, "_search", no_search)
+        h = renamed(h, {"a": "q", "b": "p"})
+        result = check(h, spec, result_cache=cache)
+        assert result[0] == expected[0]
+        if result[0]:
+            assert set(result.serializations) == h.operations
+            for log in result.serializations.values():
+                assert spec.satisfies(log)
+
+    def test_check_all(self, cache, monkeypatch):
+        h = history_test.TestHistory().make_history_b()
+        spec = RWMemorySpecification()
+        expected = check_all(h, spec, result_cache=cache)
+        assert len(cache) == 3
+        monkeypatch.setattr(search, "search_all", no_search)
+        monkeypatch.setattr(search, "_search", no_search)
+        assert [r[0] for r in check_all(h, spec, result_cache=cache)] == [
+            r[0] for r in expected
+        ]
+        assert check_CM(h, spec, result_cache=cache).is_CM is expected.cm.is_CM
+
+    def test_differentiated(self, cache, monkeypatch):
+        spec = RWMemorySpecification()
+        lookups = []
+        get = cache.get
+        monkeypatch.setattr(cache, "get", lambda key: lookups.append(key) or get(key))
+        # not differentiated, so check_CC runs and is looked up only once
+        h = History(
+            {"a": [Operation("wr", ("x", 1))], "b": [Operation("wr", ("x", 1))]}
+        )
+        check_CC_differentiated(h, spec, result_cache=cache)
+        assert len(lookups) == 1
+        # a cached violation keeps its bad pattern
+        h = History({"a": [Operation("rd", "x", 1)]})
+        expected = check_CC_differentiated(h, spec, result_cache=cache)
+        assert expected.bad_pattern == BadPattern.THIN_AIR_READ
+        result = check_CC_differentiated(h, spec, result_cache=cache)
+        assert result.stats.result_cache_hits == 1
+        assert result.bad_pattern == BadPattern.THIN_AIR_READ
+        assert len(lookups) == 3
+
+    def test_persistent(self, cache, tmp_path, monkeypatch):
+        h = history_test.TestHistory().make_history_a()
+        check_CC(h, RWMemorySpecification(), result_cache=cache)
+        monkeypatch.setattr(search, "_search", no_search)
+        other = ResultCache(tmp_path / "results.sqlite")
+        assert check_CC(h, RWMemorySpecification(), result_cache=other).is_CC
+
+    def test_default_cache(self, cache):
+        h = history_test.TestHistory().make_history_a()
+        set_default_cache(cache)
+        try:
+            check_CC(h, RWMemorySpecification())
+            assert len(cache) == 1
+        finally:
+            set_default_cache(None)
+
+    def test_invalid_witness(self, cache):
+        h = History({"a": [Operation("wr", ("x", 1))], "b": [Operation("rd", "x", 1)]})
+        spec = RWMemorySpecification()
+        key, _ = fingerprint(h, spec, "CC")
+        # claims the read does not follow the write
+        cache.put(key, {"verdict": True, "causal_order": []})
+        result = check_CC(h, spec, result_cache=cache)
+        assert result.is_CC
+        assert result.causal_history.poset.check("a.1", "b.1")
+
+    def test_parameters(self, cache):
+        h = History({"a": [Operation("rd", None, 5)]})
+        assert check_CC(h, RegisterSpecification(), result_cache=cache).is_CC is False
+        result = check_CC(h, RegisterSpecification(initial=5), result_cache=cache)
+        assert result.is_CC is True
+        assert result.stats.result_cache_hits == 0
+        assert len(cache) == 2
+
+    def test_uncached_specification(self, cache):
+        h = history_test.TestHistory().make_history_a()
+        check_CC(h, UncachedRWMemorySpecification(), result_cache=cache)
+        check_all(h, UncachedRWMemorySpecification(), result_cache=cache)
+        assert len(cache) == 0
+
+    def test_eviction(self, tmp_path):
+        cache = ResultCache(tmp_path / "results.sqlite", max_size=100)
+        for i in range(20):
+            cache.put(str(i), {"verdict": True, "causal_order": [["0.1", "1.1"]]})
+        assert 0 < len(cache) < 20
+        assert cache.get("19") is not None
+        assert cache.get("0") is None
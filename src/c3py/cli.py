@@ -0,0 +1,256 @@
+"""
+The `c3py` command-line interface.
+
+    c3py check histories/ --criteria CC,CCv --workers 8 --timeout 10 -o report.jsonl
+
+checks every recorded history (`.jsonl`, `.csv` or columnar `.c3py` files, see
+`c3py.loader`) under the given directories or globs and writes one JSON line per
+history with the verdicts, witnesses and timings of every criterion.
+"""
+
+import argparse
+import glob
+import json
+import os
+import signal
+import sys
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, TextIO
+
+from c3py.cache import ResultCache, set_default_cache
+from c3py.differentiated import (
+    check_CC_differentiated,
+    check_CCv_differentiated,
+    check_CM_differentiated,
+)
+from c3py.history import History, RWMemorySpecification, Specification
+from c3py.loader import load_columnar, load_csv, load_jsonl
+
+SPECIFICATIONS: dict[str, type[Specification]] = {
+    "RWMemorySpecification": RWMemorySpecification,
+}
+
+CHECKS = {
+    "CC": check_CC_differentiated,
+    "CM": check_CM_differentiated,
+    "CCv": check_CCv_differentiated,
+}
+
+LOADERS = {".jsonl": load_jsonl, ".csv": load_csv, ".c3py": load_columnar}
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _alarm(signum, frame):
+    raise _Timeout()
+
+
+def find_histories(patterns: list[str]) -> list[str]:
+    """Expands directories and globs into the sorted list of history files."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*")
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(path) and os.path.splitext(path)[1] in LOADERS:
+                paths.add(path)
+    return sorted(paths)
+
+
+def _witness(criterion: str, result) -> dict[str, Any]:
+    witness: dict[str, Any] = {
+        "causal_order": sorted(result.causal_history.poset.edges())
+    }
+    if criterion == "CCv":
+        witness["arbitration"] = [op.op_id for op in result.arbitration]
+    return witness
+
+
+def check_file(
+    path: str,
+    spec_name: str,
+    criteria: list[str],
+    timeout: float | None,
+    max_states: int | None = None,
+    max_memory: int | None = None,
+) -> dict[str, Any]:
+    """
+    Checks the history in `path` against every criterion and returns its report.
+
+    `timeout` bounds the time spent on the history, loading included. Searches stop
+    at the deadline on their own and report their partial statistics; `SIGALRM` is a
+    backstop for the other phases, on platforms that have it. `max_states` and
+    `max_memory` bound each search (see `check_CC`). Criteria not checked within these
+    limits get the verdict `null` and the status "timeout", "max_states" or
+    "max_memory".
+    """
+    started = time.perf_counter()
+    report: dict[str, Any] = {"path": path, "results": {}}
+    has_alarm = timeout is not None and hasattr(signal, "setitimer")
+    if has_alarm:
+        previous = signal.signal(signal.SIGALRM, _alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        h: History = LOADERS[os.path.splitext(path)[1]](path)
+        report["operations"] = len(h.operations)
+        spec = SPECIFICATIONS[spec_name]()
+        for criterion in criteria:
+            t = time.perf_counter()
+            report["results"][criterion] = {"verdict": None, "status": "timeout"}
+            options: dict[str, Any] = {
+                "max_states": max_states,
+                "max_memory": max_memory,
+            }
+            if timeout is not None:
+                options["deadline"] = max(0.0, timeout - (t - started))
+            result = CHECKS[criterion](h, spec, **options)
+            entry: dict[str, Any] = {
+                "verdict": result[0],
+                "status": "ok",
+                "seconds": time.perf_counter() - t,
+            }
+            if result[0]:
+                entry["witness"] = _witness(criterion, result)
+            elif result[0] is None:
+                reason = result.frontier["reason"]
+                entry["status"] = "timeout" if reason == "deadline" else reason
+            elif result.bad_pattern is not None:
+                entry["bad_pattern"] = result.bad_pattern.value
+            if result.stats is not None:
+                entry["stats"] = result.stats.counters()
+            report["results"][criterion] = entry
+    except _Timeout:
+        report["status"] = "timeout"
+    except Exception as e:
+        report["status"] = "error"
+        report["error"] = f"{type(e).__name__}: {e}"
+    else:
+        statuses = [r["status"] for r in report["results"].values()]
+        report["status"] = next((s for s in statuses if s != "ok"), "ok")
+    finally:
+        if has_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    for criterion in criteria:
+        report["results"].setdefault(criterion, {"verdict": None, "status": "skipped"})
+    report["seconds"] = time.perf_counter() - started
+    return report
+
+
+def _check_file(args: tuple) -> dict[str, Any]:
+    return check_file(*args)
+
+
+def check_files(
+    paths: list[str],
+    spec_name: str,
+    criteria: list[str],
+    timeout: float | None = None,
+    workers: int | None = None,
+    result_cache: ResultCache | None = None,
+    max_states: int | None = None,
+    max_memory: int | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yields the reports of `paths` in order.
+
+    With `workers` > 1, histories are checked in a pool of processes that is started
+    once, so the interpreter start-up is paid per worker rather than per history.
+    With `result_cache`, searches are skipped for histories whose results are cached.
+    """
+    tasks = [
+        (path, spec_name, criteria, timeout, max_states, max_memory) for path in paths
+    ]
+    if workers is None or workers <= 1:
+        set_default_cache(result_cache)
+        try:
+            yield from map(_check_file, tasks)
+        finally:
+            set_default_cache(None)
+        return
+    with ProcessPoolExecutor(
+        workers, initializer=set_default_cache, initargs=(result_cache,)
+    ) as executor:
+        chunksize = max(1, min(32, len(tasks) // (4 * workers)))
+        yield from executor.map(_check_file, tasks, chunksize=chunksize)
+
+
+def _check(args: argparse.Namespace, out: TextIO) -> int:
+    criteria = args.criteria.split(",")
+    for criterion in criteria:
+        if criterion not in CHECKS:
+            raise SystemExit(f"c3py: unknown criterion {criterion!r}")
+    paths = find_histories(args.paths)
+    if not paths:
+        raise SystemExit("c3py: no histories found")
+    status = 0
+    result_cache = None if args.cache is None else ResultCache(args.cache)
+    max_memory = None if args.max_memory is None else int(args.max_memory * 2**20)
+    for report in check_files(
+        paths,
+        args.spec,
+        criteria,
+        args.timeout,
+        args.workers,
+        result_cache,
+        args.max_states,
+        max_memory,
+    ):
+        out.write(json.dumps(report) + "\n")
+        out.flush()
+        if report["status"] != "ok":
+            status = max(status, 2)
+        elif not all(r["verdict"] for r in report["results"].values()):
+            status = max(status, 1)
+    return status
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Runs the command line and returns the exit status: 0 if every history satisfies
+    every criterion, 1 if some history does not, and 2 if some history timed out or
+    could not be checked within its limits.
+    """
+    parser = argparse.ArgumentParser(prog="c3py")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check = subparsers.add_parser("check", help="check recorded histories")
+    check.add_argument("paths", nargs="+", help="history files, directories or globs")
+    check.add_argument(
+        "--spec",
+        choices=sorted(SPECIFICATIONS),
+        default="RWMemorySpecification",
+        help="sequential specification (default: %(default)s)",
+    )
+    check.add_argument(
+        "--criteria",
+        default="CC,CM,CCv",
+        help="comma-separated criteria to check (default: %(default)s)",
+    )
+    check.add_argument(
+        "-j", "--workers", type=int, default=os.cpu_count(), help="worker processes"
+    )
+    check.add_argument("--timeout", type=float, help="seconds allowed per history")
+    check.add_argument(
+        "--max-states", type=int, help="search states allowed per history and criterion"
+    )
+    check.add_argument(
+        "--max-memory", type=float, help="resident memory allowed per worker, in MiB"
+    )
+    check.add_argument("--cache", help="SQLite file to cache results in across runs")
+    check.add_argument(
+        "-o", "--output", type=argparse.FileType("w"), default=sys.stdout
+    )
+    args = parser.parse_args(argv)
+    try:
+        return _check(args, args.output)
+    finally:
+        if args.output is not sys.stdout:
+            args.output.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import json
+import time
+
+import pytest
+
+from c3py import cli
+
+
+def write_history(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+
+@pytest.fixture
+def histories(tmp_path):
+    write_history(
+        tmp_path / "ok.jsonl",
+        [
+            {"process": "a", "method": "wr", "arg": ["x", 1]},
+            {"process": "b", "method": "rd", "arg": "x", "ret": 1},
+        ],
+    )
+    (tmp_path / "nested").mkdir()
+    write_history(
+        tmp_path / "nested" / "thin_air.jsonl",
+        [{"process": "a", "method": "rd", "arg": "x", "ret": 1}],
+    )
+    (tmp_path / "notes.txt").write_text("not a history")
+    return tmp_path
+
+
+def read_report(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestCLI:
+    def test_find_histories(self, histories):
+        paths = cli.find_histories([str(histories)])
+        assert [p.rsplit("/", 1)[1] for p in paths] == ["thin_air.jsonl", "ok.jsonl"]
+        assert cli.find_histories([str(histories / "*.jsonl")]) == [
+            str(histories / "ok.jsonl")
+        ]
+
+    @pytest.mark.parametrize("workers", ["1", "2"])
+    def test_check(self, histories, tmp_path, workers):
+        output = tmp_path / "report.json"
+        argv = ["check", str(histories), "-j", workers, "-o", str(output)]
+        assert cli.main(argv) == 1
+        thin_air, ok = read_report(output)
+        assert ok["status"] == "ok"
+        assert ok["operations"] == 2
+        for criterion in ("CC", "CM", "CCv"):
+            assert ok["results"][criterion]["verdict"] is True
+        assert ok["results"]["CCv"]["witness"]["arbitration"] == ["a.1", "b.1"]
+        assert ["a.1", "b.1"] in ok["results"]["CC"]["witness"]["causal_order"]
+        assert thin_air["results"]["CC"] == {
+            "verdict": False,
+            "status": "ok",
+            "seconds": thin_air["results"]["CC"]["seconds"],
+            "bad_pattern": "ThinAirRead",
+        }
+
+    def test_criteria(self, histories, tmp_path, capsys):
+        assert cli.main(["check", str(histories / "ok.jsonl"), "--criteria", "CM"]) == 0
+        (report,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert list(report["results"]) == ["CM"]
+
+    def test_timeout(self, histories, monkeypatch):
+        def slow(h, spec, **options):
+            time.sleep(5)
+
+        monkeypatch.setitem(cli.CHECKS, "CM", slow)
+        report = cli.check_file(
+            str(histories / "ok.jsonl"),
+            "RWMemorySpecification",
+            ["CC", "CM", "CCv"],
+            0.2,
+        )
+        assert report["status"] == "timeout"
+        assert report["results"]["CC"]["verdict"] is True
+        assert report["results"]["CM"] == {"verdict": None, "status": "timeout"}
+        assert report["results"]["CCv"] == {"verdict": None, "status": "skipped"}
+        assert report["seconds"] < 5
+
+    def test_cache(self, histories, tmp_path):
+        output = tmp_path / "report.json"
+        cache = tmp_path / "results.sqlite"
+        argv = ["check", str(histories), "-j", "1", "--cache", str(cache)]
+        assert cli.main([*argv, "-o", str(output)]) == 1
+        assert cache.exists()
+        assert cli.main([*argv, "-o", str(output)]) == 1
+        thin_air, ok = read_report(output)
+        assert [r["status"] for r in (thin_air, ok)] == ["ok", "ok"]
+        for report in (thin_air, ok):
+            for result in report["results"].values():
+                assert result["stats"]["result_cache_hits"] == 1
+        assert thin_air["results"]["CC"]["bad_pattern"] == "ThinAirRead"
+
+    def test_max_states(self, tmp_path):
+        # two writes of the same value are not differentiated, so the search runs
+        write_history(
+            tmp_path / "same.jsonl",
+            [
+                {"process": "a", "method": "wr", "arg": ["x", 1]},
+                {"process": "b", "method": "wr", "arg": ["x", 1]},
+                {"process": "c", "method": "rd", "arg": "x", "ret": 1},
+            ],
+        )
+        path = str(tmp_path / "same.jsonl")
+        report = cli.check_file(path, "RWMemorySpecification", ["CC"], None, 1)
+        assert report["status"] == "max_states"
+        assert report["results"]["CC"]["verdict"] is None
+        assert report["results"]["CC"]["stats"]["steps"] > 0
+        output = tmp_path / "report.json"
+        argv = ["check", path, "-j", "1", "--max-states", "1", "-o", str(output)]
+        assert cli.main(argv) == 2
+        assert cli.main(["check", path, "-j", "1", "-o", str(output)]) == 0
+        (report,) = read_report(output)
+        assert report["results"]["CC"]["stats"]["refinements"] > 0
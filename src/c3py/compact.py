@@ -0,0 +1,152 @@
+"""
+A compact, array-backed representation of large histories.
+"""
+
+import math
+from array import array
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+from c3py.history import History, Operation
+from c3py.poset import BitPoset
+
+
+class InternTable:
+    """Maps values to dense integer ids so that each distinct value is stored once."""
+
+    def __init__(self):
+        self.values: list[Any] = []
+        self.ids: dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: Any) -> int:
+        try:
+            if value in self.ids:
+                return self.ids[value]
+            self.ids[value] = len(self.values)
+        except TypeError:
+            # unhashable values are stored as they are, without sharing
+            pass
+        self.values.append(value)
+        return len(self.values) - 1
+
+
+class CompactHistory:
+    """
+    A history stored column-wise: every operation is an integer, and its process,
+    position in the process, method, argument and return value are entries of
+    `array`s. Processes, methods and values are interned, so a repeated method name or
+    argument costs one integer per operation.
+
+    Every operation may carry the timestamps of its invocation and completion (NaN when
+    unknown). They are not used for checking, but loaders use them to select the
+    operations of a time window.
+
+    `Operation` objects are only created on access (see `operation` and `label`), and
+    `to_history` converts the whole history into a `History` for checking.
+
+    Operation ids follow `History`: the `i`-th operation of process `p` is `"p.i"`.
+    """
+
+    def __init__(self):
+        self.processes = InternTable()
+        self.methods = InternTable()
+        self.values = InternTable()
+        self.process = array("i")
+        self.position = array("i")
+        self.method = array("i")
+        self.arg = array("i")
+        self.ret = array("i")
+        # optional invocation / completion timestamps, NaN if unknown
+        self.invoke = array("d")
+        self.complete = array("d")
+        # process id -> number of operations of the process
+        self.length: dict[int, int] = {}
+
+    @classmethod
+    def from_data(cls, data: dict[str, list[Operation]]) -> "CompactHistory":
+        """Builds a compact history from the `dict` accepted by `History`."""
+        h = cls()
+        for process, ops in data.items():
+            for op in ops:
+                h.append(process, op)
+        return h
+
+    def __len__(self) -> int:
+        return len(self.process)
+
+    def append(
+        self,
+        process: str,
+        op: Operation,
+        invoke: float | None = None,
+        complete: float | None = None,
+    ) -> int:
+        """Appends `op` to the operations of `process` and returns its index."""
+        p = self.processes.intern(process)
+        self.length[p] = self.length.get(p, 0) + 1
+        self.process.append(p)
+        self.position.append(self.length[p])
+        self.method.append(self.methods.intern(op.method))
+        self.arg.append(self.values.intern(op.arg))
+        self.ret.append(self.values.intern(op.ret))
+        self.invoke.append(math.nan if invoke is None else invoke)
+        self.complete.append(math.nan if complete is None else complete)
+        return len(self.process) - 1
+
+    def op_id(self, i: int) -> str:
+        return f"{self.processes.values[self.process[i]]}.{self.position[i]}"
+
+    def operation(self, i: int) -> Operation:
+        """Returns the `i`-th operation as an `Operation`."""
+        return Operation(
+            self.methods.values[self.method[i]],
+            self.values.values[self.arg[i]],
+            self.values.values[self.ret[i]],
+            self.op_id(i),
+        )
+
+    @property
+    def label(self) -> Mapping[str, Operation]:
+        """A read-only mapping from operation ids to operations, built on access."""
+        return _LabelView(self)
+
+    def chains(self) -> list[list[str]]:
+        """Returns the operation ids of every process in program order."""
+        chains: dict[int, list[str]] = {}
+        for i in range(len(self)):
+            chains.setdefault(self.process[i], []).append(self.op_id(i))
+        return list(chains.values())
+
+    def to_history(self, poset_cls: type = BitPoset) -> History:
+        h = object.__new__(History)
+        h.label = {}
+        for i in range(len(self)):
+            op = self.operation(i)
+            h.label[op.op_id] = op
+        h.operations = set(h.label)
+        h.poset = poset_cls.from_chains(self.chains())
+        return h
+
+
+class _LabelView(Mapping):
+    def __init__(self, h: CompactHistory):
+        self.h = h
+        # operation id -> index, built on first lookup by id
+        self._index: dict[str, int] | None = None
+
+    def __getitem__(self, op_id: str) -> Operation:
+        if self._index is None:
+            self._index = {self.h.op_id(i): i for i in range(len(self.h))}
+        return self.h.operation(self._index[op_id])
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.h.op_id(i) for i in range(len(self.h)))
+
+    def __len__(self) -> int:
+        return len(self.h)
+
+    def values(self) -> Iterator[Operation]:
+        return (self.h.operation(i) for i in range(len(self.h)))
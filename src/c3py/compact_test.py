@@ -0,0 +1,52 @@
+from c3py.compact import CompactHistory
+from c3py.differentiated import check_CC_differentiated, find_bad_pattern
+from c3py.history import History, Operation, RWMemorySpecification, check_CM
+from c3py.poset import Poset
+
+from . import history_test
+
+
+def history_data(h: History) -> dict[str, list[Operation]]:
+    data = {}
+    for op_id in sorted(h.operations):
+        data.setdefault(op_id.split(".")[0], []).append(h.label[op_id])
+    return data
+
+
+class TestCompactHistory:
+    def test_round_trip(self):
+        h = history_test.TestHistory().make_history_b()
+        c = CompactHistory.from_data(history_data(h))
+        assert len(c) == 7
+        ch = c.to_history()
+        assert ch.operations == h.operations
+        assert ch.label == h.label
+        assert set(ch.poset.edges()) == set(h.poset.edges())
+        assert dict(c.label) == h.label
+        assert c.label["b.3"] == Operation("rd", "y", 1, "b.3")
+
+    def test_interning(self):
+        c = CompactHistory()
+        for i in range(100):
+            c.append("a", Operation("wr", ("x", 1)))
+            c.append("b", Operation("rd", "x", 1))
+        assert len(c) == 200
+        assert len(c.methods) == 2
+        # ("x", 1), None, "x" and 1
+        assert len(c.values) == 4
+        assert c.op_id(199) == "b.100"
+
+    def test_unhashable_values(self):
+        c = CompactHistory()
+        c.append("a", Operation("wr", ("x", [1])))
+        c.append("a", Operation("wr", ("x", [1])))
+        assert c.operation(1) == Operation("wr", ("x", [1]), None, "a.2")
+
+    def test_check(self):
+        for name in "abc":
+            h = getattr(history_test.TestHistory(), f"make_history_{name}")()
+            c = CompactHistory.from_data(history_data(h))
+            spec = RWMemorySpecification()
+            assert check_CM(c.to_history(Poset), spec).is_CM == check_CM(h, spec).is_CM
+            assert find_bad_pattern(c, "CC") is None
+            assert check_CC_differentiated(c, spec).is_CC is True
@@ -0,0 +1,589 @@
+"""
+Polynomial-time checking of differentiated read/write memory histories.
+
+A history is differentiated if every value is written at most once per key. For such
+histories, Bouajjani et al. ("On verifying causal consistency", POPL 2017) show that CC,
+CM and CCv are characterized by the absence of a small set of bad patterns over the
+read-from relation and the causal order it induces, which can all be found with graph
+algorithms instead of enumerating causal orders and serializations.
+"""
+
+import logging
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterator
+from copy import deepcopy
+from enum import Enum
+from functools import partial
+from typing import Any
+
+from c3py.cache import ResultCache
+from c3py.compact import CompactHistory
+from c3py.history import (
+    CCResult,
+    CCvResult,
+    CMResult,
+    History,
+    Instruction,
+    Operation,
+    RWMemorySpecification,
+    Specification,
+    cached_check,
+    check_CC,
+    check_CCv,
+    check_CM,
+    inherits_semantics,
+)
+from c3py.poset import BitPoset
+from c3py.search import find_serialization
+
+logger = logging.getLogger(__name__)
+
+
+class BadPattern(Enum):
+    CYCLIC_CO = "CyclicCO"
+    WRITE_CO_INIT_READ = "WriteCOInitRead"
+    THIN_AIR_READ = "ThinAirRead"
+    WRITE_CO_READ = "WriteCORead"
+    WRITE_HB_INIT_READ = "WriteHBInitRead"
+    CYCLIC_HB = "CyclicHB"
+    CYCLIC_CF = "CyclicCF"
+
+
+class _ReadFrom:
+    """The read-from relation of a differentiated read/write memory history."""
+
+    def __init__(self, h: History):
+        # key -> ids of the writes to that key
+        self.writes: dict[Any, list[str]] = {}
+        # read id -> id of the write it reads from, or None for the initial value
+        self.source: dict[str, str | None] = {}
+        self.thin_air: str | None = None
+
+        writer: dict[tuple[Any, Any], str] = {}
+        for op_id, op in h.label.items():
+            if op.method == "wr":
+                key, value = op.arg
+                writer[(key, value)] = op_id
+                self.writes.setdefault(key, []).append(op_id)
+        for op_id, op in h.label.items():
+            if op.method == "rd":
+                if op.ret is None:
+                    self.source[op_id] = None
+                elif (op.arg, op.ret) in writer:
+                    self.source[op_id] = writer[(op.arg, op.ret)]
+                elif self.thin_air is None:
+                    self.thin_air = op_id
+
+
+class _CompactReadFrom:
+    """
+    The read-from relation of a differentiated `CompactHistory`, over operation indices.
+
+    Causal orders are represented by vector clocks rather than by their transitive
+    closure: `clocks[i * width + p]` is the number of operations of process `p` in the
+    causal past of operation `i`, so memory is linear in the number of operations (times
+    the number of processes) and `a` is causally before `b` iff the clock of `b` counts
+    `a`.
+    """
+
+    def __init__(self, h: CompactHistory):
+        n = len(h)
+        self.n = n
+        self.width = len(h.processes)
+        self.process = h.process
+        self.position = h.position
+        # program-order predecessor and successor of every operation, or -1
+        self.prev = array("i", [-1]) * n
+        self.next = array("i", [-1]) * n
+        # read index -> index of the write it reads from, or -1 for the initial value
+        self.source: dict[int, int] = {}
+        # key of every read
+        self.key: dict[int, Any] = {}
+        # write index -> indices of the reads that read from it
+        self.readers: dict[int, list[int]] = {}
+        # key -> process -> positions and indices of the writes to the key, in order
+        self.writes: dict[Any, dict[int, tuple[list[int], list[int]]]] = {}
+        self.thin_air: int | None = None
+
+        last: dict[int, int] = {}
+        writer: dict[tuple[Any, Any], int] = {}
+        methods, values = h.methods.values, h.values.values
+        for i in range(n):
+            p = h.process[i]
+            if p in last:
+                self.prev[i] = last[p]
+                self.next[last[p]] = i
+            last[p] = i
+            if methods[h.method[i]] == "wr":
+                key, value = values[h.arg[i]]
+                writer[(key, value)] = i
+                positions, indices = self.writes.setdefault(key, {}).setdefault(
+                    p, ([], [])
+                )
+                positions.append(h.position[i])
+                indices.append(i)
+        for i in range(n):
+            if methods[h.method[i]] != "rd":
+                continue
+            key, ret = values[h.arg[i]], values[h.ret[i]]
+            self.key[i] = key
+            if ret is None:
+                self.source[i] = -1
+            elif (key, ret) in writer:
+                w = writer[(key, ret)]
+                self.source[i] = w
+                self.readers.setdefault(w, []).append(i)
+            elif self.thin_air is None:
+                self.thin_air = i
+
+    def clocks(self, extra: dict[int, list[int]] | None = None) -> array | None:
+        """
+        Returns the vector clocks of (po ∪ rf ∪ `extra`)+, where `extra` maps operations
+        to more immediate predecessors, or `None` if the relation is cyclic. The clocks
+        are computed in one topological pass.
+        """
+        n, width = self.n, self.width
+        extra = extra or {}
+        successors: dict[int, list[int]] = {}
+        for b, preds in extra.items():
+            for a in preds:
+                successors.setdefault(a, []).append(b)
+        indegree = array("i", [0]) * n
+        for i in range(n):
+            indegree[i] = (
+                (self.prev[i] >= 0)
+                + (self.source.get(i, -1) >= 0)
+                + len(extra.get(i, ()))
+            )
+        clocks = array("i", [0]) * (n * width)
+        ready = [i for i in range(n) if indegree[i] == 0]
+        done = 0
+        while len(ready) > 0:
+            b = ready.pop()
+            done += 1
+            base = b * width
+            preds = [self.prev[b], self.source.get(b, -1), *extra.get(b, ())]
+            for a in preds:
+                if a >= 0:
+                    clocks[base : base + width] = array(
+                        "i",
+                        map(
+                            max,
+                            clocks[base : base + width],
+                            clocks[a * width : (a + 1) * width],
+                        ),
+                    )
+            clocks[base + self.process[b]] = self.position[b]
+            follow = [self.next[b], *self.readers.get(b, ()), *successors.get(b, ())]
+            for c in follow:
+                if c >= 0:
+                    indegree[c] -= 1
+                    if indegree[c] == 0:
+                        ready.append(c)
+        return clocks if done == n else None
+
+    def before(self, clocks: array, a: int, b: int) -> bool:
+        """Returns `True` if `a` is strictly before `b` in the order of `clocks`."""
+        return a != b and clocks[b * self.width + self.process[a]] >= self.position[a]
+
+    def visible_writes(self, clocks: array, r: int) -> Iterator[int]:
+        """
+        Yields, for every process, the last write to the key of read `r` that is before
+        `r` in the order of `clocks`. The other writes of the process to the key are
+        before that one in program order.
+        """
+        base = r * self.width
+        for p, (positions, indices) in self.writes.get(self.key[r], {}).items():
+            j = bisect_right(positions, clocks[base + p]) - 1
+            if j >= 0:
+                yield indices[j]
+
+
+def is_differentiated(h: History | CompactHistory) -> bool:
+    """
+    Returns `True` if `h` only contains reads and writes with hashable keys and values,
+    and no value is written twice to the same key or written as `None` (which reads
+    return for the initial value).
+    """
+    written = set()
+    try:
+        for op in h.label.values():
+            if op.method == "wr":
+                key, value = op.arg
+                if value is None or (key, value) in written:
+                    return False
+                written.add((key, value))
+            elif op.method != "rd":
+                return False
+            else:
+                hash(op.arg)
+                hash(op.ret)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _causal_order(h: History, rf: _ReadFrom) -> BitPoset | None:
+    """Returns (po ∪ rf)+ as a `BitPoset`, or `None` if it is cyclic."""
+    if isinstance(h.poset, BitPoset):
+        co = deepcopy(h.poset)
+    else:
+        co = BitPoset(h.operations)
+        for op_id in h.operations:
+            for p in h.poset.predecessors(op_id):
+                if p != op_id:
+                    co.order_force(p, op_id)
+    for r, w in rf.source.items():
+        if w is not None and not co.order_try(w, r):
+            return None
+    return co
+
+
+def _cc_pattern(h: History, rf: _ReadFrom, co: BitPoset) -> BadPattern | None:
+    for r, w in rf.source.items():
+        key = h.label[r].arg
+        for w2 in rf.writes.get(key, []):
+            if not co.check(w2, r):
+                continue
+            if w is None:
+                return BadPattern.WRITE_CO_INIT_READ
+            if w2 != w and co.check(w, w2):
+                return BadPattern.WRITE_CO_READ
+    return None
+
+
+def _happens_before(
+    h: History, rf: _ReadFrom, co: BitPoset, op_id: str
+) -> tuple[BitPoset | None, BadPattern | None]:
+    """
+    Computes hb_o for `op_id`: the causal order restricted to the causal past of `op_id`,
+    closed under "a write to x that happens before a read of x (in the program-order past
+    of `op_id`) happens before the write that the read reads from".
+    """
+    hb = co.subset(co.predecessors(op_id))
+    checked = [r for r in h.program_order_past(op_id) if r in rf.source]
+    changed = True
+    while changed:
+        changed = False
+        for r in checked:
+            w = rf.source[r]
+            if w is None:
+                continue
+            for w2 in rf.writes.get(h.label[r].arg, []):
+                if w2 != w and hb.check(w2, r) and not hb.check(w2, w):
+                    if not hb.order_try(w2, w):
+                        return None, BadPattern.CYCLIC_HB
+                    changed = True
+    for r in checked:
+        if rf.source[r] is None:
+            if any(hb.check(w, r) for w in rf.writes.get(h.label[r].arg, [])):
+                return None, BadPattern.WRITE_HB_INIT_READ
+    return hb, None
+
+
+def _arbitration(h: History, rf: _ReadFrom, co: BitPoset) -> BitPoset | None:
+    """Returns (co ∪ cf)+, where cf orders w1 before w2 if w1 is visible to a read of w2."""
+    arb = deepcopy(co)
+    for r, w in rf.source.items():
+        if w is None:
+            continue
+        for w2 in rf.writes.get(h.label[r].arg, []):
+            if w2 != w and co.check(w2, r) and not arb.order_try(w2, w):
+                return None
+    return arb
+
+
+def _analyze(
+    h: History, criterion: str
+) -> tuple[BadPattern | None, _ReadFrom, BitPoset | None]:
+    assert criterion in ("CC", "CM", "CCv"), f"Unexpected criterion {criterion}"
+    rf = _ReadFrom(h)
+    if rf.thin_air is not None:
+        return BadPattern.THIN_AIR_READ, rf, None
+    co = _causal_order(h, rf)
+    if co is None:
+        return BadPattern.CYCLIC_CO, rf, None
+    pattern = _cc_pattern(h, rf, co)
+    if pattern is not None or criterion == "CC":
+        return pattern, rf, co
+    if criterion == "CM":
+        for op_id in _maximal(h):
+            _, pattern = _happens_before(h, rf, co, op_id)
+            if pattern is not None:
+                return pattern, rf, co
+        return None, rf, co
+    if _arbitration(h, rf, co) is None:
+        return BadPattern.CYCLIC_CF, rf, co
+    return None, rf, co
+
+
+def _compact_happens_before(
+    rf: _CompactReadFrom, co: array, reads: list[int]
+) -> BadPattern | None:
+    """
+    Like `_happens_before`, for the process whose reads are `reads`: orders every write
+    visible to one of them before the write it reads from, and recomputes the clocks,
+    until nothing changes.
+    """
+    extra: dict[int, list[int]] = {}
+    hb = co
+    changed = True
+    while changed:
+        changed = False
+        for r in reads:
+            w = rf.source[r]
+            if w < 0:
+                continue
+            for w2 in rf.visible_writes(hb, r):
+                if w2 != w and not rf.before(hb, w2, w):
+                    extra.setdefault(w, []).append(w2)
+                    changed = True
+        if changed:
+            hb = rf.clocks(extra)
+            if hb is None:
+                return BadPattern.CYCLIC_HB
+    for r in reads:
+        if rf.source[r] < 0 and next(rf.visible_writes(hb, r), None) is not None:
+            return BadPattern.WRITE_HB_INIT_READ
+    return None
+
+
+def _analyze_compact(h: CompactHistory, criterion: str) -> BadPattern | None:
+    """Like `_analyze`, on the columns of `h` (see `_CompactReadFrom`)."""
+    assert criterion in ("CC", "CM", "CCv"), f"Unexpected criterion {criterion}"
+    rf = _CompactReadFrom(h)
+    if rf.thin_air is not None:
+        return BadPattern.THIN_AIR_READ
+    co = rf.clocks()
+    if co is None:
+        return BadPattern.CYCLIC_CO
+    # the last write of a process visible to a read is the only one that can be after
+    # the write it reads from
+    for r, w in rf.source.items():
+        for w2 in rf.visible_writes(co, r):
+            if w < 0:
+                return BadPattern.WRITE_CO_INIT_READ
+            if w2 != w and rf.before(co, w, w2):
+                return BadPattern.WRITE_CO_READ
+    if criterion == "CC":
+        return None
+    if criterion == "CM":
+        reads: dict[int, list[int]] = {}
+        for r in rf.source:
+            reads.setdefault(h.process[r], []).append(r)
+        # in the order of the ids of their last operations, like `_maximal`
+        processes = sorted(
+            h.length, key=lambda p: f"{h.processes.values[p]}.{h.length[p]}"
+        )
+        for p in processes:
+            pattern = _compact_happens_before(rf, co, reads.get(p, []))
+            if pattern is not None:
+                return pattern
+        return None
+    cf: dict[int, list[int]] = {}
+    for r, w in rf.source.items():
+        if w < 0:
+            continue
+        for w2 in rf.visible_writes(co, r):
+            if w2 != w:
+                cf.setdefault(w, []).append(w2)
+    if rf.clocks(cf) is None:
+        return BadPattern.CYCLIC_CF
+    return None
+
+
+def find_bad_pattern(h: History | CompactHistory, criterion: str) -> BadPattern | None:
+    """
+    Returns a bad pattern contained in the differentiated history `h` for the given
+    criterion ("CC", "CM" or "CCv"), or `None` if there is none.
+
+    A `CompactHistory` is analyzed on its columns, with vector clocks instead of a
+    transitively closed causal order, in time and memory linear in the number of
+    operations (times the number of processes).
+    """
+    if isinstance(h, CompactHistory):
+        return _analyze_compact(h, criterion)
+    pattern, _, _ = _analyze(h, criterion)
+    return pattern
+
+
+def _applies(h: History | CompactHistory, spec: Specification) -> bool:
+    """
+    Returns `True` if `spec` is plain read/write memory (not a subclass redefining its
+    `start` or `step`) and `h` is differentiated, which the bad patterns assume.
+    """
+    return (
+        isinstance(spec, RWMemorySpecification)
+        and inherits_semantics(spec, RWMemorySpecification)
+        and is_differentiated(h)
+    )
+
+
+def _maximal(h: History) -> list[str]:
+    """Returns the last operation of every process."""
+    return sorted(o for o in h.operations if h.poset.successors(o) == {o})
+
+
+def _serialize(
+    spec: Specification,
+    h: History,
+    order: BitPoset,
+    checked: set[str],
+) -> list[Operation | Instruction] | None:
+    label = {
+        o: h.label[o] if o in checked else h.label[o].to_instruction()
+        for o in order.elements()
+    }
+    log = [label[o] for o in order.topological_sort()]
+    if spec.satisfies(log):
+        return log
+    # the order is not tight enough to fix a serialization; search within it
+    ro = find_serialization(spec, order, label)
+    return None if ro is None else [label[o] for o in ro]
+
+
+def _serialization_order(
+    h: History, rf: _ReadFrom, order: BitPoset, checked: list[str]
+) -> BitPoset:
+    """
+    Tightens `order` so that between every checked read and the write it reads from
+    there is no other write to the same key, where possible.
+    """
+    order = deepcopy(order)
+    for r in checked:
+        if r not in rf.source:
+            continue
+        w = rf.source[r]
+        for w2 in rf.writes.get(h.label[r].arg, []):
+            if w2 == w or not order.universe >> order.index[w2] & 1:
+                continue
+            if order.check(w2, r):
+                if w is not None:
+                    order.order_try(w2, w)
+            else:
+                order.order_try(r, w2)
+    return order
+
+
+def _differentiated_CC(h: History, spec: Specification) -> CCResult | None:
+    """Checks CC with bad patterns, or returns `None` if no witness is found."""
+    pattern, rf, co = _analyze(h, "CC")
+    if pattern is not None:
+        return CCResult(False, None, None, pattern)
+    serializations = {}
+    for op_id in sorted(co.elements()):
+        past = _serialization_order(h, rf, co.subset(co.predecessors(op_id)), [op_id])
+        log = _serialize(spec, h, past, {op_id})
+        if log is None:
+            logger.warning(f"no serialization found for {op_id}, falling back")
+            return None
+        serializations[op_id] = log
+    return CCResult(True, h.with_poset(co), serializations)
+
+
+def _differentiated_CM(h: History, spec: Specification) -> CMResult | None:
+    """Checks CM with bad patterns, or returns `None` if no witness is found."""
+    pattern, rf, co = _analyze(h, "CM")
+    if pattern is not None:
+        return CMResult(False, None, None, pattern)
+    serializations = {}
+    for op_id in sorted(co.elements()):
+        hb, _ = _happens_before(h, rf, co, op_id)
+        po_past = h.program_order_past(op_id)
+        order = _serialization_order(h, rf, hb, sorted(po_past))
+        log = _serialize(spec, h, order, po_past)
+        if log is None:
+            logger.warning(f"no serialization found for {op_id}, falling back")
+            return None
+        serializations[op_id] = log
+    return CMResult(True, h.with_poset(co), serializations)
+
+
+def _differentiated_CCv(h: History, spec: Specification) -> CCvResult | None:
+    """Checks CCv with bad patterns, or returns `None` if no witness is found."""
+    pattern, rf, co = _analyze(h, "CCv")
+    if pattern is not None:
+        return CCvResult(False, None, None, None, pattern)
+    arb = _arbitration(h, rf, co).topological_sort()
+    ch = h.with_poset(co)
+    serializations = {op_id: ch.causal_arb(op_id, arb) for op_id in co.elements()}
+    if not all(spec.satisfies(log) for log in serializations.values()):
+        logger.warning("arbitration is not a witness, falling back")
+        return None
+    return CCvResult(True, ch, [h.label[o] for o in arb], serializations)
+
+
+_RESULTS = {"CC": CCResult, "CM": CMResult, "CCv": CCvResult}
+_DIFFERENTIATED = {
+    "CC": _differentiated_CC,
+    "CM": _differentiated_CM,
+    "CCv": _differentiated_CCv,
+}
+_CHECKS = {"CC": check_CC, "CM": check_CM, "CCv": check_CCv}
+
+
+def _check_differentiated(
+    criterion: str,
+    h: History | CompactHistory,
+    spec: Specification,
+    result_cache: ResultCache | None,
+    kwargs: dict[str, Any],
+):
+    if isinstance(h, CompactHistory):
+        # the bad patterns characterize the criterion, so the verdict is found on the
+        # columns; only a witness would need a `History`
+        if _applies(h, spec):
+            pattern = find_bad_pattern(h, criterion)
+            fields = (None,) if criterion == "CCv" else ()
+            return _RESULTS[criterion](pattern is None, None, None, *fields, pattern)
+        h = h.to_history(BitPoset)
+    if _applies(h, spec):
+        check = partial(_DIFFERENTIATED[criterion], h, spec)
+        result = cached_check(criterion, h, spec, check, result_cache)
+        if result is not None:
+            return result
+    return _CHECKS[criterion](h, spec, result_cache=result_cache, **kwargs)
+
+
+def check_CC_differentiated(
+    h: History | CompactHistory,
+    spec: Specification,
+    result_cache: ResultCache | None = None,
+    **kwargs,
+) -> CCResult:
+    """
+    Checks CC in polynomial time if `h` is a differentiated read/write memory history.
+    Otherwise (or if `spec` is not a `RWMemorySpecification` with its own `start` and
+    `step`), falls back to `check_CC` with `kwargs`. Results are cached in
+    `result_cache` like those of `check_CC`, bad patterns included.
+
+    For a `CompactHistory`, only the verdict and the bad pattern are returned, in time
+    linear in the number of operations (see `find_bad_pattern`), and nothing is
+    cached. A witness (the causal order and the serialization of every causal past)
+    is built by checking `h.to_history(BitPoset)` instead, which takes memory
+    quadratic in the number of operations for the closure of the causal order, and
+    a sort and a replay of the causal past of every operation, so it is only
+    practical for a few thousand operations.
+    """
+    return _check_differentiated("CC", h, spec, result_cache, kwargs)
+
+
+def check_CM_differentiated(
+    h: History | CompactHistory,
+    spec: Specification,
+    result_cache: ResultCache | None = None,
+    **kwargs,
+) -> CMResult:
+    """Checks CM, see `check_CC_differentiated`."""
+    return _check_differentiated("CM", h, spec, result_cache, kwargs)
+
+
+def check_CCv_differentiated(
+    h: History | CompactHistory,
+    spec: Specification,
+    result_cache: ResultCache | None = None,
+    **kwargs,
+) -> CCvResult:
+    """Checks CCv, see `check_CC_differentiated`."""
+    return _check_differentiated("CCv", h, spec, result_cache, kwargs)
@@ -0,0 +1,228 @@
+import random
+
+import pytest
+
+from c3py.compact import CompactHistory
+from c3py.differentiated import (
+    BadPattern,
+    check_CC_differentiated,
+    check_CCv_differentiated,
+    check_CM_differentiated,
+    find_bad_pattern,
+    is_differentiated,
+)
+from c3py.history import (
+    History,
+    Instruction,
+    Operation,
+    RWMemorySpecification,
+    Specification,
+    check_CC,
+    check_CCv,
+    check_CM,
+)
+from c3py.poset import BitPoset
+
+from . import compact_test, history_test
+
+CHECKS = {
+    "CC": check_CC_differentiated,
+    "CM": check_CM_differentiated,
+    "CCv": check_CCv_differentiated,
+}
+SEARCHES = {"CC": check_CC, "CM": check_CM, "CCv": check_CCv}
+
+
+class TestBadPattern:
+    def test_thin_air_read(self):
+        h = History({"a": [Operation("rd", "x", 1)]})
+        assert find_bad_pattern(h, "CC") == BadPattern.THIN_AIR_READ
+
+    def test_cyclic_co(self):
+        h = History(
+            {
+                "a": [Operation("rd", "x", 1), Operation("wr", ("y", 1))],
+                "b": [Operation("rd", "y", 1), Operation("wr", ("x", 1))],
+            }
+        )
+        assert find_bad_pattern(h, "CC") == BadPattern.CYCLIC_CO
+
+    def test_write_co_init_read(self):
+        h = History({"a": [Operation("wr", ("x", 1)), Operation("rd", "x", None)]})
+        assert find_bad_pattern(h, "CC") == BadPattern.WRITE_CO_INIT_READ
+
+    def test_write_co_read(self):
+        h = History(
+            {
+                "a": [Operation("wr", ("x", 1)), Operation("wr", ("x", 2))],
+                "b": [Operation("rd", "x", 2), Operation("rd", "x", 1)],
+            }
+        )
+        assert find_bad_pattern(h, "CC") == BadPattern.WRITE_CO_READ
+
+    def test_write_hb_init_read(self):
+        h = history_test.TestHistory().make_history_b()
+        assert find_bad_pattern(h, "CC") is None
+        assert find_bad_pattern(h, "CM") == BadPattern.WRITE_HB_INIT_READ
+
+    def test_cyclic_hb(self):
+        h = History(
+            {
+                "a": [
+                    Operation("wr", ("x", 2)),
+                    Operation("rd", "x", 1),
+                    Operation("rd", "x", 2),
+                ],
+                "b": [Operation("wr", ("x", 1))],
+            }
+        )
+        assert find_bad_pattern(h, "CC") is None
+        assert find_bad_pattern(h, "CM") == BadPattern.CYCLIC_HB
+        assert check_CM(h, RWMemorySpecification()).is_CM is False
+
+    def test_cyclic_cf(self):
+        h = history_test.TestHistory().make_history_a()
+        assert find_bad_pattern(h, "CC") is None
+        assert find_bad_pattern(h, "CM") is None
+        assert find_bad_pattern(h, "CCv") == BadPattern.CYCLIC_CF
+
+    def test_is_differentiated(self):
+        assert is_differentiated(history_test.TestHistory().make_history_d())
+        h = History(
+            {"a": [Operation("wr", ("x", 1))], "b": [Operation("wr", ("x", 1))]}
+        )
+        assert not is_differentiated(h)
+
+    @pytest.mark.parametrize(
+        "name, criterion, pattern",
+        [
+            ("a", "CCv", BadPattern.CYCLIC_CF),
+            ("b", "CM", BadPattern.WRITE_HB_INIT_READ),
+            ("e", "CC", BadPattern.WRITE_CO_READ),
+        ],
+    )
+    def test_compact(self, name, criterion, pattern):
+        h = getattr(history_test.TestHistory(), f"make_history_{name}")()
+        c = CompactHistory.from_data(compact_test.history_data(h))
+        assert find_bad_pattern(h, criterion) == pattern
+        assert find_bad_pattern(c, criterion) == pattern
+        result = CHECKS[criterion](c, RWMemorySpecification())
+        assert result[0] is False
+        assert result.bad_pattern == pattern
+
+    def test_random_compact_histories_match(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            c = CompactHistory()
+            written = {"x": [None], "y": [None]}
+            ops = []
+            for value in range(1, rng.randint(2, 9)):
+                key = rng.choice("xy")
+                if rng.random() < 0.5:
+                    written[key].append(value)
+                    ops.append(Operation("wr", (key, value)))
+                else:
+                    ops.append(Operation("rd", key))
+            for op in ops:
+                if op.method == "rd":
+                    op = op._replace(ret=rng.choice(written[op.arg]))
+                c.append(rng.choice("abc"), op)
+            h = c.to_history(BitPoset)
+            for criterion in ["CC", "CM", "CCv"]:
+                assert find_bad_pattern(c, criterion) == find_bad_pattern(h, criterion)
+                verdict = CHECKS[criterion](c, RWMemorySpecification())[0]
+                assert verdict == SEARCHES[criterion](h, RWMemorySpecification())[0]
+
+    def test_large_compact_history(self):
+        # the causal order of the compact analysis is linear in size
+        c = CompactHistory()
+        last = {}
+        for i in range(10000):
+            key = f"k{i % 50}"
+            if i % 3 == 0:
+                c.append(str(i % 8), Operation("wr", (key, i)))
+                last[key] = i
+            else:
+                c.append(str(i % 8), Operation("rd", key, last.get(key)))
+        for criterion in ["CC", "CM", "CCv"]:
+            assert find_bad_pattern(c, criterion) is None
+            # the verdict, without a witness
+            result = CHECKS[criterion](c, RWMemorySpecification())
+            assert result[0] is True
+            assert result.causal_history is None
+        c.append("0", Operation("rd", "k0", None))
+        assert find_bad_pattern(c, "CC") == BadPattern.WRITE_CO_INIT_READ
+
+
+class NotRWSpecification(Specification):
+    def start(self):
+        return 0
+
+    def step(self, state, instr: Instruction):
+        return state, Operation(instr.method, instr.arg, None)
+
+
+class TestCheckDifferentiated:
+    @pytest.mark.parametrize("name", ["a", "b", "c", "d", "e"])
+    def test_same_verdicts_as_search(self, name):
+        h = getattr(history_test.TestHistory(), f"make_history_{name}")()
+        spec = RWMemorySpecification()
+        expected = {
+            "a": (True, True, False),
+            "b": (True, False, True),
+            "c": (True, False, False),
+            "d": (True, True, True),
+            "e": (False, False, False),
+        }[name]
+        cc = check_CC_differentiated(h, spec)
+        cm = check_CM_differentiated(h, spec)
+        ccv = check_CCv_differentiated(h, spec)
+        assert (cc.is_CC, cm.is_CM, ccv.is_CCv) == expected
+        for result in (cc, cm, ccv):
+            assert (result.bad_pattern is None) == result[0]
+            if result[0]:
+                assert set(result.serializations) == h.operations
+                for log in result.serializations.values():
+                    assert spec.satisfies(log)
+
+    def test_random_histories_match_search(self):
+        rng = random.Random(0)
+        spec = RWMemorySpecification()
+        for _ in range(40):
+            data = {p: [] for p in "ab"}
+            value = 0
+            for _ in range(rng.randint(2, 5)):
+                key = rng.choice("xy")
+                if rng.random() < 0.5:
+                    value += 1
+                    data[rng.choice("ab")].append(Operation("wr", (key, value)))
+                else:
+                    ret = rng.choice([None, *range(1, value + 1)])
+                    data[rng.choice("ab")].append(Operation("rd", key, ret))
+            h = History(data)
+            assert check_CC_differentiated(h, spec).is_CC == check_CC(h, spec).is_CC
+            assert check_CM_differentiated(h, spec).is_CM == check_CM(h, spec).is_CM
+            assert check_CCv_differentiated(h, spec).is_CCv == check_CCv(h, spec).is_CCv
+
+    def test_fallback(self):
+        h = History(
+            {
+                "a": [Operation("wr", ("x", 1)), Operation("rd", "x", 1)],
+                "b": [Operation("wr", ("x", 1))],
+            }
+        )
+        assert not is_differentiated(h)
+        spec = RWMemorySpecification()
+        result = check_CC_differentiated(h, spec)
+        assert result.is_CC is True
+        assert result.bad_pattern is None
+        other = NotRWSpecification()
+        assert check_CC_differentiated(h, other).is_CC == check_CC(h, other).is_CC
+
+    def test_fallback_if_start_is_redefined(self):
+        h = History({"a": [Operation("rd", "x", 0)]})
+        assert is_differentiated(h)
+        spec = history_test.InitializedRWMemorySpecification()
+        assert check_CC_differentiated(h, spec).is_CC is True
+        assert check_CM_differentiated(h, spec).is_CM is True
+        assert check_CCv_differentiated(h, spec).is_CCv is True
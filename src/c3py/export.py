@@ -0,0 +1,195 @@
+"""
+Export of (causal) histories as DOT or JSON graphs, for histories too large for
+`History.visualize`.
+
+Only the covering relation of the order is written: an edge `a -> b` for every pair
+with `a < b` and nothing in between, which is what `visualize` draws after a
+transitive reduction. It is computed from the predecessor sets of the poset without
+building a graph, and the output is written to a file handle node by node.
+
+Long runs of a process can be collapsed into one node, and the output can be
+restricted to the operations involved in a violation or a witness (see `involved`).
+"""
+
+import json
+from collections.abc import Iterable
+from typing import IO, Iterator, NamedTuple
+
+from c3py.history import History
+
+
+def _process_of(op_id: str) -> tuple[str, int]:
+    process, i = op_id.rsplit(".", 1)
+    return process, int(i)
+
+
+class _Node(NamedTuple):
+    id: str
+    process: str
+    # operation ids, in program order
+    ops: list[str]
+
+
+def covering_edges(
+    poset, elements: Iterable[str] | None = None
+) -> Iterator[tuple[str, str]]:
+    """
+    Yields the covering relation of `poset` restricted to `elements` (by default,
+    all of them): every `(a, b)` with `a < b` and no element `c` in between.
+
+    Elements are indexed in order of their number of predecessors, which is a linear
+    extension. The predecessor masks are then scanned from the highest index down:
+    the highest predecessor left is covered by `b`, and its own predecessors are not.
+    This takes one mask operation per covering edge, not per pair.
+    """
+    selected = poset.elements() if elements is None else set(elements)
+    preds = {e: poset.predecessors(e) & selected for e in selected}
+    items = sorted(selected, key=lambda e: (len(preds[e]), e))
+    index = {e: i for i, e in enumerate(items)}
+    masks = [0] * len(items)
+    for i, e in enumerate(items):
+        for p in preds[e]:
+            if p != e:
+                masks[i] |= 1 << index[p]
+    for i, b in enumerate(items):
+        left = masks[i]
+        while left:
+            j = left.bit_length() - 1
+            yield (items[j], b)
+            left &= ~masks[j] & ~(1 << j)
+
+
+def involved(h: History, op_ids: Iterable[str]) -> set[str]:
+    """
+    Returns `op_ids` and their causal pasts in `h`, e.g. the operation reported by
+    `c3py.verify.verify` and the operations its serialization depends on.
+    """
+    ops: set[str] = set()
+    for op_id in op_ids:
+        ops |= h.poset.predecessors(op_id)
+    return ops
+
+
+def _graph(
+    h: History, ops: Iterable[str] | None, collapse: bool
+) -> tuple[list[_Node], list[tuple[str, str]]]:
+    """Returns the nodes and edges to export, with the nodes in program order."""
+    selected = h.operations if ops is None else set(ops)
+    edges = list(covering_edges(h.poset, selected))
+    chains: dict[str, list[str]] = {}
+    for op_id in sorted(selected, key=_process_of):
+        chains.setdefault(_process_of(op_id)[0], []).append(op_id)
+    if not collapse:
+        nodes = [
+            _Node(op_id, process, [op_id])
+            for process, chain in chains.items()
+            for op_id in chain
+        ]
+        return nodes, edges
+
+    # a run of a process becomes one node if edges from other processes only enter
+    # its first operation and leave its last one
+    entered = {b for a, b in edges if _process_of(a)[0] != _process_of(b)[0]}
+    left = {a for a, b in edges if _process_of(a)[0] != _process_of(b)[0]}
+    nodes = []
+    node_of: dict[str, str] = {}
+    for process, chain in chains.items():
+        run: list[str] = []
+        for op_id in chain:
+            if op_id in entered and len(run) > 0:
+                nodes.append(_Node(run[0], process, run))
+                run = []
+            run.append(op_id)
+            node_of[op_id] = run[0]
+            if op_id in left:
+                nodes.append(_Node(run[0], process, run))
+                run = []
+        if len(run) > 0:
+            nodes.append(_Node(run[0], process, run))
+    collapsed = dict.fromkeys(
+        (node_of[a], node_of[b]) for a, b in edges if node_of[a] != node_of[b]
+    )
+    return nodes, list(collapsed)
+
+
+def _label(h: History, node: _Node) -> str:
+    ops = [str(h.label[op_id]) for op_id in node.ops]
+    if len(ops) <= 2:
+        return "\n".join(ops)
+    return f"{ops[0]}\n… {len(ops) - 2} more …\n{ops[-1]}"
+
+
+def _quote(s: str) -> str:
+    escaped = s.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def write_dot(
+    h: History,
+    file: IO[str],
+    ops: Iterable[str] | None = None,
+    collapse: bool = False,
+    include_label: bool = True,
+) -> None:
+    """
+    Writes the covering relation of `h.poset` to `file` as a DOT digraph, with one
+    cluster per process.
+
+    Parameters:
+        ops: The operations to export, e.g. from `involved`. The order between them is
+            the one of `h.poset`, even through operations left out.
+        collapse: Whether to merge every run of a process that other processes only
+            enter at its first operation and leave at its last one into one node.
+        include_label: Whether to label nodes with their operations instead of ids.
+    """
+    nodes, edges = _graph(h, ops, collapse)
+    file.write("digraph {\n")
+    process = None
+    for node in nodes:
+        if node.process != process:
+            if process is not None:
+                file.write("  }\n")
+            process = node.process
+            file.write(f"  subgraph {_quote(f'cluster_{process}')} {{\n")
+            file.write(f"    label={_quote(process)};\n")
+        if include_label:
+            label = _label(h, node)
+        elif len(node.ops) == 1:
+            label = node.id
+        else:
+            label = f"{node.ops[0]} … {node.ops[-1]}"
+        file.write(f"    {_quote(node.id)} [label={_quote(label)}];\n")
+    if process is not None:
+        file.write("  }\n")
+    for a, b in edges:
+        file.write(f"  {_quote(a)} -> {_quote(b)};\n")
+    file.write("}\n")
+
+
+def write_json(
+    h: History,
+    file: IO[str],
+    ops: Iterable[str] | None = None,
+    collapse: bool = False,
+) -> None:
+    """
+    Writes the covering relation of `h.poset` to `file` as a JSON object with a list
+    of `nodes` (`id`, `process`, the `ops` merged into it and their `labels`) and a
+    list of `edges` (`source` and `target` node ids), one per line. `ops` and
+    `collapse` are as in `write_dot`.
+    """
+    nodes, edges = _graph(h, ops, collapse)
+    file.write('{"nodes": [')
+    for i, node in enumerate(nodes):
+        entry = {
+            "id": node.id,
+            "process": node.process,
+            "ops": node.ops,
+            "labels": [str(h.label[op_id]) for op_id in node.ops],
+        }
+        file.write(("\n" if i == 0 else ",\n") + json.dumps(entry, default=str))
+    file.write('\n], "edges": [')
+    for i, (a, b) in enumerate(edges):
+        entry = {"source": a, "target": b}
+        file.write(("\n" if i == 0 else ",\n") + json.dumps(entry))
+    file.write("\n]}\n")
@@ -0,0 +1,99 @@
+import io
+import json
+import random
+
+import networkx as nx
+import pytest
+
+from c3py.export import covering_edges, involved, write_dot, write_json
+from c3py.history import History, Operation
+from c3py.poset import BitPoset, Poset
+
+
+def random_poset(poset_cls, rng):
+    poset = poset_cls({f"{p}.{i}" for p in "abc" for i in range(1, 5)})
+    elements = sorted(poset.elements())
+    for _ in range(8):
+        poset.order_try(*rng.sample(elements, 2))
+    return poset
+
+
+def messages():
+    # a and b exchange two messages, c is not involved
+    h = History(
+        {
+            "a": [Operation("wr", ("x", i)) for i in range(1, 5)],
+            "b": [Operation("rd", "x", i) for i in range(1, 5)],
+            "c": [Operation("rd", "y", None)],
+        },
+        BitPoset,
+    )
+    h.poset.order_try("a.2", "b.1")
+    h.poset.order_try("b.3", "a.4")
+    return h
+
+
+class TestCoveringEdges:
+    @pytest.mark.parametrize("poset_cls", [Poset, BitPoset])
+    def test_transitive_reduction(self, poset_cls):
+        rng = random.Random(0)
+        for _ in range(20):
+            poset = random_poset(poset_cls, rng)
+            G = nx.DiGraph()
+            G.add_nodes_from(poset.elements())
+            G.add_edges_from(poset.edges())
+            expected = set(nx.transitive_reduction(G).edges)
+            assert set(covering_edges(poset)) == expected
+
+    def test_restricted(self):
+        poset = BitPoset.from_chains([["a.1", "a.2", "a.3"]])
+        assert [*covering_edges(poset, {"a.1", "a.3"})] == [("a.1", "a.3")]
+
+
+class TestExport:
+    def test_involved(self):
+        h = messages()
+        assert involved(h, ["b.2"]) == {"a.1", "a.2", "b.1", "b.2"}
+
+    def test_dot(self):
+        h = messages()
+        out = io.StringIO()
+        write_dot(h, out, ops=involved(h, ["b.2"]))
+        dot = out.getvalue()
+        assert dot.startswith("digraph {\n")
+        assert '"a.2" -> "b.1";' in dot
+        assert '"a.1" -> "a.2";' in dot
+        assert '[label="a.1:wr(x, 1)▷None"]' in dot
+        assert "c.1" not in dot
+
+    def test_collapse(self):
+        h = messages()
+        out = io.StringIO()
+        write_json(h, out, collapse=True)
+        graph = json.loads(out.getvalue())
+        nodes = {node["id"]: node["ops"] for node in graph["nodes"]}
+        assert nodes == {
+            "a.1": ["a.1", "a.2"],
+            "a.3": ["a.3"],
+            "a.4": ["a.4"],
+            "b.1": ["b.1", "b.2", "b.3"],
+            "b.4": ["b.4"],
+            "c.1": ["c.1"],
+        }
+        edges = {(e["source"], e["target"]) for e in graph["edges"]}
+        assert edges == {
+            ("a.1", "a.3"),
+            ("a.1", "b.1"),
+            ("a.3", "a.4"),
+            ("b.1", "a.4"),
+            ("b.1", "b.4"),
+        }
+
+    def test_collapse_dot_without_labels(self):
+        h = messages()
+        out = io.StringIO()
+        write_dot(h, out, collapse=True, include_label=False)
+        dot = out.getvalue()
+        assert '"b.1" [label="b.1 … b.3"];' in dot
+        assert '"b.1" -> "a.4";' in dot
+        assert dot.count("subgraph") == 3
@@ -1,12 +1,27 @@
 import logging
 from abc import ABC, abstractmethod
 from copy import deepcopy
+from functools import partial
 from types import MappingProxyType
-from typing import Any, NamedTuple, Self
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Hashable,
+    Iterable,
+    NamedTuple,
+    Self,
+)
 
 import pydot
 
+from c3py.budget import Budget
+from c3py.cache import ResultCache, fingerprint, get_default_cache
 from c3py.poset import Poset
+from c3py.stats import Stats, Tracer
+
+if TYPE_CHECKING:
+    from c3py.differentiated import BadPattern
 
 logger = logging.getLogger(__name__)
 
@@ -41,8 +56,27 @@ class Operation(NamedTuple):
         return prefix + f"{self.method}({self.arg})▷{self.ret}"
 
 
+class Hints(NamedTuple):
+    """A causal order and an arbitration claimed by the system that ran a history."""
+
+    # edges between operation ids
+    causal_order: list[tuple[str, str]] | None
+    # operation ids in arbitration order
+    arbitration: list[str] | None
+
+
 class History:
-    def __init__(self, data: dict[str, list[Operation]]):
+    # claimed causal order and arbitration, see `with_hints`
+    hints: Hints | None = None
+
+    def __init__(
+        self, data: dict[str, list[Operation]], poset_cls: type = Poset
+    ) -> None:
+        """
+        Parameters:
+            data: A mapping from process ids to the operations each process performed, in program order.
+            poset_cls: The poset implementation used to hold program and causal orders, e.g. `Poset` or `BitPoset`.
+        """
         # validation
         assert isinstance(data, dict), "data should be a dictionary"
         for _, ops in data.items():
@@ -57,22 +91,63 @@ class History:
                 self.operations.add(op_id)
                 self.label[op_id] = ops[i]._replace(op_id=op_id)
 
-        self.poset = Poset(self.operations)
-        for process, ops in data.items():
-            for i in range(len(ops) - 1):
-                self.poset.order_try(f"{process}.{i + 1}", f"{process}.{i + 2}")
+        self.poset = poset_cls.from_chains(
+            [
+                [f"{process}.{i + 1}" for i in range(len(ops))]
+                for process, ops in data.items()
+            ]
+        )
+
+    def with_poset(self, poset: Poset) -> Self:
+        """
+        Returns a history with the same operations ordered by `poset`.
+
+        Labels are immutable, so the new history shares them with this one instead of
+        copying them.
+        """
+        h = object.__new__(type(self))
+        h.operations = set(self.operations)
+        h.label = dict(self.label)
+        h.poset = poset
+        return h
+
+    def with_hints(
+        self,
+        causal_order: Iterable[tuple[str, str]] | None = None,
+        arbitration: Iterable[str] | None = None,
+    ) -> Self:
+        """
+        Returns this history annotated with the causal order and arbitration that the
+        system claims, e.g. from its vector clocks (see `c3py.verify.edges_from_clocks`).
+        Hints are checked by `c3py.verify.verify` instead of searching every refinement.
+        """
+        h = self.with_poset(deepcopy(self.poset))
+        h.hints = Hints(
+            None if causal_order is None else [(a, b) for a, b in causal_order],
+            None if arbitration is None else list(arbitration),
+        )
+        return h
 
     def causal_hist(self, op_id: str, ret_set: set[str]) -> Self:
-        ch = deepcopy(self)
-        p = ch.poset.predecessors(op_id)
+        p = self.poset.predecessors(op_id)
+        ch = object.__new__(type(self))
         ch.operations = p
-        ch.poset = ch.poset.subset(p)
+        ch.poset = self.poset.subset(p)
         ch.label = {
-            op_id: op if op_id in ret_set else op.to_instruction()
-            for op_id, op in ch.label.items()
+            o: self.label[o] if o in ret_set else self.label[o].to_instruction()
+            for o in p
         }
         return ch
 
+    def program_order_past(self, op_id: str) -> set[str]:
+        """
+        Returns the operations of the process of `op_id` up to `op_id`. Unlike the
+        predecessors in `self.poset`, which saturation extends with causal edges, this
+        is the past of `op_id` in program order only.
+        """
+        process, i = op_id.rsplit(".", 1)
+        return {f"{process}.{j}" for j in range(1, int(i) + 1)}
+
     def causal_arb(self, op_id: str, arb: list[str]) -> list[Instruction | Operation]:
         """compute CausalArb(op_id){op_id} for `arb`
 
@@ -88,13 +163,32 @@ class History:
         history[idx] = self.label[op_id]
         return history
 
+    def saturated(self, spec: "Specification") -> Self | None:
+        """
+        Returns a copy of the history whose program order is extended with the causal
+        edges that `spec` infers every witness must contain (see `Specification.saturate`),
+        or `None` if `spec` already finds that the history cannot be satisfied.
+        """
+        h = self.with_poset(deepcopy(self.poset))
+        if not spec.saturate(h):
+            return None
+        return h
+
     def visualize(self, include_label: bool = True) -> pydot.Dot:
+        """
+        Returns the transitive reduction of the order as a pydot graph. For large
+        histories, see `c3py.export`.
+        """
         label = {op_id: f'"{str(op)}"' for op_id, op in self.label.items()}
         dot = self.poset.visualize(label if include_label else None)
         return dot
 
 
 class Specification(ABC):
+    # identifies the behavior of the specification in persistent result caches (see
+    # `c3py.cache`); change it whenever the specification changes
+    version: str = "1"
+
     @abstractmethod
     def start(self):
         pass
@@ -104,19 +198,351 @@ class Specification(ABC):
         pass
 
     def satisfies(self, log):
-        state = self.start()
+        machine = machine_for(self)
         for instr in log:
-            state, op = self.step(state, instr)
+            execute, _ = machine.compile(instr)
+            ret = execute()
             # if the instruction has a return value, check if it matches the executed operation
-            if isinstance(instr, Operation) and (op.ret != instr.ret):
+            if isinstance(instr, Operation) and (ret != instr.ret):
                 return False
         return True
 
+    def machine(self) -> "Machine | None":
+        """
+        Returns a `Machine` in the initial state, for specifications whose state can be
+        updated in place. Checkers then execute instructions with it instead of `step`,
+        which builds a new state every time, and revert them when they backtrack.
+
+        The default returns `None`, which makes checkers fall back to `start` and
+        `step`.
+        """
+        return None
+
+    def canonical_state(self, state) -> Hashable | None:
+        """
+        Returns a hashable value that is equal for two states iff they behave the same.
+
+        Checkers use it to remember configurations that are already known to fail.
+        The default returns `None`, which disables this caching.
+        """
+        return None
+
+    def commutes(self, a: Instruction, b: Instruction) -> bool:
+        """
+        Returns `True` if executing `a` and `b` in either order, from any state, leads
+        to the same state and the same return values. Serialization searches then only
+        explore one of the two orders.
+
+        The default returns `False`, which is always safe.
+        """
+        return False
+
+    def partition(self, instr: Instruction) -> Hashable | None:
+        """
+        Returns the partition (e.g. the key of a key-value store) that `instr` belongs to,
+        for specifications where instructions of different partitions never affect each
+        other's return values. Checkers then serialize every partition separately and
+        cache the results.
+
+        The default returns `None`, which means the specification is not separable.
+        """
+        return None
+
+    def rename_values(
+        self, op: Operation, rename: Callable[[Any], Any]
+    ) -> Operation | None:
+        """
+        Returns `op` with every data value in it replaced by `rename(value)`, for
+        specifications that only compare values for equality, so that a bijective
+        renaming of values preserves whether a history is accepted. Checkers use it to
+        find processes that are interchangeable up to a renaming (see `c3py.symmetry`).
+
+        The default returns `None`, which means values cannot be renamed.
+        """
+        return None
+
+    def rank(self, op: Operation) -> Any:
+        """
+        Returns a sort key for `op`. Checkers serialize the causal pasts of operations
+        with lower ranks first, so it should rank first the operations whose return
+        values are most likely to be unexplainable. The default ranks all alike.
+        """
+        return 0
+
+    def preferred_edges(self, h: History) -> Iterable[tuple[str, str]]:
+        """
+        Returns causal edges `(a, b)` that witnesses are likely to contain, e.g. from a
+        write to a read returning its value. Causal orders with these edges are tried
+        first. The default prefers none.
+        """
+        return []
+
+    def saturate(self, h: History) -> bool:
+        """
+        Adds to `h.poset` the causal edges that every causal order witnessing `h` must
+        contain, e.g. from the write a read reads from to the read.
+
+        Returns `False` if the history is found to be unsatisfiable under any causal
+        order, in which case `h.poset` may be partially saturated. The default infers
+        nothing and returns `True`.
+        """
+        return True
+
+    def cache_key(self) -> Any:
+        """
+        Returns the parameters of this specification, e.g. the initial value of a
+        register. Result caches (see `c3py.cache`) only share results between
+        specifications of the same class and `version` whose keys have the same
+        `repr`.
+
+        The default returns the attributes of the specification. Returning `None`
+        disables result caching for the specification.
+        """
+        return vars(self)
+
+
+def inherits_semantics(spec: Specification, cls: type) -> bool:
+    """
+    Returns `True` if the class of `spec` uses the `start` and `step` of `cls`. A
+    specification uses it to decide whether shortcuts that assume its own semantics
+    (its `Machine`, its saturation) still hold for a subclass of it.
+    """
+    spec_cls = type(spec)
+    return spec_cls.start is cls.start and spec_cls.step is cls.step
+
+
+class Machine(ABC):
+    """
+    A state of a specification that instructions update in place (see
+    `Specification.machine`).
+    """
+
+    @abstractmethod
+    def compile(
+        self, instr: Instruction
+    ) -> tuple[Callable[[], Any], Callable[[], None]]:
+        """
+        Returns a function that executes `instr` on this machine and returns its return
+        value, and a function that reverts the last execution. Executions must be
+        reverted in reverse order.
+
+        The method of `instr` is resolved here, once, so that searches can execute the
+        same instruction many times cheaply.
+        """
+        pass
+
+    def canonical_state(self) -> Hashable | None:
+        """Like `Specification.canonical_state`, for the current state."""
+        return None
+
+
+class _StepMachine(Machine):
+    """A `Machine` for specifications that only define `start` and `step`."""
+
+    def __init__(self, spec: Specification) -> None:
+        self.spec = spec
+        self.state = spec.start()
+        self.saved: list = []
+
+    def compile(
+        self, instr: Instruction
+    ) -> tuple[Callable[[], Any], Callable[[], None]]:
+        step = self.spec.step
+
+        def execute() -> Any:
+            self.saved.append(self.state)
+            self.state, op = step(self.state, instr)
+            return op.ret
+
+        def revert() -> None:
+            self.state = self.saved.pop()
+
+        return execute, revert
+
+    def canonical_state(self) -> Hashable | None:
+        return self.spec.canonical_state(self.state)
+
+
+def machine_for(spec: Specification) -> Machine:
+    """
+    Returns the `Machine` of `spec` in the initial state, or one that executes `start`
+    and `step` if `spec` has none.
+    """
+    machine = spec.machine()
+    return _StepMachine(spec) if machine is None else machine
+
+
+def no_revert() -> None:
+    """The revert function of instructions that leave the state unchanged."""
+    pass
+
+
+# the value of a key that was never written, in undo logs
+_UNSET = object()
+
+
+class _RWMemoryMachine(Machine):
+    def __init__(self) -> None:
+        self.memory: dict = {}
+        # the values overwritten by writes, in order
+        self.saved: list = []
+
+    def compile(
+        self, instr: Instruction
+    ) -> tuple[Callable[[], Any], Callable[[], None]]:
+        memory, saved = self.memory, self.saved
+        match instr.method:
+            case "wr":
+                (key, value) = instr.arg
+
+                def write() -> None:
+                    saved.append(memory.get(key, _UNSET))
+                    memory[key] = value
+
+                def unwrite() -> None:
+                    old = saved.pop()
+                    if old is _UNSET:
+                        del memory[key]
+                    else:
+                        memory[key] = old
+
+                return write, unwrite
+            case "rd":
+                return partial(memory.get, instr.arg), no_revert
+            case _:
+                assert False, f"Unexpected method {instr.method}"
+
+    def canonical_state(self) -> frozenset | None:
+        try:
+            return frozenset(self.memory.items())
+        except TypeError:
+            # unhashable values
+            return None
+
 
 class RWMemorySpecification(Specification):
     def start(self):
         return MappingProxyType({})
 
+    def commutes(self, a: Instruction, b: Instruction) -> bool:
+        if a.method == "rd" and b.method == "rd":
+            return True
+        ka, kb = self.partition(a), self.partition(b)
+        return ka is not None and kb is not None and ka != kb
+
+    def partition(self, instr: Instruction) -> Hashable | None:
+        match instr.method:
+            case "wr":
+                return instr.arg[0]
+            case "rd":
+                return instr.arg
+            case _:
+                return None
+
+    def rename_values(
+        self, op: Operation, rename: Callable[[Any], Any]
+    ) -> Operation | None:
+        # `None` is the initial value of every key, so it keeps its identity
+        if not inherits_semantics(self, RWMemorySpecification):
+            return None
+        match op.method:
+            case "wr":
+                key, value = op.arg
+                if value is None:
+                    return op
+                return op._replace(arg=(key, rename(value)))
+            case "rd":
+                if op.ret is None:
+                    return op
+                return op._replace(ret=rename(op.ret))
+            case _:
+                return None
+
+    def rank(self, op: Operation) -> int:
+        # a read of a written value needs that write to be visible and not overwritten
+        if op.method == "rd":
+            return 0 if op.ret is not None else 1
+        return 2
+
+    def preferred_edges(self, h: History) -> Iterable[tuple[str, str]]:
+        writes: dict[tuple[Any, Any], list[str]] = {}
+        try:
+            for op_id, op in h.label.items():
+                if op.method == "wr":
+                    writes.setdefault(tuple(op.arg), []).append(op_id)
+            for op_id, op in h.label.items():
+                if op.method == "rd" and op.ret is not None:
+                    for w in writes.get((op.arg, op.ret), []):
+                        yield (w, op_id)
+        except TypeError:
+            # unhashable keys or values
+            return
+
+    def saturate(self, h: History) -> bool:
+        # the inferences below assume that keys start as `None`
+        if not inherits_semantics(self, RWMemorySpecification):
+            return True
+        writes: dict[tuple[Any, Any], str] = {}
+        reads: list[str] = []
+        differentiated = True
+        try:
+            for op_id, op in h.label.items():
+                if op.method == "wr":
+                    key, value = op.arg
+                    if (key, value) in writes or value is None:
+                        differentiated = False
+                    writes[(key, value)] = op_id
+                elif op.method == "rd":
+                    reads.append(op_id)
+        except TypeError:
+            # unhashable keys or values
+            return True
+
+        # a read can only return a value that was written (ThinAirRead)
+        for r in reads:
+            op = h.label[r]
+            if op.ret is not None and (op.arg, op.ret) not in writes:
+                return False
+        if not differentiated:
+            return True
+
+        # with differentiated writes, every read must causally follow the write it reads from
+        for r in reads:
+            op = h.label[r]
+            if op.ret is not None and not h.poset.order_try(
+                writes[(op.arg, op.ret)], r
+            ):
+                return False
+
+        for r in reads:
+            op = h.label[r]
+            past = h.poset.predecessors(r)
+            for (key, _), w in writes.items():
+                if key != op.arg or w not in past:
+                    continue
+                if op.ret is None:
+                    # a write to the key is visible, but the read returns the initial value
+                    return False
+                if w != writes[(key, op.ret)] and h.poset.check(
+                    writes[(key, op.ret)], w
+                ):
+                    # the write read from is overwritten before the read
+                    return False
+        return True
+
+    def machine(self) -> Machine | None:
+        # a subclass that redefines `start` or `step` must not be bypassed
+        if not inherits_semantics(self, RWMemorySpecification):
+            return None
+        return _RWMemoryMachine()
+
+    def canonical_state(self, state: MappingProxyType) -> frozenset | None:
+        try:
+            return frozenset(state.items())
+        except TypeError:
+            # unhashable values
+            return None
+
     def step(
         self, state: MappingProxyType, instr: Instruction
     ) -> tuple[MappingProxyType, Operation]:
@@ -134,126 +560,269 @@ class RWMemorySpecification(Specification):
                 assert False, f"Unexpected method {instr.method}"
 
 
-# NOTE: `check_CC` and `check_CM` share the common basic structure, but not sure if it makes sense to merge the two functions
+def _budget(
+    deadline: float | None, max_states: int | None, max_memory: int | None
+) -> Budget | None:
+    if deadline is None and max_states is None and max_memory is None:
+        return None
+    return Budget(deadline, max_states, max_memory)
 
 
 class CCResult(NamedTuple):
-    is_CC: bool
+    is_CC: bool | None
     causal_history: History | None
     serializations: dict[str, list[Operation | Instruction]] | None
-
-
-def check_CC(h: History, spec: Specification) -> CCResult:
-    for i, co in enumerate(h.poset.refinements()):
-        logger.debug(f"check co #{i}: {co}")
-        all_op_satisfied = True
-        serializations: dict[str, list[Operation | Instruction]] | None = dict()
-        for op_id in co.elements():
-            logger.debug(f"    focus on {op_id}: {h.label[op_id]}")
-            exists_valid_topological_sort = False
-
-            # TODO: This deepcopy is probably not necessary (the same for other functions)
-            ch = deepcopy(h)
-            ch.poset = co
-            ch = ch.causal_hist(op_id, {op_id})
-            ros = [*ch.poset.all_topological_sorts()]
-            logger.debug(f"    {len(ros)} possible topological orderings")
-
-            for ro in ros:
-                log = [ch.label[op_id] for op_id in ro]
-                logger.debug(f"        checking: {log}")
-                if spec.satisfies(log):
-                    logger.debug("        satisfied")
-                    logger.info(f"        found satisfying serialization: {ro}")
-                    exists_valid_topological_sort = True
-                    serializations[op_id] = log
-                    break
-                else:
-                    logger.debug("        not satisfied")
-
-            if not exists_valid_topological_sort:
-                all_op_satisfied = False
-                break
-        if all_op_satisfied:
-            ch = deepcopy(h)
-            ch.poset = co
-            return CCResult(True, ch, serializations)
-    return CCResult(False, None, None)
+    bad_pattern: "BadPattern | None" = None
+    stats: Stats | None = None
+    # where to resume the search if the verdict is unknown (`None`)
+    frontier: dict[str, Any] | None = None
+
+
+def check_CC(
+    h: History,
+    spec: Specification,
+    memoize: bool = True,
+    saturate: bool = True,
+    workers: int | None = None,
+    symmetry: bool = True,
+    result_cache: ResultCache | None = None,
+    tracer: Tracer | None = None,
+    deadline: float | None = None,
+    max_states: int | None = None,
+    max_memory: int | None = None,
+    resume: dict[str, Any] | None = None,
+) -> CCResult:
+    """
+    Checks whether `h` is causally consistent (CC) with respect to `spec`.
+
+    The search can be bounded by a `deadline` in seconds, a number of search states
+    `max_states` (causal orders tried and calls to `Specification.step`) and a
+    resident memory size `max_memory` in bytes. If a limit is reached, the verdict is
+    `None` (unknown) and the result holds the partial `stats` and a `frontier`, which
+    can be saved as JSON and passed as `resume` to a later call on the same history to
+    continue the search where it stopped. A resumed search first finishes the causal
+    order it stopped in, even past its limits, so that every resumed call makes
+    progress. With `workers` > 1, `max_memory` only bounds this process, not the
+    workers.
+    """
+    from c3py.search import search_CC
+
+    budget = _budget(deadline, max_states, max_memory)
+    options = (memoize, saturate, workers, symmetry, tracer, budget, resume)
+    check = partial(search_CC, h, spec, *options)
+    return cached_check("CC", h, spec, check, result_cache)
 
 
 class CMResult(NamedTuple):
-    is_CM: bool
+    is_CM: bool | None
     causal_history: History | None
     serializations: dict[str, list[Operation | Instruction]] | None | None
-
-
-def check_CM(h: History, spec: Specification) -> CMResult:
-    for i, co in enumerate(h.poset.refinements()):
-        logger.debug(f"check co #{i}: {co}")
-        all_op_satisfied = True
-        serializations: dict[str, list[Operation | Instruction]] | None = dict()
-        for op_id in co.elements():
-            logger.debug(f"    focus on {op_id}: {h.label[op_id]}")
-            exists_valid_topological_sort = False
-
-            po_past = h.poset.predecessors(op_id)
-            ch = deepcopy(h)
-            ch.poset = co
-            ch = ch.causal_hist(op_id, po_past)
-            ros = [*ch.poset.all_topological_sorts()]
-            logger.debug(f"    {len(ros)} possible topological orderings")
-
-            for ro in ros:
-                log = [ch.label[op_id] for op_id in ro]
-                logger.debug(f"        checking: {log}")
-                if spec.satisfies(log):
-                    logger.debug("        satisfied")
-                    exists_valid_topological_sort = True
-                    serializations[op_id] = log
-                    break
-                else:
-                    logger.debug("        not satisfied")
-
-            if not exists_valid_topological_sort:
-                all_op_satisfied = False
-                break
-        if all_op_satisfied:
-            ch = deepcopy(h)
-            ch.poset = co
-            return CMResult(True, ch, serializations)
-    return CMResult(False, None, None)
+    bad_pattern: "BadPattern | None" = None
+    stats: Stats | None = None
+    # where to resume the search if the verdict is unknown (`None`)
+    frontier: dict[str, Any] | None = None
+
+
+def check_CM(
+    h: History,
+    spec: Specification,
+    memoize: bool = True,
+    saturate: bool = True,
+    workers: int | None = None,
+    symmetry: bool = True,
+    result_cache: ResultCache | None = None,
+    tracer: Tracer | None = None,
+    deadline: float | None = None,
+    max_states: int | None = None,
+    max_memory: int | None = None,
+    resume: dict[str, Any] | None = None,
+) -> CMResult:
+    """Checks CM, see `check_CC` for the parameters."""
+    from c3py.search import search_CM
+
+    budget = _budget(deadline, max_states, max_memory)
+    options = (memoize, saturate, workers, symmetry, tracer, budget, resume)
+    check = partial(search_CM, h, spec, *options)
+    return cached_check("CM", h, spec, check, result_cache)
 
 
 class CCvResult(NamedTuple):
-    is_CCv: bool
+    is_CCv: bool | None
     causal_history: History | None
     arbitration: list[Operation] | None
     serializations: dict[str, list[Instruction | Operation]] | None
-
-
-def check_CCv(h: History, spec: Specification) -> CCvResult:
-    for i, co in enumerate(h.poset.refinements()):
-        logger.debug(f"check co #{i}: {co}")
-        arbs = co.all_topological_sorts()
-        serializations = {}
-        for j, arb in enumerate(arbs):
-            logger.debug(f"    check arb #{j}: {arb}")
-            all_op_satisfied = True
-            for op_id in co.elements():
-                logger.debug(f"        focus on {op_id}")
-                ch = deepcopy(h)
-                ch.poset = co
-                log = ch.causal_arb(op_id, arb)
-                logger.debug(f"        log: {log}")
-                if not spec.satisfies(log):
-                    logger.debug("        not satisfied")
-                    all_op_satisfied = False
-                    break
-                else:
-                    logger.debug("        satisfied")
-                    serializations[op_id] = log
-            if all_op_satisfied:
-                ch = deepcopy(h)
-                ch.poset = co
-                return CCvResult(True, ch, [h.label[s] for s in arb], serializations)
-    return CCvResult(False, None, None, None)
+    bad_pattern: "BadPattern | None" = None
+    stats: Stats | None = None
+    # where to resume the search if the verdict is unknown (`None`)
+    frontier: dict[str, Any] | None = None
+
+
+def check_CCv(
+    h: History,
+    spec: Specification,
+    saturate: bool = True,
+    workers: int | None = None,
+    symmetry: bool = True,
+    result_cache: ResultCache | None = None,
+    tracer: Tracer | None = None,
+    deadline: float | None = None,
+    max_states: int | None = None,
+    max_memory: int | None = None,
+    resume: dict[str, Any] | None = None,
+) -> CCvResult:
+    """Checks CCv, see `check_CC` for the parameters."""
+    from c3py.search import search_CCv
+
+    budget = _budget(deadline, max_states, max_memory)
+    options = (saturate, workers, symmetry, tracer, budget, resume)
+    check = partial(search_CCv, h, spec, *options)
+    return cached_check("CCv", h, spec, check, result_cache)
+
+
+class AllResult(NamedTuple):
+    cc: CCResult
+    cm: CMResult
+    ccv: CCvResult
+
+
+def check_all(
+    h: History,
+    spec: Specification,
+    memoize: bool = True,
+    saturate: bool = True,
+    symmetry: bool = True,
+    result_cache: ResultCache | None = None,
+    tracer: Tracer | None = None,
+    deadline: float | None = None,
+    max_states: int | None = None,
+    max_memory: int | None = None,
+) -> AllResult:
+    """
+    Checks CC, CM and CCv with a single enumeration of the refinements of the causal
+    order.
+
+    A causal order that witnesses CM or CCv also witnesses CC, so a refinement is only
+    checked for CM and CCv if it satisfies CC, and if no refinement satisfies CC the
+    history satisfies none of the three. The enumeration stops once CM and CCv have
+    witnesses. Serializations of causal pasts are cached across refinements and
+    criteria.
+
+    The result cache is consulted for each criterion, and the search only runs if one
+    of them is missing. The three results share their `stats`.
+
+    The search can be bounded like that of `check_CC`; criteria without a verdict when
+    the budget runs out get the verdict `None`, but the search cannot be resumed.
+    """
+    from c3py.search import search_all
+
+    budget = _budget(deadline, max_states, max_memory)
+    if result_cache is None:
+        result_cache = get_default_cache()
+    if result_cache is not None and spec.cache_key() is not None:
+        lookups = [
+            _cache_lookup(criterion, h, spec, result_cache)
+            for criterion in ("CC", "CM", "CCv")
+        ]
+        if all(result is not None for _, _, result in lookups):
+            stats = Stats(result_cache_hits=len(lookups))
+            return AllResult(
+                *(result._replace(stats=stats) for _, _, result in lookups)
+            )
+        results = search_all(h, spec, memoize, saturate, symmetry, tracer, budget)
+        for (key, rename, _), result in zip(lookups, results):
+            if result[0] is not None:
+                result_cache.put(key, _cache_entry(result, rename))
+        return results
+    return search_all(h, spec, memoize, saturate, symmetry, tracer, budget)
+
+
+def _cache_entry(result: CCResult | CMResult | CCvResult, rename: dict[str, str]):
+    entry: dict[str, Any] = {"verdict": result[0]}
+    if result.bad_pattern is not None:
+        entry["bad_pattern"] = result.bad_pattern.value
+    if result[0]:
+        entry["causal_order"] = [
+            [rename[a], rename[b]] for a, b in result.causal_history.poset.edges()
+        ]
+        if isinstance(result, CCvResult):
+            entry["arbitration"] = [rename[op.op_id] for op in result.arbitration]
+    return entry
+
+
+def _restore(
+    criterion: str, h: History, spec: Specification, entry: dict[str, Any]
+) -> CCResult | CMResult | CCvResult | None:
+    """
+    Rebuilds a result from a cache entry whose operation ids are those of `h`. The
+    serializations are recomputed from the cached witness, which is cheap, and `None`
+    is returned if the witness does not hold.
+    """
+    if not entry["verdict"]:
+        pattern = None
+        if "bad_pattern" in entry:
+            from c3py.differentiated import BadPattern
+
+            pattern = BadPattern(entry["bad_pattern"])
+        if criterion == "CCv":
+            return CCvResult(False, None, None, None, pattern)
+        return (CCResult if criterion == "CC" else CMResult)(False, None, None, pattern)
+    from c3py.search import check_co_CC, check_co_CM, with_edges
+
+    co = with_edges(h.poset, entry["causal_order"])
+    ch = h.with_poset(co)
+    if criterion == "CCv":
+        arb = entry["arbitration"]
+        serializations = {o: ch.causal_arb(o, arb) for o in co.elements()}
+        if not all(spec.satisfies(log) for log in serializations.values()):
+            return None
+        return CCvResult(True, ch, [h.label[o] for o in arb], serializations)
+    check_co = check_co_CC if criterion == "CC" else check_co_CM
+    serializations = check_co(h, co, spec, True, dict())
+    if serializations is None:
+        return None
+    return (CCResult if criterion == "CC" else CMResult)(True, ch, serializations)
+
+
+def _cache_lookup(criterion: str, h: History, spec: Specification, cache: ResultCache):
+    """Returns the cache key, the renaming to canonical ids and the cached result."""
+    key, rename = fingerprint(h, spec, criterion)
+    entry = cache.get(key)
+    if entry is None:
+        return key, rename, None
+    original = {c: o for o, c in rename.items()}
+    entry["causal_order"] = [
+        (original[a], original[b]) for a, b in entry.get("causal_order", [])
+    ]
+    entry["arbitration"] = [original[o] for o in entry.get("arbitration", [])]
+    result = _restore(criterion, h, spec, entry)
+    if result is None:
+        logger.warning(f"cached {criterion} witness does not hold, checking again")
+    return key, rename, result
+
+
+def cached_check(
+    criterion: str,
+    h: History,
+    spec: Specification,
+    check: Callable[[], CCResult | CMResult | CCvResult | None],
+    result_cache: ResultCache | None = None,
+):
+    """
+    Returns the result for `criterion` from `result_cache` (or the default cache, see
+    `c3py.cache.set_default_cache`), or runs `check` and stores its result if it has a
+    verdict. `check` may return `None` if it cannot decide, which is returned as is.
+
+    `check_CC`, `check_CM` and `check_CCv` are cached this way; other checkers (e.g.
+    those of `c3py.differentiated`) use it to share their cache entries.
+    """
+    if result_cache is None:
+        result_cache = get_default_cache()
+    if result_cache is None or spec.cache_key() is None:
+        return check()
+    key, rename, result = _cache_lookup(criterion, h, spec, result_cache)
+    if result is None:
+        result = check()
+        if result is not None and result[0] is not None:
+            result_cache.put(key, _cache_entry(result, rename))
+        return result
+    return result._replace(stats=Stats(result_cache_hits=1))
@@ -0,0 +1,147 @@
+"""
+Incremental checking of histories that grow one operation at a time.
+"""
+
+import logging
+from copy import deepcopy
+
+from c3py.history import (
+    CCResult,
+    CCvResult,
+    CMResult,
+    History,
+    Operation,
+    Specification,
+    check_CC,
+    check_CCv,
+    check_CM,
+)
+from c3py.poset import Poset
+from c3py.search import serialization_CC, serialization_CM
+
+logger = logging.getLogger(__name__)
+
+_CHECKS = {"CC": check_CC, "CM": check_CM, "CCv": check_CCv}
+
+
+class IncrementalChecker:
+    """
+    Checks a history that is captured one operation at a time.
+
+    The checker keeps the witness of the last successful check. When operations are
+    appended, it first tries to extend that witness: each new operation is added as a
+    maximal element of the causal order, either right after its program-order
+    predecessor or after every operation seen so far, and only the new operation has
+    to be serialized (the causal pasts of older operations do not change). Only if no
+    extension works, or if there is no witness, the whole history is checked again.
+
+    Example:
+        checker = IncrementalChecker(RWMemorySpecification(), "CC")
+        checker.append("a", Operation("wr", ("x", 1)))
+        checker.append("b", Operation("rd", "x", 1))
+        assert checker.check().is_CC
+    """
+
+    def __init__(
+        self,
+        spec: Specification,
+        criterion: str = "CC",
+        poset_cls: type = Poset,
+        **options,
+    ) -> None:
+        """
+        Parameters:
+            spec: The sequential specification to check against.
+            criterion: "CC", "CM" or "CCv".
+            poset_cls: The poset implementation used by the history.
+            options: Keyword arguments passed to `check_CC`, `check_CM` or `check_CCv` when the whole history has to be checked.
+        """
+        assert criterion in _CHECKS, f"Unexpected criterion {criterion}"
+        self.spec = spec
+        self.criterion = criterion
+        self.options = options
+        self.history = History({}, poset_cls=poset_cls)
+        self.length: dict[str, int] = {}
+        self.result: CCResult | CMResult | CCvResult | None = None
+        # operations appended since the last check
+        self.pending: list[str] = []
+        # number of checks answered by extending a witness / by a full check
+        self.extended = 0
+        self.rechecked = 0
+        self._cache: dict = dict()
+
+    def append(self, process: str, op: Operation) -> str:
+        """Appends `op` to the operations of `process` and returns its operation id."""
+        assert isinstance(op, Operation), "invalid operation"
+        i = self.length.get(process, 0)
+        op_id = f"{process}.{i + 1}"
+        self.length[process] = i + 1
+        h = self.history
+        h.operations.add(op_id)
+        h.label[op_id] = op._replace(op_id=op_id)
+        h.poset.add(op_id)
+        if i > 0:
+            h.poset.order_force(f"{process}.{i}", op_id)
+        self.pending.append(op_id)
+        return op_id
+
+    def check(self) -> CCResult | CMResult | CCvResult:
+        """Checks the history including every appended operation."""
+        pending, self.pending = self.pending, []
+        if self.result is not None and self.result[0]:
+            result = self._extend(self.result, pending)
+            if result is not None:
+                self.extended += 1
+                self.result = result
+                return result
+            logger.debug("witness could not be extended, checking the whole history")
+        self.rechecked += 1
+        self.result = _CHECKS[self.criterion](self.history, self.spec, **self.options)
+        return self.result
+
+    def _extend(
+        self, result: CCResult | CMResult | CCvResult, pending: list[str]
+    ) -> CCResult | CMResult | CCvResult | None:
+        h = self.history
+        co = deepcopy(result.causal_history.poset)
+        serializations = dict(result.serializations)
+        arb = (
+            [op.op_id for op in result.arbitration] if self.criterion == "CCv" else None
+        )
+        for op_id in pending:
+            process, i = op_id.rsplit(".", 1)
+            previous = f"{process}.{int(i) - 1}" if int(i) > 1 else None
+            for after_all in (False, True):
+                c = deepcopy(co)
+                c.add(op_id)
+                if after_all:
+                    for o in co.elements():
+                        c.order_force(o, op_id)
+                elif previous is not None:
+                    c.order_force(previous, op_id)
+                log = self._serialize(c, op_id, arb)
+                if log is not None:
+                    co = c
+                    serializations[op_id] = log
+                    if arb is not None:
+                        arb.append(op_id)
+                    break
+            else:
+                return None
+
+        ch = h.with_poset(co)
+        if self.criterion == "CC":
+            return CCResult(True, ch, serializations)
+        if self.criterion == "CM":
+            return CMResult(True, ch, serializations)
+        return CCvResult(True, ch, [h.label[o] for o in arb], serializations)
+
+    def _serialize(self, co: Poset, op_id: str, arb: list[str] | None):
+        h = self.history
+        memoize = self.options.get("memoize", True)
+        if self.criterion == "CC":
+            return serialization_CC(h, co, op_id, self.spec, memoize, self._cache)
+        if self.criterion == "CM":
+            return serialization_CM(h, co, op_id, self.spec, memoize, self._cache)
+        log = h.with_poset(co).causal_arb(op_id, [*arb, op_id])
+        return log if self.spec.satisfies(log) else None
@@ -0,0 +1,71 @@
+import pytest
+
+from c3py.history import (
+    History,
+    Operation,
+    RWMemorySpecification,
+    check_CC,
+    check_CCv,
+    check_CM,
+)
+from c3py.incremental import IncrementalChecker
+from c3py.poset import BitPoset, Poset
+
+from . import history_test
+
+CHECKS = {"CC": check_CC, "CM": check_CM, "CCv": check_CCv}
+
+
+def replay(data, checker):
+    """Appends the operations of `data` round-robin, checking after every one."""
+    verdicts = []
+    for i in range(max(len(ops) for ops in data.values())):
+        for process, ops in data.items():
+            if i < len(ops):
+                checker.append(process, ops[i])
+                verdicts.append(checker.check()[0])
+    return verdicts
+
+
+class TestIncrementalChecker:
+    @pytest.mark.parametrize("criterion", ["CC", "CM", "CCv"])
+    @pytest.mark.parametrize("poset_cls", [Poset, BitPoset])
+    @pytest.mark.parametrize("name", ["a", "b", "c"])
+    def test_same_verdicts(self, criterion, poset_cls, name):
+        h = getattr(history_test.TestHistory(), f"make_history_{name}")()
+        data = {}
+        for op_id in sorted(h.operations):
+            data.setdefault(op_id.split(".")[0], []).append(h.label[op_id])
+        spec = RWMemorySpecification()
+        checker = IncrementalChecker(spec, criterion, poset_cls)
+        replay(data, checker)
+        result = checker.result
+        assert result[0] == CHECKS[criterion](History(data), spec)[0]
+        if result[0]:
+            assert set(result.serializations) == h.operations
+            for log in result.serializations.values():
+                assert spec.satisfies(log)
+
+    def test_extends_witness(self):
+        spec = RWMemorySpecification()
+        checker = IncrementalChecker(spec, "CC")
+        checker.append("a", Operation("wr", ("x", 1)))
+        assert checker.check().is_CC
+        assert checker.rechecked == 1
+        checker.append("b", Operation("rd", "x", None))
+        checker.append("b", Operation("rd", "x", 1))
+        checker.append("a", Operation("rd", "x", 1))
+        result = checker.check()
+        assert result.is_CC
+        assert checker.extended == 1
+        assert checker.rechecked == 1
+        assert result.causal_history.poset.check("a.1", "b.2")
+
+    def test_rechecks_after_failure(self):
+        spec = RWMemorySpecification()
+        checker = IncrementalChecker(spec, "CC")
+        checker.append("a", Operation("rd", "x", 1))
+        assert not checker.check().is_CC
+        checker.append("b", Operation("wr", ("x", 1)))
+        assert checker.check().is_CC
+        assert checker.rechecked == 2
@@ -0,0 +1,265 @@
+"""
+Loading recorded histories from disk.
+
+Two formats are supported:
+
+- Line-oriented records (JSONL or CSV), one operation per record, with the fields
+  `process`, `method`, `arg`, `ret` and the optional `invoke` and `complete`
+  timestamps. Records are streamed, so the file is never read into memory as a whole.
+  The operations of a process must appear in program order.
+- A binary columnar format written by `write_columnar`. It stores the columns of a
+  `CompactHistory` and is memory-mapped by `ColumnarHistory`, so a time window can be
+  selected without parsing the file.
+
+JSON has no tuples, so lists in arguments and return values are read as tuples:
+`{"method": "wr", "arg": ["x", 1]}` becomes `Operation("wr", ("x", 1))`.
+"""
+
+import csv
+import json
+import math
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from os import PathLike
+from typing import Any
+
+from c3py.compact import CompactHistory, InternTable
+from c3py.history import History, Operation
+from c3py.poset import BitPoset
+
+_MAGIC = b"C3PYCOL1"
+# magic, number of operations, offset of the footer
+_HEADER = struct.Struct("<8sQQ")
+# timestamp columns first, so that every column is aligned to its item size
+_FLOAT_COLUMNS = ("invoke", "complete")
+_INT_COLUMNS = ("process", "position", "method", "arg", "ret")
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _timestamp(value: Any) -> float | None:
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+def iter_jsonl(path: str | PathLike) -> Iterator[dict[str, Any]]:
+    """Yields the records of a JSONL file one line at a time."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_csv(path: str | PathLike) -> Iterator[dict[str, Any]]:
+    """
+    Yields the records of a CSV file with a header row one row at a time.
+
+    The `arg` and `ret` cells are parsed as JSON if possible and kept as strings
+    otherwise; empty cells are `None`.
+    """
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            for key in ("arg", "ret"):
+                cell = row.get(key)
+                if not cell:
+                    row[key] = None
+                    continue
+                try:
+                    row[key] = json.loads(cell)
+                except json.JSONDecodeError:
+                    pass
+            yield row
+
+
+def read_records(records: Iterable[dict[str, Any]]) -> CompactHistory:
+    """Builds a compact history from operation records."""
+    h = CompactHistory()
+    for n, record in enumerate(records, 1):
+        try:
+            process = str(record["process"])
+            op = Operation(
+                record["method"],
+                _freeze(record.get("arg")),
+                _freeze(record.get("ret")),
+            )
+        except KeyError as e:
+            raise ValueError(f"record {n}: missing field {e}") from None
+        h.append(
+            process,
+            op,
+            _timestamp(record.get("invoke")),
+            _timestamp(record.get("complete")),
+        )
+    return h
+
+
+def read_jsonl(path: str | PathLike) -> CompactHistory:
+    return read_records(iter_jsonl(path))
+
+
+def read_csv(path: str | PathLike) -> CompactHistory:
+    return read_records(iter_csv(path))
+
+
+def load_jsonl(path: str | PathLike, poset_cls: type = BitPoset) -> History:
+    """Loads a history from a JSONL file of operation records."""
+    return read_jsonl(path).to_history(poset_cls)
+
+
+def load_csv(path: str | PathLike, poset_cls: type = BitPoset) -> History:
+    """Loads a history from a CSV file of operation records."""
+    return read_csv(path).to_history(poset_cls)
+
+
+def write_columnar(h: CompactHistory, path: str | PathLike) -> None:
+    """
+    Writes `h` in the binary columnar format.
+
+    The file is a header, the columns of `h` as little-endian arrays and a JSON footer
+    with the interned processes, methods and values, so values must be serializable as
+    JSON.
+    """
+    footer = json.dumps(
+        {
+            "processes": h.processes.values,
+            "methods": h.methods.values,
+            "values": h.values.values,
+        }
+    ).encode()
+    n = len(h)
+    offset = _HEADER.size + n * (8 * len(_FLOAT_COLUMNS) + 4 * len(_INT_COLUMNS))
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, n, offset))
+        for name in (*_FLOAT_COLUMNS, *_INT_COLUMNS):
+            column = getattr(h, name)
+            if sys.byteorder != "little":
+                column = array(column.typecode, column)
+                column.byteswap()
+            column.tofile(f)
+        f.write(footer)
+
+
+class ColumnarHistory:
+    """
+    A history in the binary columnar format, memory-mapped from disk.
+
+    Only the intern tables are parsed when the file is opened. The columns are read in
+    place, so selecting the operations of a time window with `window` touches just the
+    timestamps and the selected rows.
+
+    Example:
+        with ColumnarHistory("run.c3py") as ch:
+            h = ch.window(10.0, 20.0).to_history()
+    """
+
+    def __init__(self, path: str | PathLike) -> None:
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        if len(self._buffer) < _HEADER.size:
+            magic, n, offset = b"", 0, 0
+        else:
+            magic, n, offset = _HEADER.unpack_from(self._buffer)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a columnar history")
+        self.n = n
+        self.columns: dict[str, Any] = {}
+        start = _HEADER.size
+        for name in (*_FLOAT_COLUMNS, *_INT_COLUMNS):
+            typecode, size = ("d", 8) if name in _FLOAT_COLUMNS else ("i", 4)
+            column = self._buffer[start : start + n * size].cast(typecode)
+            if sys.byteorder != "little":
+                column = array(typecode, column)
+                column.byteswap()
+            self.columns[name] = column
+            start += n * size
+        footer = json.loads(bytes(self._buffer[offset:]))
+        self.processes = footer["processes"]
+        self.methods = footer["methods"]
+        self.values = [_freeze(v) for v in footer["values"]]
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __enter__(self) -> "ColumnarHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for column in getattr(self, "columns", {}).values():
+            if isinstance(column, memoryview):
+                column.release()
+        self.columns = {}
+        self._buffer.release()
+        self._mmap.close()
+        self._file.close()
+
+    def window(self, start: float = -math.inf, end: float = math.inf) -> CompactHistory:
+        """
+        Returns the operations invoked in the time window `[start, end)`.
+
+        Operations without an invocation timestamp are only part of the unbounded
+        window. Positions in a process are counted from the start of the window.
+        """
+        invoke = self.columns["invoke"]
+        if start == -math.inf and end == math.inf:
+            rows: Iterable[int] = range(self.n)
+        else:
+            rows = [i for i in range(self.n) if start <= invoke[i] < end]
+        return self._select(rows)
+
+    def to_compact(self) -> CompactHistory:
+        return self.window()
+
+    def to_history(self, poset_cls: type = BitPoset) -> History:
+        return self.to_compact().to_history(poset_cls)
+
+    def _select(self, rows: Iterable[int]) -> CompactHistory:
+        h = CompactHistory()
+        for name, values in (
+            ("processes", self.processes),
+            ("methods", self.methods),
+            ("values", self.values),
+        ):
+            table = InternTable()
+            table.values = list(values)
+            for i, value in enumerate(values):
+                try:
+                    table.ids.setdefault(value, i)
+                except TypeError:
+                    pass
+            setattr(h, name, table)
+        c = self.columns
+        for i in rows:
+            p = c["process"][i]
+            h.length[p] = h.length.get(p, 0) + 1
+            h.process.append(p)
+            h.position.append(h.length[p])
+            h.method.append(c["method"][i])
+            h.arg.append(c["arg"][i])
+            h.ret.append(c["ret"][i])
+            h.invoke.append(c["invoke"][i])
+            h.complete.append(c["complete"][i])
+        return h
+
+
+def load_columnar(
+    path: str | PathLike,
+    start: float = -math.inf,
+    end: float = math.inf,
+    poset_cls: type = BitPoset,
+) -> History:
+    """Loads the operations invoked in `[start, end)` from a columnar history file."""
+    with ColumnarHistory(path) as ch:
+        return ch.window(start, end).to_history(poset_cls)
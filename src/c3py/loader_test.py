@@ -0,0 +1,90 @@
+import json
+import math
+
+import pytest
+
+from c3py.history import Operation, RWMemorySpecification, check_CC
+from c3py.loader import (
+    ColumnarHistory,
+    load_columnar,
+    load_csv,
+    load_jsonl,
+    read_jsonl,
+    write_columnar,
+)
+
+RECORDS = [
+    {"process": "a", "method": "wr", "arg": ["x", 1], "invoke": 0.0, "complete": 1.0},
+    {"process": "b", "method": "rd", "arg": "x", "ret": 1, "invoke": 2.0},
+    {"process": "a", "method": "wr", "arg": ["x", 2], "invoke": 3.0, "complete": 4.0},
+    {"process": "b", "method": "rd", "arg": "x", "ret": 2, "invoke": 5.0},
+]
+
+
+@pytest.fixture
+def jsonl(tmp_path):
+    path = tmp_path / "history.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in RECORDS))
+    return path
+
+
+class TestLoader:
+    def test_jsonl(self, jsonl):
+        h = load_jsonl(jsonl)
+        assert h.operations == {"a.1", "a.2", "b.1", "b.2"}
+        assert h.label["a.2"] == Operation("wr", ("x", 2), None, "a.2")
+        assert h.poset.check("a.1", "a.2")
+        assert not h.poset.check("a.1", "b.1")
+        assert check_CC(h, RWMemorySpecification()).is_CC
+
+    def test_timestamps(self, jsonl):
+        c = read_jsonl(jsonl)
+        assert list(c.invoke) == [0.0, 2.0, 3.0, 5.0]
+        assert c.complete[0] == 1.0
+        assert math.isnan(c.complete[1])
+
+    def test_csv(self, tmp_path, jsonl):
+        path = tmp_path / "history.csv"
+        path.write_text(
+            "process,method,arg,ret,invoke,complete\n"
+            'a,wr,"[""x"", 1]",,0.0,1.0\n'
+            "b,rd,x,1,2.0,\n"
+            'a,wr,"[""x"", 2]",,3.0,4.0\n'
+            "b,rd,x,2,5.0,\n"
+        )
+        h = load_csv(path)
+        expected = load_jsonl(jsonl)
+        assert h.label == expected.label
+        assert set(h.poset.edges()) == set(expected.poset.edges())
+
+    def test_missing_field(self, tmp_path):
+        path = tmp_path / "history.jsonl"
+        path.write_text(json.dumps({"process": "a", "arg": "x"}) + "\n")
+        with pytest.raises(ValueError, match="record 1"):
+            load_jsonl(path)
+
+
+class TestColumnar:
+    def test_round_trip(self, tmp_path, jsonl):
+        path = tmp_path / "history.c3py"
+        write_columnar(read_jsonl(jsonl), path)
+        h = load_columnar(path)
+        expected = load_jsonl(jsonl)
+        assert h.label == expected.label
+        assert set(h.poset.edges()) == set(expected.poset.edges())
+
+    def test_window(self, tmp_path, jsonl):
+        path = tmp_path / "history.c3py"
+        write_columnar(read_jsonl(jsonl), path)
+        with ColumnarHistory(path) as ch:
+            assert len(ch) == 4
+            c = ch.window(2.0, 5.0)
+            assert [c.op_id(i) for i in range(len(c))] == ["b.1", "a.1"]
+            assert c.operation(1) == Operation("wr", ("x", 2), None, "a.1")
+            assert c.invoke[1] == 3.0
+        h = load_columnar(path, 3.0)
+        assert h.label["b.1"] == Operation("rd", "x", 2, "b.1")
+
+    def test_not_columnar(self, jsonl):
+        with pytest.raises(ValueError):
+            ColumnarHistory(jsonl)
@@ -1,7 +1,8 @@
 from collections import deque
 from copy import deepcopy
-from itertools import permutations, product
-from typing import Any
+from heapq import heappop, heappush
+from itertools import combinations, product
+from typing import Any, Iterator
 
 import networkx as nx
 import pydot
@@ -14,17 +15,41 @@ class Poset:
 
         self.asymmetry_violation_cache = set()
 
+    @classmethod
+    def from_chains(cls, chains: list[list[str]]) -> "Poset":
+        """Returns the poset that totally orders each chain and nothing else."""
+        poset = cls({e for chain in chains for e in chain})
+        for chain in chains:
+            for a, b in zip(chain, chain[1:]):
+                poset.order_try(a, b)
+        return poset
+
     def __eq__(self, __value: object) -> bool:
         if isinstance(__value, Poset):
             return nx.utils.graphs_equal(self.G, __value.G)
         return self == __value
 
     def __hash__(self) -> int:
-        return hash(nx.weisfeiler_lehman_graph_hash(self.G))
+        # the graph is transitively closed, so equal posets have equal edge sets
+        return hash((frozenset(self.G.nodes), frozenset(self.G.edges)))
+
+    def __deepcopy__(self, memo) -> "Poset":
+        # elements are immutable, so copying the graph structure is enough
+        c = Poset.__new__(Poset)
+        c.G = self.G.copy()
+        c.asymmetry_violation_cache = set(self.asymmetry_violation_cache)
+        return c
 
     def link(self, a: str, b: str):
         self.G.add_edge(a, b)
 
+    def edges(self) -> Iterator[tuple[str, str]]:
+        return iter(self.G.edges)
+
+    def add(self, element: str):
+        """Adds a new element, unordered with respect to every other element."""
+        self.G.add_node(element)
+
     def predecessors(self, node: str) -> set[str]:
         """
         Returns a set of all predecessors of the given node in the poset.
@@ -73,8 +98,8 @@ class Poset:
         return set(self.G.nodes)
 
     def subset(self, nodes):
-        s = deepcopy(self)
-        s.G = s.G.subgraph(nodes)
+        s = Poset.__new__(Poset)
+        s.G = self.G.subgraph(nodes).copy()
         s.asymmetry_violation_cache = set()
         return s
 
@@ -104,37 +129,16 @@ class Poset:
         return self.G.has_edge(a, b)
 
     def refinements(self) -> set["Poset"]:
-        elements = set(self.G.nodes)
-        pairs = set(permutations(elements, 2))
-        existing_pairs = {e for e in self.G.edges}
-        reverse_existing_pairs = {(b, a) for a, b in existing_pairs}
-        pairs = list(pairs - existing_pairs - reverse_existing_pairs)
-        pair_count = len(pairs)  # number of pairs
-        r = set()  # refinements
-        q = deque([(self, 0)])
-        while len(q) > 0:
-            poset, n = q.popleft()
-            r.add(deepcopy(poset))
-
-            # base case
-            if n == pair_count:
-                continue
+        return set(self.iter_refinements())
 
-            # don't add edge
-            q.append((poset, n + 1))
+    def iter_refinements(
+        self, preferred: list[tuple[str, str]] | None = None, stack: list | None = None
+    ) -> Iterator["Poset"]:
+        return _iter_refinements(self, preferred, stack)
 
-            # add edge
-            u, v = pairs[n]
-            if poset.check(u, v):
-                # already connected
-                continue
-            if not poset.can_order(u, v):
-                # would break asymmetry
-                continue
-            poset = deepcopy(poset)
-            poset.order_force(u, v)
-            q.append((poset, n + 1))
-        return r
+    def topological_sort(self) -> list[str]:
+        """Returns one linear extension of the poset."""
+        return list(nx.topological_sort(self.G))
 
     def all_topological_sorts(self):
         return nx.all_topological_sorts(self.G)
@@ -144,3 +148,305 @@ class Poset:
         if mapping is not None:
             TR = nx.relabel_nodes(TR, mapping)
         return nx.nx_pydot.to_pydot(TR)
+
+
+class BitPoset:
+    """
+    A poset over a fixed set of elements backed by integer bitmasks.
+
+    Each element gets a dense index, and the transitive closure is kept as one
+    predecessor mask and one successor mask per element (both including the
+    element itself). Order checks are single bit tests, ordering two elements
+    ORs whole masks together, and copies only copy two lists of integers.
+
+    `BitPoset` provides the same interface as `Poset` and can be used in its place,
+    e.g. `History(data, poset_cls=BitPoset)`. networkx is only used by `visualize`.
+    """
+
+    def __init__(self, elements):
+        self.index = {e: i for i, e in enumerate(sorted(elements))}
+        self.items = list(self.index)
+        self.universe = (1 << len(self.items)) - 1
+        self.pred = [1 << i for i in range(len(self.items))]
+        self.succ = [1 << i for i in range(len(self.items))]
+
+    @classmethod
+    def from_chains(cls, chains: list[list[str]]) -> "BitPoset":
+        """
+        Returns the poset that totally orders each chain and nothing else, in time
+        linear in the number of elements (times the mask width).
+        """
+        poset = cls({e for chain in chains for e in chain})
+        for chain in chains:
+            indices = [poset.index[e] for e in chain]
+            for a, b in zip(indices, indices[1:]):
+                poset.pred[b] |= poset.pred[a]
+            for a, b in zip(reversed(indices[:-1]), reversed(indices[1:])):
+                poset.succ[a] |= poset.succ[b]
+        return poset
+
+    def __eq__(self, __value: object) -> bool:
+        if isinstance(__value, BitPoset):
+            return self.elements() == __value.elements() and all(
+                self.predecessors(e) == __value.predecessors(e) for e in self.elements()
+            )
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((frozenset(self.elements()), frozenset(self.edges())))
+
+    def __deepcopy__(self, memo) -> "BitPoset":
+        c = BitPoset.__new__(BitPoset)
+        # the index is never mutated, so copies can share it
+        c.index = self.index
+        c.items = self.items
+        c.universe = self.universe
+        c.pred = self.pred.copy()
+        c.succ = self.succ.copy()
+        return c
+
+    def add(self, element: str):
+        """Adds a new element, unordered with respect to every other element."""
+        assert element not in self.index, f"{element} is already in the poset"
+        i = len(self.items)
+        # copies share the index, so replace it instead of mutating it
+        self.index = {**self.index, element: i}
+        self.items = [*self.items, element]
+        self.universe |= 1 << i
+        self.pred.append(1 << i)
+        self.succ.append(1 << i)
+
+    def decode(self, mask: int) -> set[str]:
+        """Returns the set of elements whose bits are set in `mask`."""
+        elements = set()
+        while mask:
+            low = mask & -mask
+            elements.add(self.items[low.bit_length() - 1])
+            mask ^= low
+        return elements
+
+    def link(self, a: str, b: str):
+        self.order_force(a, b)
+
+    def predecessors(self, node: str) -> set[str]:
+        """
+        Returns a set of all predecessors of the given node in the poset.
+        The set will contain the node itself.
+        """
+        return self.decode(self.pred[self.index[node]])
+
+    def successors(self, node: str) -> set[str]:
+        """
+        Returns the set of successors of the given node in the poset.
+        The set will contain the node itself.
+        """
+        return self.decode(self.succ[self.index[node]])
+
+    def elements(self) -> set[str]:
+        return self.decode(self.universe)
+
+    def edges(self) -> Iterator[tuple[str, str]]:
+        for a in self.elements():
+            for b in self.decode(self.succ[self.index[a]]):
+                if a != b:
+                    yield (a, b)
+
+    def subset(self, nodes):
+        s = deepcopy(self)
+        keep = 0
+        for n in nodes:
+            keep |= 1 << self.index[n]
+        s.universe = keep
+        for i in range(len(s.items)):
+            if keep >> i & 1:
+                s.pred[i] &= keep
+                s.succ[i] &= keep
+            else:
+                s.pred[i] = 0
+                s.succ[i] = 0
+        return s
+
+    def can_order(self, a: str, b: str):
+        # a < b breaks asymmetry iff b is already below (or equal to) a
+        return not (self.pred[self.index[a]] >> self.index[b] & 1)
+
+    def order_force(self, a: str, b: str):
+        p = self.pred[self.index[a]]
+        s = self.succ[self.index[b]]
+        m = s
+        while m:
+            low = m & -m
+            self.pred[low.bit_length() - 1] |= p
+            m ^= low
+        m = p
+        while m:
+            low = m & -m
+            self.succ[low.bit_length() - 1] |= s
+            m ^= low
+
+    def order_try(self, a: str, b: str):
+        if self.can_order(a, b):
+            self.order_force(a, b)
+            return True
+        return False
+
+    def check(self, a: str, b: str):
+        return a != b and bool(self.succ[self.index[a]] >> self.index[b] & 1)
+
+    def refinements(self) -> set["BitPoset"]:
+        return set(self.iter_refinements())
+
+    def iter_refinements(
+        self, preferred: list[tuple[str, str]] | None = None, stack: list | None = None
+    ) -> Iterator["BitPoset"]:
+        return _iter_refinements(self, preferred, stack)
+
+    def topological_sort(self) -> list[str]:
+        """
+        Returns one linear extension of the poset, preferring lower indices.
+
+        This is Kahn's algorithm, with the elements whose predecessors are all placed
+        in a heap. Instead of counting the predecessors of every element left, which
+        walks the whole transitive closure, an element waits for one maximal
+        predecessor that is not placed yet, and looks for another one once it is.
+        """
+        remaining = self.universe
+        # elements waiting for each element to be placed
+        waiting: list[list[int]] = [[] for _ in self.items]
+        ready: list[int] = []
+
+        def wait_or_ready(j: int) -> None:
+            m = self.pred[j] & remaining & ~(1 << j)
+            if m == 0:
+                heappush(ready, j)
+                return
+            # climb to a maximal element of m
+            k = m.bit_length() - 1
+            above = self.succ[k] & m & ~(1 << k)
+            while above:
+                k = above.bit_length() - 1
+                above = self.succ[k] & m & ~(1 << k)
+            waiting[k].append(j)
+
+        m = self.universe
+        while m:
+            low = m & -m
+            wait_or_ready(low.bit_length() - 1)
+            m ^= low
+        order = []
+        while len(ready) > 0:
+            i = heappop(ready)
+            order.append(self.items[i])
+            remaining &= ~(1 << i)
+            for j in waiting[i]:
+                wait_or_ready(j)
+            waiting[i] = []
+        return order
+
+    def all_topological_sorts(self) -> Iterator[list[str]]:
+        n = len(self.items)
+        strict_pred = [self.pred[i] & ~(1 << i) for i in range(n)]
+        order: list[str] = []
+        # the elements placed and the next index to try, for every prefix of `order`;
+        # an explicit stack, so that long chains do not exhaust the recursion limit
+        stack = [(0, 0)]
+        while len(stack) > 0:
+            placed, start = stack.pop()
+            if placed == self.universe:
+                yield list(order)
+                if len(order) > 0:
+                    order.pop()
+                continue
+            for i in range(start, n):
+                bit = 1 << i
+                if (
+                    self.universe & bit
+                    and not placed & bit
+                    and strict_pred[i] & ~placed == 0
+                ):
+                    stack.append((placed, i + 1))
+                    stack.append((placed | bit, 0))
+                    order.append(self.items[i])
+                    break
+            else:
+                # every extension of this prefix was yielded
+                if len(order) > 0:
+                    order.pop()
+
+    def visualize(self, mapping: Any) -> pydot.Dot:
+        G = nx.DiGraph()
+        G.add_nodes_from(self.elements())
+        G.add_edges_from(self.edges())
+        TR = nx.transitive_reduction(G)
+        if mapping is not None:
+            TR = nx.relabel_nodes(TR, mapping)
+        return nx.nx_pydot.to_pydot(TR)
+
+
+def _iter_refinements(
+    poset, preferred: list[tuple[str, str]] | None = None, stack: list | None = None
+):
+    """
+    Lazily yields every refinement of `poset`, each exactly once.
+
+    Every unordered pair of elements is decided as incomparable, ordered one way,
+    or ordered the other way. A pair decided as incomparable is remembered and any
+    later ordering that would make it comparable is pruned, so the same refinement
+    can never be reached twice and no deduplication set is needed. The search is
+    depth-first, so memory stays proportional to the number of pairs.
+
+    The first refinement yielded is (a copy of) the poset itself. If `preferred` edges
+    are given, their pairs are decided first and ordered as preferred before the other
+    choices are tried, so refinements containing them come first.
+
+    The pending branches are kept in `stack` as `(poset, pair index, incomparable
+    pairs)`. A caller can pass its own list, starting from `[(poset, 0, frozenset())]`,
+    to save the pending branches between refinements and continue the search later by
+    passing them again (with the same `poset` and `preferred`).
+    """
+    pairs = list(combinations(sorted(poset.elements()), 2))
+    prefer = {}
+    for a, b in preferred or []:
+        if a != b:
+            prefer.setdefault((min(a, b), max(a, b)), (a, b))
+    if len(prefer) > 0:
+        pairs.sort(key=lambda pair: pair not in prefer)
+    pair_count = len(pairs)
+    if stack is None:
+        stack = [(deepcopy(poset), 0, frozenset())]
+    while len(stack) > 0:
+        poset, n, incomparable = stack.pop()
+        # skip pairs already decided by earlier choices
+        while n < pair_count and (
+            poset.check(*pairs[n]) or poset.check(*reversed(pairs[n]))
+        ):
+            n += 1
+
+        # base case
+        if n == pair_count:
+            yield poset
+            continue
+
+        u, v = pairs[n]
+        branches = []
+        for a, b in ((u, v), (v, u)):
+            if not poset.can_order(a, b):
+                # would break asymmetry
+                continue
+            refined = deepcopy(poset)
+            refined.order_force(a, b)
+            if any(refined.check(x, y) or refined.check(y, x) for x, y in incomparable):
+                # ordered a pair that was decided to be incomparable
+                continue
+            branches.append(((a, b), (refined, n + 1, incomparable)))
+        # the last branch pushed is explored first: the least refined one, or the one
+        # ordering the pair as preferred
+        order = prefer.get((u, v))
+        if order is None:
+            stack.extend(branch for _, branch in reversed(branches))
+            # leave the pair incomparable
+            stack.append((poset, n + 1, incomparable | {(u, v)}))
+        else:
+            stack.append((poset, n + 1, incomparable | {(u, v)}))
+            branches.sort(key=lambda branch: branch[0] == order)
+            stack.extend(branch for _, branch in branches)
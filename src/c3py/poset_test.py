@@ -1,6 +1,10 @@
 import copy
+import random
+from itertools import islice
 
-from .poset import Poset
+import pytest
+
+from .poset import BitPoset, Poset
 
 
 class TestPoset:
@@ -71,6 +75,52 @@ class TestPoset:
         #     r.visualize().write_png(f"viz/{i}.png")
         assert len(ref) == 10
 
+    def test_iter_refinements_is_lazy_and_distinct(self):
+        poset = Poset({"a1", "b1", "b2", "b3"})
+        poset.order_try("b1", "b2")
+        poset.order_try("b2", "b3")
+        it = poset.iter_refinements()
+        first = next(it)
+        # the least refined poset comes first
+        assert first == poset
+        assert first is not poset
+        rest = [*it]
+        assert len(rest) == 9
+        keys = {frozenset(r.G.edges) for r in [first, *rest]}
+        assert len(keys) == 10
+
+    def test_iter_refinements_matches_refinements(self):
+        poset = Poset({"A", "B", "C", "D"})
+        poset.order_try("A", "B")
+        assert len([*poset.iter_refinements()]) == len(poset.refinements())
+
+    @pytest.mark.parametrize("poset_cls", [Poset, BitPoset])
+    def test_iter_refinements_preferred(self, poset_cls):
+        poset = poset_cls({"a1", "b1", "b2", "b3"})
+        poset.order_try("b1", "b2")
+        poset.order_try("b2", "b3")
+        preferred = [("b3", "a1")]
+        refinements = [*poset.iter_refinements(preferred)]
+        assert refinements[0].check("b3", "a1")
+        # refinements with the preferred edge come first
+        with_edge = [r.check("b3", "a1") for r in refinements]
+        assert with_edge == sorted(with_edge, reverse=True)
+        expected = {frozenset(r.edges()) for r in poset.iter_refinements()}
+        assert {frozenset(r.edges()) for r in refinements} == expected
+        assert len(refinements) == 10
+
+    @pytest.mark.parametrize("poset_cls", [Poset, BitPoset])
+    def test_iter_refinements_resume(self, poset_cls):
+        poset = poset_cls({"a1", "b1", "b2", "b3"})
+        poset.order_try("b1", "b2")
+        poset.order_try("b2", "b3")
+        stack = [(copy.deepcopy(poset), 0, frozenset())]
+        first = [*islice(poset.iter_refinements(stack=stack), 4)]
+        rest = [*poset.iter_refinements(stack=stack)]
+        assert len(stack) == 0
+        refinements = {frozenset(r.edges()) for r in first + rest}
+        assert len(refinements) == len(first) + len(rest) == 10
+
     def test_all_topological_sort(self):
         poset = Poset({"a1", "b1", "b2", "b3"})
         poset.order_try("b1", "b2")
@@ -81,3 +131,98 @@ class TestPoset:
         poset.order_try("a1", "b2")
         t2 = poset.all_topological_sorts()
         assert len([*t2]) == 2
+        assert poset.topological_sort() in [*poset.all_topological_sorts()]
+
+
+class TestBitPoset:
+    def test_predecessor_and_successor(self):
+        poset = BitPoset({"A", "B", "C", "D", "E"})
+        poset.link("A", "B")
+        poset.link("C", "D")
+        poset.link("D", "B")
+        poset.link("D", "E")
+        assert poset.predecessors("B") == {"A", "B", "D", "C"}
+        assert poset.predecessors("E") == {"D", "C", "E"}
+        assert poset.successors("C") == {"C", "D", "B", "E"}
+        assert poset.successors("E") == {"E"}
+
+    def test_order_cycle(self):
+        poset = BitPoset({"A", "B", "C"})
+        assert poset.order_try("A", "B")
+        assert poset.order_try("B", "C")
+        assert poset.check("A", "C")
+        assert not poset.order_try("C", "A")
+
+    def test_copy(self):
+        poset = BitPoset({"A", "B", "C"})
+        poset.order_try("A", "B")
+        c = copy.deepcopy(poset)
+        poset.order_try("B", "C")
+        assert poset.check("A", "C") is True
+        assert c.check("A", "C") is False
+
+    def test_subset(self):
+        poset = BitPoset({"A", "B", "C", "D"})
+        poset.order_try("A", "B")
+        poset.order_try("B", "C")
+        s = poset.subset({"A", "C", "D"})
+        assert s.elements() == {"A", "C", "D"}
+        assert s.predecessors("C") == {"A", "C"}
+        assert s.check("A", "C")
+        assert len([*s.all_topological_sorts()]) == 3
+
+    def test_refinements_match_poset(self):
+        for elements, orders in [
+            ({"A", "B"}, []),
+            ({"A", "B", "C"}, []),
+            ({"a1", "b1", "b2", "b3"}, [("b1", "b2"), ("b2", "b3")]),
+        ]:
+            poset = Poset(elements)
+            bit_poset = BitPoset(elements)
+            for a, b in orders:
+                poset.order_try(a, b)
+                bit_poset.order_try(a, b)
+            expected = {frozenset(r.G.edges) for r in poset.refinements()}
+            actual = {frozenset(r.edges()) for r in bit_poset.iter_refinements()}
+            assert actual == expected
+
+    def test_from_chains(self):
+        chains = [["a1", "a2", "a3"], ["b1", "b2"], ["c1"]]
+        poset = BitPoset.from_chains(chains)
+        expected = Poset.from_chains(chains)
+        assert poset.elements() == expected.elements()
+        assert set(poset.edges()) == set(expected.edges())
+        assert poset.predecessors("a3") == {"a1", "a2", "a3"}
+        assert poset.successors("b1") == {"b1", "b2"}
+
+    def test_topological_sort(self):
+        poset = BitPoset({"a1", "b1", "b2", "b3"})
+        poset.order_try("b2", "a1")
+        poset.order_try("b3", "b2")
+        order = poset.topological_sort()
+        assert order == ["b1", "b3", "b2", "a1"]
+        assert order in [*poset.all_topological_sorts()]
+
+    def test_topological_sort_is_first(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            poset = BitPoset({f"{p}.{i}" for p in "abc" for i in range(1, 4)})
+            elements = sorted(poset.elements())
+            for _ in range(6):
+                poset.order_try(*rng.sample(elements, 2))
+            sub = poset.subset(set(rng.sample(elements, 6)))
+            for p in [poset, sub]:
+                assert p.topological_sort() == next(p.all_topological_sorts())
+
+    def test_all_topological_sort(self):
+        poset = BitPoset({"a1", "b1", "b2", "b3"})
+        poset.order_try("b1", "b2")
+        poset.order_try("b2", "b3")
+        assert len([*poset.all_topological_sorts()]) == 4
+        poset.order_try("a1", "b2")
+        assert len([*poset.all_topological_sorts()]) == 2
+
+    def test_all_topological_sorts_long_chain(self):
+        chain = [f"a.{i}" for i in range(1200)]
+        poset = BitPoset.from_chains([chain])
+        assert [*poset.all_topological_sorts()] == [poset.topological_sort()]
@@ -0,0 +1,210 @@
+"""
+Randomized checking of histories too large to check exhaustively.
+
+`sample` draws random causal orders (refinements of the program order) and random
+linearizations of them, and tests the linearizations with `Specification.satisfies`.
+It may find a witness quickly, but not finding one proves nothing. Runs are
+reproducible from their seed.
+"""
+
+import random
+from copy import deepcopy
+from typing import NamedTuple
+
+from c3py.history import (
+    CCResult,
+    CCvResult,
+    CMResult,
+    History,
+    Instruction,
+    Operation,
+    Specification,
+)
+from c3py.poset import Poset
+
+_RESULTS = {"CC": CCResult, "CM": CMResult, "CCv": CCvResult}
+
+
+class SampleResult(NamedTuple):
+    # a witness, a result with a `False` verdict if saturation alone refutes the
+    # history, or `None` if no witness was found
+    result: CCResult | CMResult | CCvResult | None
+    criterion: str
+    seed: int
+    # causal orders drawn, and how many of them were distinct
+    samples: int
+    distinct: int
+    # linearizations tested with `Specification.satisfies`
+    linearizations: int
+    # orderings of pairs of operations left unordered by the program order (each
+    # direction counted separately) that some sampled causal order contains
+    covered_pairs: int
+    total_pairs: int
+
+    def __str__(self) -> str:
+        if self.result is not None and self.result[0]:
+            return f"{self.criterion} witness found (seed {self.seed})"
+        if self.result is not None:
+            return f"{self.criterion} refuted by saturation"
+        return (
+            f"no {self.criterion} witness in {self.samples} samples (seed {self.seed},"
+            f" {self.distinct} distinct, {self.covered_pairs}/{self.total_pairs} pairs)"
+        )
+
+
+def _random_refinement(
+    rng: random.Random, poset: Poset, ops: list[str], max_edges: int
+) -> Poset:
+    """Returns `poset` with up to `max_edges` random edges between incomparable ops."""
+    co = deepcopy(poset)
+    if len(ops) < 2:
+        return co
+    for _ in range(rng.randint(0, max_edges)):
+        a, b = rng.sample(ops, 2)
+        if not co.check(a, b) and not co.check(b, a):
+            co.order_try(a, b)
+    return co
+
+
+def _random_linearization(
+    rng: random.Random, poset: Poset, elements: set[str]
+) -> list[str]:
+    """Returns a random linear extension of `poset` restricted to `elements`."""
+    waiting = {e: len(poset.predecessors(e) & elements) - 1 for e in elements}
+    ready = sorted(e for e, n in waiting.items() if n == 0)
+    order = []
+    while len(ready) > 0:
+        e = ready.pop(rng.randrange(len(ready)))
+        order.append(e)
+        for s in sorted(poset.successors(e) & elements):
+            if s != e:
+                waiting[s] -= 1
+                if waiting[s] == 0:
+                    ready.append(s)
+    return order
+
+
+def _sample_serializations(
+    rng: random.Random,
+    h: History,
+    co: Poset,
+    spec: Specification,
+    criterion: str,
+    tries: int,
+    cache: dict,
+) -> tuple[dict[str, list[Operation | Instruction]] | None, int]:
+    """
+    Tests up to `tries` random linearizations of the causal past of every operation,
+    and returns a serialization for each, if found, and the number of linearizations
+    tested. Serializations found are cached by causal past.
+    """
+    tested = 0
+    serializations = {}
+    for op_id in sorted(co.elements()):
+        past = co.predecessors(op_id)
+        ret_set = h.program_order_past(op_id) if criterion == "CM" else {op_id}
+        key = (op_id, frozenset(past), frozenset(co.subset(past).edges()))
+        if key not in cache:
+            label = {
+                o: h.label[o] if o in ret_set else h.label[o].to_instruction()
+                for o in past
+            }
+            for _ in range(tries):
+                tested += 1
+                log = [label[o] for o in _random_linearization(rng, co, past)]
+                if spec.satisfies(log):
+                    cache[key] = log
+                    break
+            else:
+                return None, tested
+        serializations[op_id] = cache[key]
+    return serializations, tested
+
+
+def _sample_arbitration(
+    rng: random.Random, h: History, co: Poset, spec: Specification, tries: int
+) -> tuple[list[str] | None, int]:
+    """Tests up to `tries` random arbitrations of `co` and returns one that works."""
+    ch = h.with_poset(co)
+    for i in range(tries):
+        arb = _random_linearization(rng, co, co.elements())
+        if all(spec.satisfies(ch.causal_arb(o, arb)) for o in arb):
+            return arb, i + 1
+    return None, tries
+
+
+def sample(
+    h: History,
+    spec: Specification,
+    criterion: str = "CC",
+    samples: int = 100,
+    seed: int = 0,
+    max_edges: int | None = None,
+    linearizations: int = 8,
+    saturate: bool = True,
+) -> SampleResult:
+    """
+    Searches for a witness of `criterion` among `samples` random causal orders.
+
+    Each causal order adds up to `max_edges` random edges (by default, as many as
+    there are operations) to the program order, after saturation. For CC and CM, up
+    to `linearizations` random linearizations of the causal past of every operation
+    are tested; for CCv, up to `linearizations` random arbitrations. The same `seed`
+    draws the same samples.
+    """
+    assert criterion in _RESULTS, f"Unexpected criterion {criterion}"
+    Result = _RESULTS[criterion]
+    rng = random.Random(seed)
+    ops = sorted(h.operations)
+    incomparable = {
+        (a, b)
+        for a in ops
+        for b in ops
+        if a != b and not h.poset.check(a, b) and not h.poset.check(b, a)
+    }
+    covered: set[tuple[str, str]] = set()
+    seen: set[frozenset] = set()
+    tested = 0
+
+    def report(result, n: int) -> SampleResult:
+        return SampleResult(
+            result,
+            criterion,
+            seed,
+            n,
+            len(seen),
+            tested,
+            len(covered),
+            len(incomparable),
+        )
+
+    if saturate:
+        saturated = h.saturated(spec)
+        if saturated is None:
+            fields = (False, None, None) + ((None,) if criterion == "CCv" else ())
+            return report(Result(*fields), 0)
+        h = saturated
+    if max_edges is None:
+        max_edges = len(ops)
+    cache: dict = dict()
+    for n in range(1, samples + 1):
+        co = _random_refinement(rng, h.poset, ops, max_edges)
+        edges = frozenset(co.edges())
+        seen.add(edges)
+        covered |= incomparable & edges
+        ch = h.with_poset(co)
+        if criterion == "CCv":
+            arb, count = _sample_arbitration(rng, h, co, spec, linearizations)
+            tested += count
+            if arb is not None:
+                serializations = {o: ch.causal_arb(o, arb) for o in arb}
+                arbitration = [h.label[o] for o in arb]
+                return report(Result(True, ch, arbitration, serializations), n)
+        else:
+            serializations, count = _sample_serializations(
+                rng, h, co, spec, criterion, linearizations, cache
+            )
+            tested += count
+            if serializations is not None:
+                return report(Result(True, ch, serializations), n)
+    return report(None, samples)
@@ -0,0 +1,86 @@
+import pytest
+
+from c3py.history import (
+    History,
+    Operation,
+    RWMemorySpecification,
+    check_CC,
+    check_CCv,
+    check_CM,
+)
+from c3py.poset import BitPoset, Poset
+from c3py.sampling import sample
+
+from . import history_test
+
+CHECKS = {"CC": check_CC, "CM": check_CM, "CCv": check_CCv}
+
+
+class TestSample:
+    @pytest.mark.parametrize("criterion", ["CC", "CM", "CCv"])
+    @pytest.mark.parametrize("name", ["a", "b", "c"])
+    def test_sound(self, criterion, name):
+        h = getattr(history_test.TestHistory(), f"make_history_{name}")()
+        spec = RWMemorySpecification()
+        found = sample(h, spec, criterion, samples=50)
+        if found.result is not None and found.result[0]:
+            # every witness found is a real one
+            assert CHECKS[criterion](h, spec)[0] is True
+            assert set(found.result.serializations) == h.operations
+            for log in found.result.serializations.values():
+                assert spec.satisfies(log)
+
+    @pytest.mark.parametrize("poset_cls", [Poset, BitPoset])
+    def test_finds_witness(self, poset_cls):
+        h = History(
+            {
+                "a": [Operation("wr", ("x", 1)), Operation("rd", "y", 2)],
+                "b": [Operation("wr", ("y", 2)), Operation("rd", "x", 1)],
+            },
+            poset_cls,
+        )
+        found = sample(h, RWMemorySpecification(), samples=20)
+        assert found.result.is_CC is True
+        assert str(found) == "CC witness found (seed 0)"
+
+    def test_no_witness(self):
+        h = history_test.TestHistory().make_history_c()
+        found = sample(h, RWMemorySpecification(), "CM", samples=10, saturate=False)
+        assert found.result is None
+        assert found.samples == 10
+        assert 0 < found.distinct <= 10
+        assert 0 < found.covered_pairs <= found.total_pairs
+        assert str(found).startswith("no CM witness in 10 samples")
+
+    def test_saturate_keeps_program_order(self):
+        h = history_test.TestHistory().make_history_f()
+        found = sample(h, RWMemorySpecification(), "CM", samples=50)
+        assert found.result.is_CM is True
+
+    def test_refuted_by_saturation(self):
+        h = History({"a": [Operation("rd", "x", 1)]})
+        found = sample(h, RWMemorySpecification(), "CCv")
+        assert found.result.is_CCv is False
+        assert found.samples == 0
+
+    @pytest.mark.parametrize("criterion", ["CC", "CM", "CCv"])
+    def test_single_operation(self, criterion):
+        h = History({"a": [Operation("wr", ("x", 1))]})
+        found = sample(h, RWMemorySpecification(), criterion, seed=0)
+        assert found.result[0] is True
+        assert found.total_pairs == 0
+
+    def test_reproducible(self):
+        h = history_test.TestHistory().make_history_c()
+        spec = RWMemorySpecification()
+        runs = [sample(h, spec, "CCv", samples=10, seed=7) for _ in range(2)]
+        assert runs[0][1:] == runs[1][1:]
+        assert sample(h, spec, "CCv", samples=10, seed=8)[1:] != runs[0][1:]
+
+    def test_max_edges(self):
+        h = history_test.TestHistory().make_history_c()
+        spec = RWMemorySpecification()
+        found = sample(h, spec, "CM", samples=10, max_edges=0, saturate=False)
+        # only the program order itself is drawn
+        assert found.distinct == 1
+        assert found.covered_pairs == 0
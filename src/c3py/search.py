@@ -0,0 +1,906 @@
+"""
+The searches behind `check_CC`, `check_CM`, `check_CCv` and `check_all` (see
+`c3py.history`).
+
+A check enumerates the refinements of the program order of a history (the candidate
+causal orders) and, for each, searches for the serializations of the causal past of
+every operation (CC, CM) or for an arbitration (CCv). The searches are also used on
+their own, e.g. to check the causal order a system claims (see `c3py.verify`).
+"""
+
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from copy import deepcopy
+from functools import partial
+from itertools import chain, combinations, islice
+from typing import Any, Callable, Hashable, Iterable, Iterator
+
+from c3py.budget import Budget, BudgetExceeded
+from c3py.cache import fingerprint
+from c3py.history import (
+    AllResult,
+    CCResult,
+    CCvResult,
+    CMResult,
+    History,
+    Instruction,
+    Operation,
+    Specification,
+    machine_for,
+)
+from c3py.poset import Poset
+from c3py.stats import Stats, Tracer
+from c3py.symmetry import find_symmetries, is_canonical
+
+
+def find_serialization(
+    spec: Specification,
+    poset: Poset,
+    label: dict[str, Operation | Instruction],
+    memoize: bool = True,
+    stats: Stats | None = None,
+) -> list[str] | None:
+    """
+    Searches for a topological sort of `poset` that `spec` accepts.
+
+    Operations are appended one at a time and executed on a `Machine` (see
+    `Specification.machine`), which is reverted on backtrack, so sorts sharing a
+    prefix share its execution, and a prefix is abandoned as soon as an `Operation` in
+    it returns a different value.
+
+    Operations that commute (see `Specification.commutes`) are only tried in one
+    order: once a branch starting with `a` has been explored, `a` is put to sleep in
+    the sibling branches and their descendants until an operation that does not
+    commute with `a` is placed (sleep sets).
+
+    With `memoize`, every (set of placed operations, specification state) pair from
+    which no serialization could be completed is remembered and not explored again,
+    so the work is bounded by the number of downsets times the number of distinct
+    states rather than by the number of sorts. This requires
+    `Specification.canonical_state`.
+
+    Returns the serialization as a list of operation ids, or `None` if there is none.
+    """
+    items = sorted(poset.elements())
+    index = {op_id: i for i, op_id in enumerate(items)}
+    instrs = [label[op_id] for op_id in items]
+    preds = [0] * len(items)
+    for i, op_id in enumerate(items):
+        for p in poset.predecessors(op_id):
+            if p != op_id:
+                preds[i] |= 1 << index[p]
+    # commuting[i] is the set of operations that commute with operation i
+    commuting = [0] * len(items)
+    for i, j in combinations(range(len(items)), 2):
+        if spec.commutes(instrs[i], instrs[j]):
+            commuting[i] |= 1 << j
+            commuting[j] |= 1 << i
+    machine = machine_for(spec)
+    actions = [machine.compile(instr) for instr in instrs]
+    full = (1 << len(items)) - 1
+    order: list[str] = []
+    # (placed, state) -> sleep set it failed with
+    failed: dict[tuple[int, Hashable], int] | None = dict() if memoize else None
+    steps = memo_hits = 0
+    budget = None if stats is None else stats.budget
+
+    # frames of the depth-first search, one per placed operation plus the root: the
+    # operations placed, the sleep set on entry, the sleep set so far, the memo key
+    # and the next operation to try. An explicit stack, so that long causal pasts do
+    # not exhaust the recursion limit.
+    stack: list[list] = []
+
+    def enter(placed: int, asleep: int) -> bool:
+        """Pushes the frame of `placed`, or returns `False` if it is known to fail."""
+        nonlocal memo_hits
+        key = None
+        if failed is not None and placed != full:
+            canonical = machine.canonical_state()
+            if canonical is not None:
+                key = (placed, canonical)
+                # a larger sleep set explores fewer branches, so it fails too
+                if key in failed and failed[key] & ~asleep == 0:
+                    memo_hits += 1
+                    return False
+        stack.append([placed, asleep, asleep, key, 0])
+        return True
+
+    def backtrack(frame: list) -> None:
+        """Undoes the operation that `frame` placed last and puts it to sleep."""
+        i = frame[4]
+        order.pop()
+        actions[i][1]()
+        frame[2] |= 1 << i
+        frame[4] = i + 1
+
+    def search() -> bool:
+        nonlocal steps
+        enter(0, 0)
+        while len(stack) > 0:
+            frame = stack[-1]
+            placed, asleep, sleep, key, i = frame
+            if placed == full:
+                return True
+            descended = False
+            while i < len(items):
+                bit = 1 << i
+                if placed & bit or sleep & bit or preds[i] & ~placed:
+                    i += 1
+                    continue
+                execute, revert = actions[i]
+                ret = execute()
+                steps += 1
+                if budget is not None:
+                    budget.charge(1)
+                instr = instrs[i]
+                if not isinstance(instr, Operation) or ret == instr.ret:
+                    order.append(items[i])
+                    frame[2], frame[4] = sleep, i
+                    if enter(placed | bit, sleep & commuting[i]):
+                        descended = True
+                        break
+                    order.pop()
+                revert()
+                sleep |= bit
+                i += 1
+            if descended:
+                continue
+            if key is not None and (key not in failed or asleep & ~failed[key] == 0):
+                failed[key] = asleep
+            stack.pop()
+            if len(stack) > 0:
+                backtrack(stack[-1])
+        return False
+
+    try:
+        found = search()
+    finally:
+        if stats is not None:
+            stats.serializations += 1
+            stats.steps += steps
+            stats.memo_hits += memo_hits
+    return order if found else None
+
+
+def find_partitioned_serialization(
+    spec: Specification,
+    poset: Poset,
+    label: dict[str, Operation | Instruction],
+    memoize: bool,
+    cache: dict,
+    stats: Stats | None = None,
+) -> list[str] | None:
+    """
+    Like `find_serialization`, but for specifications that declare a partition (see
+    `Specification.partition`).
+
+    Only partitions containing `Operation`s need a serialization. Each is searched on
+    its own, restricted to the causal order between its operations, and the result is
+    stored in `cache`, which can be shared across causal orders. The per-partition
+    serializations are then merged with `poset`. If they conflict with it, the whole
+    poset is searched instead.
+    """
+    partitions: dict[Hashable, set[str]] = {}
+    for op_id in poset.elements():
+        key = spec.partition(label[op_id])
+        if key is None:
+            return find_serialization(spec, poset, label, memoize, stats)
+        partitions.setdefault(key, set()).add(op_id)
+
+    merged = deepcopy(poset)
+    for members in partitions.values():
+        checked = frozenset(o for o in members if isinstance(label[o], Operation))
+        if len(checked) == 0:
+            # any order of the partition is fine
+            continue
+        sub = poset.subset(members)
+        key = (frozenset(members), checked, frozenset(sub.edges()))
+        if key not in cache:
+            cache[key] = find_serialization(spec, sub, label, memoize, stats)
+        elif stats is not None:
+            stats.cache_hits += 1
+        ro = cache[key]
+        if ro is None:
+            return None
+        for a, b in zip(ro, ro[1:]):
+            if not merged.order_try(a, b):
+                return find_serialization(spec, poset, label, memoize, stats)
+    return merged.topological_sort()
+
+
+def find_arbitration(
+    spec: Specification,
+    co: Poset,
+    label: dict[str, Operation | Instruction],
+    stats: Stats | None = None,
+) -> list[str] | None:
+    """
+    Searches for a topological sort `arb` of `co` such that the causal arbitration
+    log of every operation (see `History.causal_arb`) is accepted by `spec`.
+
+    Arbitrations are built one operation at a time. The log of an operation is the
+    arbitration so far restricted to its causal past, so every operation not placed
+    yet keeps a `Machine` in the state reached by its log, and placing an operation
+    takes one step to check it and one step for each operation whose causal past
+    contains it. A prefix is abandoned as soon as the operation placed last gets a
+    wrong return value. Like `find_serialization`, prefixes that failed are remembered by the
+    states of the operations left (if `Specification.canonical_state` is defined).
+
+    Returns the arbitration as a list of operation ids, or `None` if there is none.
+    """
+    items = sorted(co.elements())
+    index = {op_id: i for i, op_id in enumerate(items)}
+    n = len(items)
+    past = [0] * n
+    for i, op_id in enumerate(items):
+        for p in co.predecessors(op_id):
+            past[i] |= 1 << index[p]
+    # operations whose causal past strictly contains each operation
+    dependents = [
+        [j for j in range(n) if j != i and past[j] >> i & 1] for i in range(n)
+    ]
+    instrs = [label[op_id].to_instruction() for op_id in items]
+    full = (1 << n) - 1
+    order: list[int] = []
+    # the state reached by the log of every operation, up to the arbitration so far
+    views = [machine_for(spec) for _ in range(n)]
+    # actions[i] executes operation i on its own view and on those of its dependents
+    actions = [
+        [views[j].compile(instrs[i]) for j in [i, *dependents[i]]] for i in range(n)
+    ]
+    failed: set[tuple[int, tuple]] = set()
+    steps = memo_hits = 0
+    budget = None if stats is None else stats.budget
+
+    # frames of the depth-first search, one per placed operation plus the root: the
+    # operations placed, the memo key and the next operation to try. An explicit
+    # stack, so that long histories do not exhaust the recursion limit.
+    stack: list[list] = []
+
+    def enter(placed: int) -> bool:
+        """Pushes the frame of `placed`, or returns `False` if it is known to fail."""
+        nonlocal memo_hits
+        key = None
+        if placed != full:
+            canonical = tuple(
+                views[i].canonical_state() for i in range(n) if not placed >> i & 1
+            )
+            if None not in canonical:
+                key = (placed, canonical)
+                if key in failed:
+                    memo_hits += 1
+                    return False
+        stack.append([placed, key, 0])
+        return True
+
+    def backtrack(frame: list) -> None:
+        """Undoes the operation that `frame` placed last."""
+        i = frame[2]
+        order.pop()
+        for _, revert in actions[i][1:]:
+            revert()
+        frame[2] = i + 1
+
+    def search() -> bool:
+        nonlocal steps
+        enter(0)
+        while len(stack) > 0:
+            frame = stack[-1]
+            placed, key, i = frame
+            if placed == full:
+                return True
+            descended = False
+            while i < n:
+                bit = 1 << i
+                if placed & bit or past[i] & ~bit & ~placed:
+                    i += 1
+                    continue
+                op = label[items[i]]
+                (execute, revert), *propagate = actions[i]
+                ret = execute()
+                revert()
+                steps += 1
+                if budget is not None:
+                    budget.charge(1)
+                if isinstance(op, Operation) and ret != op.ret:
+                    i += 1
+                    continue
+                for execute, _ in propagate:
+                    execute()
+                steps += len(propagate)
+                if budget is not None:
+                    budget.charge(len(propagate))
+                order.append(i)
+                frame[2] = i
+                if enter(placed | bit):
+                    descended = True
+                    break
+                order.pop()
+                for _, revert in propagate:
+                    revert()
+                i += 1
+            if descended:
+                continue
+            if key is not None:
+                failed.add(key)
+            stack.pop()
+            if len(stack) > 0:
+                backtrack(stack[-1])
+        return False
+
+    try:
+        found = search()
+    finally:
+        if stats is not None:
+            stats.steps += steps
+            stats.memo_hits += memo_hits
+    return [items[i] for i in order] if found else None
+
+
+def with_edges(poset: Poset, edges: list[tuple[str, str]]) -> Poset:
+    """Returns a copy of `poset` ordered by every pair in `edges`."""
+    co = deepcopy(poset)
+    for a, b in edges:
+        if not co.check(a, b):
+            co.order_force(a, b)
+    return co
+
+
+_worker_context = None
+
+
+def _init_worker(h: History, check: Callable, cancelled) -> None:
+    global _worker_context
+    _worker_context = (h, check, cancelled)
+
+
+def _check_batch(batch: list[list[tuple[str, str]]]):
+    h, check, cancelled = _worker_context
+    for edges in batch:
+        if cancelled.is_set():
+            return None
+        result = check(h, with_edges(h.poset, edges))
+        if result is not None:
+            return edges, result
+    return None
+
+
+def refinements(
+    h: History, spec: Specification, symmetry: bool, stack: list | None = None
+) -> Iterator[Poset]:
+    """
+    Yields the refinements of `h.poset`, those with the edges `spec` prefers (see
+    `Specification.preferred_edges`) first. With `symmetry`, refinements that a
+    symmetry of `h` maps to a smaller one are skipped (see `c3py.symmetry`). The
+    pending branches of the enumeration are kept in `stack` (see
+    `c3py.poset._iter_refinements`).
+    """
+    symmetries = find_symmetries(h, spec) if symmetry else []
+    order = {op_id: i for i, op_id in enumerate(sorted(h.operations))}
+    preferred = [
+        (a, b)
+        for a, b in spec.preferred_edges(h)
+        if a in h.operations and b in h.operations and h.poset.can_order(a, b)
+    ]
+    for co in h.poset.iter_refinements(preferred, stack):
+        if is_canonical(co, symmetries, order):
+            yield co
+
+
+def _local(stats: Stats, workers: int | None) -> Stats | None:
+    """
+    Returns `stats` if checks run in this process, or `None` if they run in worker
+    processes, whose counters (and tracer calls) would be lost.
+    """
+    return stats if workers is None or workers <= 1 else None
+
+
+def _counted(candidates: Iterator[Poset], stats: Stats) -> Iterator[Poset]:
+    for i, co in enumerate(candidates):
+        stats.refinements += 1
+        if stats.tracer is not None:
+            stats.tracer("refinement", {"index": i, "poset": co})
+        yield co
+
+
+def _search(
+    h: History,
+    check: Callable,
+    workers: int | None,
+    candidates: Iterator[Poset] | None = None,
+    batch_size: int = 16,
+    stats: Stats | None = None,
+):
+    """
+    Runs `check(h, co)` on the `candidates` (by default, the refinements of `h.poset`)
+    until it returns something other than `None`, and returns `(co, result)`, or `None`
+    if every candidate fails. Candidates are counted in `stats` and charged to its
+    budget; if the budget runs out, `BudgetExceeded` is raised with the edges of the
+    candidates that were not fully checked.
+
+    With `workers` > 1, refinements are checked in a pool of processes. Candidates are
+    sent in batches of `batch_size`, each as the list of its edges, so `check` and `h`
+    (including the specification it captures) must be picklable. Once a witness is
+    found, queued batches are cancelled and running ones stop at their next candidate.
+    """
+    if candidates is None:
+        candidates = h.poset.iter_refinements()
+    if stats is not None:
+        candidates = _counted(candidates, stats)
+    budget = None if stats is None else stats.budget
+    if workers is None or workers <= 1:
+        for co in candidates:
+            try:
+                result = check(h, co)
+            except BudgetExceeded as e:
+                e.pending.append(list(co.edges()))
+                raise
+            if result is not None:
+                return co, result
+            if budget is not None:
+                budget.charge(1)
+        return None
+
+    ctx = multiprocessing.get_context()
+    cancelled = ctx.Event()
+    executor = ProcessPoolExecutor(
+        workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(h, check, cancelled),
+    )
+    pending: set[Future] = set()
+    batches: dict[Future, list[list[tuple[str, str]]]] = {}
+    try:
+        while True:
+            # keep a bounded number of batches in flight
+            while len(pending) < 2 * workers:
+                batch = [list(co.edges()) for co in islice(candidates, batch_size)]
+                if len(batch) == 0:
+                    break
+                future = executor.submit(_check_batch, batch)
+                batches[future] = batch
+                pending.add(future)
+            if len(pending) == 0:
+                return None
+            timeout = None if budget is None else budget.remaining()
+            done, pending = wait(pending, timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                found = future.result()
+                if found is not None:
+                    cancelled.set()
+                    edges, result = found
+                    return with_edges(h.poset, edges), result
+            if budget is not None:
+                try:
+                    budget.charge(sum(len(batches.pop(f)) for f in done))
+                    budget.check()
+                except BudgetExceeded as e:
+                    cancelled.set()
+                    e.pending = [edges for f in pending for edges in batches[f]]
+                    raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _drain(items: list) -> Iterator:
+    while len(items) > 0:
+        yield items.pop(0)
+
+
+def _resumable_search(
+    h: History,
+    spec: Specification,
+    criterion: str,
+    check: Callable,
+    workers: int | None,
+    symmetry: bool,
+    stats: Stats,
+    resume: dict[str, Any] | None,
+):
+    """
+    Runs `_search` on the refinements of `h.poset`, or on those left by the search
+    that saved the frontier `resume`. Returns the result of `_search` and `None`, or
+    `None` and the frontier to resume from if the budget of `stats` ran out.
+
+    A frontier is a JSON-serializable dict: the causal orders that were not fully
+    checked and the pending branches of the enumeration of refinements, each given by
+    its edges beyond `h.poset`. The first causal order that was not fully checked is
+    checked to completion before the budget applies again, so every resumed search
+    makes progress, but it may overrun its limits by the cost of that causal order.
+    """
+    pending: list[Poset] = []
+    stack = [(deepcopy(h.poset), 0, frozenset())]
+    if resume is not None:
+        if resume["key"] != fingerprint(h, spec, criterion)[0]:
+            raise ValueError("the frontier was saved for another history or criterion")
+        pending = [with_edges(h.poset, edges) for edges in resume["pending"]]
+        stack = [
+            (with_edges(h.poset, edges), n, frozenset(map(tuple, incomparable)))
+            for edges, n, incomparable in resume["stack"]
+        ]
+    candidates = chain(_drain(pending), refinements(h, spec, symmetry, stack))
+    try:
+        if len(pending) > 0 and stats.budget is not None:
+            # finish the candidate the last search was interrupted in whatever the
+            # budget, or a candidate costing more than the budget would never be done
+            with stats.budget.suspended():
+                found = _search(h, check, None, iter([pending.pop(0)]), stats=stats)
+            if found is not None:
+                return found, None
+        return _search(h, check, workers, candidates, stats=stats), None
+    except BudgetExceeded as e:
+        base = set(h.poset.edges())
+
+        def extra(edges: Iterable) -> list[tuple[str, str]]:
+            return sorted(set(map(tuple, edges)) - base)
+
+        frontier = {
+            "key": fingerprint(h, spec, criterion)[0],
+            "reason": e.reason,
+            "pending": [extra(edges) for edges in e.pending]
+            + [extra(co.edges()) for co in pending],
+            "stack": [
+                [extra(co.edges()), n, sorted(incomparable)]
+                for co, n, incomparable in stack
+            ],
+        }
+        return None, frontier
+
+
+def _serialization(
+    h: History,
+    co: Poset,
+    op_id: str,
+    ret_set: set[str],
+    spec: Specification,
+    memoize: bool,
+    cache: dict,
+    stats: Stats | None = None,
+) -> list[Operation | Instruction] | None:
+    """
+    Returns a serialization of the causal past of `op_id` in which the operations of
+    `ret_set` keep their return values, if there is one.
+
+    The result only depends on the causal past of `op_id`, so it is stored in `cache`
+    and reused for every causal order (and criterion) that agrees on that past.
+    """
+    ch = h.with_poset(co).causal_hist(op_id, ret_set)
+    key = (
+        op_id,
+        frozenset(ret_set & ch.operations),
+        frozenset(ch.operations),
+        frozenset(ch.poset.edges()),
+    )
+    cached = key in cache
+    if not cached:
+        ro = find_partitioned_serialization(
+            spec, ch.poset, ch.label, memoize, cache, stats
+        )
+        cache[key] = None if ro is None else [ch.label[o] for o in ro]
+    if stats is not None:
+        stats.cache_hits += cached
+        if stats.tracer is not None:
+            data = {
+                "op_id": op_id,
+                "satisfied": cache[key] is not None,
+                "cached": cached,
+            }
+            stats.tracer("serialization", data)
+    return cache[key]
+
+
+def serialization_CC(
+    h: History,
+    co: Poset,
+    op_id: str,
+    spec: Specification,
+    memoize: bool,
+    cache: dict,
+    stats: Stats | None = None,
+) -> list[Operation | Instruction] | None:
+    """Returns a serialization of the causal past of `op_id` for CC, if there is one."""
+    return _serialization(h, co, op_id, {op_id}, spec, memoize, cache, stats)
+
+
+def serialization_CM(
+    h: History,
+    co: Poset,
+    op_id: str,
+    spec: Specification,
+    memoize: bool,
+    cache: dict,
+    stats: Stats | None = None,
+) -> list[Operation | Instruction] | None:
+    """Returns a serialization of the causal past of `op_id` for CM, if there is one."""
+    po_past = h.program_order_past(op_id)
+    return _serialization(h, co, op_id, po_past, spec, memoize, cache, stats)
+
+
+class Nogoods:
+    """
+    What the checks of earlier causal orders learned, shared across the candidates of
+    one criterion.
+
+    If the causal past of an operation does not serialize under some causal order, it
+    does not under any order of the same past with more edges either, which has fewer
+    linearizations. Every failing past is recorded with its covering edges, and a
+    candidate whose causal past of the operation is the same set of operations and
+    contains these edges is refuted without serializing anything, even if it orders
+    the past differently elsewhere.
+    """
+
+    def __init__(self) -> None:
+        # op id -> number of causal orders in which its causal past did not serialize
+        self.failures: dict[str, int] = {}
+        # (op id, causal past) -> covering edges of the orders of that past that failed
+        self.pasts: dict[tuple[str, frozenset[str]], list[list[tuple[str, str]]]] = {}
+
+    def refutes(self, co: Poset, op_id: str) -> bool:
+        """Returns `True` if the causal past of `op_id` in `co` is known to fail."""
+        if op_id not in self.failures:
+            return False
+        known = self.pasts.get((op_id, frozenset(co.predecessors(op_id))), [])
+        return any(all(co.check(a, b) for a, b in edges) for edges in known)
+
+    def add(self, co: Poset, op_id: str) -> None:
+        """Records that the causal past of `op_id` in `co` does not serialize."""
+        self.failures[op_id] = self.failures.get(op_id, 0) + 1
+        past = co.predecessors(op_id)
+        strict = {o: co.predecessors(o) - {o} for o in past}
+        edges = []
+        for b, preds in strict.items():
+            implied = set().union(*(strict[a] for a in preds))
+            edges.extend((a, b) for a in preds - implied)
+        self.pasts.setdefault((op_id, frozenset(past)), []).append(edges)
+
+
+def _check_co(
+    h: History,
+    co: Poset,
+    spec: Specification,
+    memoize: bool,
+    cache: dict,
+    serialization: Callable,
+    nogoods: Nogoods | None = None,
+    stats: Stats | None = None,
+) -> dict[str, list[Operation | Instruction]] | None:
+    """
+    Serializes the causal past of every operation with `serialization`, stopping at the
+    first that has none.
+
+    Operations are tried in the order of `Specification.rank`, and those that failed
+    on earlier causal orders (counted in `nogoods`) first: a causal order often fails
+    for the same reason as the previous one, and its failure is then found before any
+    other operation is serialized, or without serializing at all if `nogoods` knows
+    that the past fails.
+    """
+    failures = {} if nogoods is None else nogoods.failures
+    order = sorted(
+        co.elements(),
+        key=lambda o: (-failures.get(o, 0), spec.rank(h.label[o]), o),
+    )
+    serializations: dict[str, list[Operation | Instruction]] = dict()
+    for op_id in order:
+        if nogoods is not None and nogoods.refutes(co, op_id):
+            if stats is not None:
+                stats.memo_hits += 1
+            return None
+        log = serialization(h, co, op_id, spec, memoize, cache, stats)
+        if log is None:
+            if nogoods is not None:
+                nogoods.add(co, op_id)
+            return None
+        serializations[op_id] = log
+    return serializations
+
+
+def check_co_CC(
+    h: History,
+    co: Poset,
+    spec: Specification,
+    memoize: bool,
+    cache: dict,
+    nogoods: Nogoods | None = None,
+    stats: Stats | None = None,
+) -> dict[str, list[Operation | Instruction]] | None:
+    """Returns the CC serializations of every causal past in `co`, if they exist."""
+    return _check_co(h, co, spec, memoize, cache, serialization_CC, nogoods, stats)
+
+
+def check_co_CM(
+    h: History,
+    co: Poset,
+    spec: Specification,
+    memoize: bool,
+    cache: dict,
+    nogoods: Nogoods | None = None,
+    stats: Stats | None = None,
+) -> dict[str, list[Operation | Instruction]] | None:
+    """Returns the CM serializations of every causal past in `co`, if they exist."""
+    return _check_co(h, co, spec, memoize, cache, serialization_CM, nogoods, stats)
+
+
+def check_co_CCv(
+    h: History, co: Poset, spec: Specification, stats: Stats | None = None
+) -> list[str] | None:
+    """Returns an arbitration witnessing CCv with the causal order `co`, if any."""
+    arb = find_arbitration(spec, co, h.label, stats)
+    if stats is not None and stats.tracer is not None:
+        stats.tracer("arbitration", {"arbitration": arb})
+    return arb
+
+
+def search_CC(
+    h: History,
+    spec: Specification,
+    memoize: bool,
+    saturate: bool,
+    workers: int | None,
+    symmetry: bool,
+    tracer: Tracer | None,
+    budget: Budget | None = None,
+    resume: dict[str, Any] | None = None,
+) -> CCResult:
+    """Runs the search of `check_CC`, without the result cache."""
+    stats = Stats(tracer=tracer, budget=budget)
+    if saturate:
+        with stats.phase("saturate"):
+            h = h.saturated(spec)
+        if h is None:
+            return CCResult(False, None, None, stats=stats)
+    check = partial(
+        check_co_CC,
+        spec=spec,
+        memoize=memoize,
+        cache=dict(),
+        nogoods=Nogoods(),
+        stats=_local(stats, workers),
+    )
+    with stats.phase("search"):
+        found, frontier = _resumable_search(
+            h, spec, "CC", check, workers, symmetry, stats, resume
+        )
+    if frontier is not None:
+        return CCResult(None, None, None, stats=stats, frontier=frontier)
+    if found is None:
+        return CCResult(False, None, None, stats=stats)
+    co, serializations = found
+    ch = h.with_poset(co)
+    return CCResult(True, ch, serializations, stats=stats)
+
+
+def search_CM(
+    h: History,
+    spec: Specification,
+    memoize: bool,
+    saturate: bool,
+    workers: int | None,
+    symmetry: bool,
+    tracer: Tracer | None,
+    budget: Budget | None = None,
+    resume: dict[str, Any] | None = None,
+) -> CMResult:
+    """Runs the search of `check_CM`, without the result cache."""
+    stats = Stats(tracer=tracer, budget=budget)
+    if saturate:
+        with stats.phase("saturate"):
+            h = h.saturated(spec)
+        if h is None:
+            return CMResult(False, None, None, stats=stats)
+    check = partial(
+        check_co_CM,
+        spec=spec,
+        memoize=memoize,
+        cache=dict(),
+        nogoods=Nogoods(),
+        stats=_local(stats, workers),
+    )
+    with stats.phase("search"):
+        found, frontier = _resumable_search(
+            h, spec, "CM", check, workers, symmetry, stats, resume
+        )
+    if frontier is not None:
+        return CMResult(None, None, None, stats=stats, frontier=frontier)
+    if found is None:
+        return CMResult(False, None, None, stats=stats)
+    co, serializations = found
+    ch = h.with_poset(co)
+    return CMResult(True, ch, serializations, stats=stats)
+
+
+def search_CCv(
+    h: History,
+    spec: Specification,
+    saturate: bool,
+    workers: int | None,
+    symmetry: bool,
+    tracer: Tracer | None,
+    budget: Budget | None = None,
+    resume: dict[str, Any] | None = None,
+) -> CCvResult:
+    """Runs the search of `check_CCv`, without the result cache."""
+    stats = Stats(tracer=tracer, budget=budget)
+    if saturate:
+        with stats.phase("saturate"):
+            h = h.saturated(spec)
+        if h is None:
+            return CCvResult(False, None, None, None, stats=stats)
+    check = partial(check_co_CCv, spec=spec, stats=_local(stats, workers))
+    with stats.phase("search"):
+        found, frontier = _resumable_search(
+            h, spec, "CCv", check, workers, symmetry, stats, resume
+        )
+    if frontier is not None:
+        return CCvResult(None, None, None, None, stats=stats, frontier=frontier)
+    if found is None:
+        return CCvResult(False, None, None, None, stats=stats)
+    co, arb = found
+    ch = h.with_poset(co)
+    with stats.phase("serializations"):
+        serializations = {op_id: ch.causal_arb(op_id, arb) for op_id in co.elements()}
+    return CCvResult(True, ch, [h.label[s] for s in arb], serializations, stats=stats)
+
+
+def search_all(
+    h: History,
+    spec: Specification,
+    memoize: bool,
+    saturate: bool,
+    symmetry: bool,
+    tracer: Tracer | None = None,
+    budget: Budget | None = None,
+) -> AllResult:
+    """Runs the search of `check_all`, without the result cache."""
+    stats = Stats(tracer=tracer, budget=budget)
+    if saturate:
+        with stats.phase("saturate"):
+            h = h.saturated(spec)
+        if h is None:
+            return AllResult(
+                CCResult(False, None, None, stats=stats),
+                CMResult(False, None, None, stats=stats),
+                CCvResult(False, None, None, None, stats=stats),
+            )
+    cache: dict = dict()
+    nogoods_CC, nogoods_CM = Nogoods(), Nogoods()
+    cc = cm = ccv = None
+    # the verdict of criteria without a witness
+    verdict: bool | None = False
+    with stats.phase("search"):
+        try:
+            for co in _counted(refinements(h, spec, symmetry), stats):
+                serializations = check_co_CC(
+                    h, co, spec, memoize, cache, nogoods_CC, stats
+                )
+                if serializations is not None:
+                    ch = h.with_poset(co)
+                    if cc is None:
+                        cc = CCResult(True, ch, serializations, stats=stats)
+                    if cm is None:
+                        serializations = check_co_CM(
+                            h, co, spec, memoize, cache, nogoods_CM, stats
+                        )
+                        if serializations is not None:
+                            cm = CMResult(True, ch, serializations, stats=stats)
+                    if ccv is None:
+                        arb = check_co_CCv(h, co, spec, stats)
+                        if arb is not None:
+                            serializations = {
+                                o: ch.causal_arb(o, arb) for o in co.elements()
+                            }
+                            arbitration = [h.label[o] for o in arb]
+                            ccv = CCvResult(
+                                True, ch, arbitration, serializations, stats=stats
+                            )
+                    if cm is not None and ccv is not None:
+                        break
+                if budget is not None:
+                    budget.charge(1)
+        except BudgetExceeded:
+            verdict = None
+    return AllResult(
+        cc or CCResult(verdict, None, None, stats=stats),
+        cm or CMResult(verdict, None, None, stats=stats),
+        ccv or CCvResult(verdict, None, None, None, stats=stats),
+    )
@@ -0,0 +1,327 @@
+"""
+Sequential specifications of common data types, besides `RWMemorySpecification`.
+
+Every specification defines `start` and `step` over immutable states, and a `Machine`
+that executes instructions in place (see `Specification.machine`), which checkers
+use instead.
+"""
+
+from collections import deque
+from typing import Any, Callable, Hashable
+
+from c3py.history import (
+    Instruction,
+    Machine,
+    Operation,
+    Specification,
+    inherits_semantics,
+    no_revert,
+)
+
+# `deq` of an empty queue, in undo logs
+_EMPTY = object()
+
+
+class _CounterMachine(Machine):
+    def __init__(self) -> None:
+        self.value = 0
+
+    def compile(
+        self, instr: Instruction
+    ) -> tuple[Callable[[], Any], Callable[[], None]]:
+        match instr.method:
+            case "inc":
+                amount = 1 if instr.arg is None else instr.arg
+
+                def inc() -> None:
+                    self.value += amount
+
+                def dec() -> None:
+                    self.value -= amount
+
+                return inc, dec
+            case "rd":
+                return lambda: self.value, no_revert
+            case _:
+                assert False, f"Unexpected method {instr.method}"
+
+    def canonical_state(self) -> Hashable | None:
+        return self.value
+
+
+class CounterSpecification(Specification):
+    """
+    A counter starting at 0. `inc(n)` adds `n` (1 if `n` is `None`) and `rd()`
+    returns the count.
+    """
+
+    def start(self):
+        return 0
+
+    def step(self, state: int, instr: Instruction) -> tuple[int, Operation]:
+        match instr.method:
+            case "inc":
+                amount = 1 if instr.arg is None else instr.arg
+                return state + amount, Operation("inc", instr.arg, None)
+            case "rd":
+                return state, Operation("rd", instr.arg, state)
+            case _:
+                assert False, f"Unexpected method {instr.method}"
+
+    def machine(self) -> Machine | None:
+        if not inherits_semantics(self, CounterSpecification):
+            return None
+        return _CounterMachine()
+
+    def canonical_state(self, state: int) -> Hashable | None:
+        return state
+
+    def commutes(self, a: Instruction, b: Instruction) -> bool:
+        return a.method == b.method
+
+    def rank(self, op: Operation) -> int:
+        return 0 if op.method == "rd" else 1
+
+
+class _SetMachine(Machine):
+    def __init__(self) -> None:
+        self.elements: set = set()
+        # whether each `add` or `remove` changed the set, in order
+        self.changed: list[bool] = []
+
+    def compile(
+        self, instr: Instruction
+    ) -> tuple[Callable[[], Any], Callable[[], None]]:
+        elements, changed = self.elements, self.changed
+        x = instr.arg
+        match instr.method:
+            case "add":
+
+                def add() -> None:
+                    changed.append(x not in elements)
+                    elements.add(x)
+
+                def unadd() -> None:
+                    if changed.pop():
+                        elements.remove(x)
+
+                return add, unadd
+            case "remove":
+
+                def remove() -> None:
+                    changed.append(x in elements)
+                    elements.discard(x)
+
+                def unremove() -> None:
+                    if changed.pop():
+                        elements.add(x)
+
+                return remove, unremove
+            case "contains":
+                return (lambda: x in elements), no_revert
+            case _:
+                assert False, f"Unexpected method {instr.method}"
+
+    def canonical_state(self) -> Hashable | None:
+        return frozenset(self.elements)
+
+
+class SetSpecification(Specification):
+    """
+    A set, initially empty, of hashable elements. `add(x)` and `remove(x)` return
+    `None` and `contains(x)` returns whether `x` is in the set.
+    """
+
+    def start(self):
+        return frozenset()
+
+    def step(self, state: frozenset, instr: Instruction) -> tuple[frozenset, Operation]:
+        x = instr.arg
+        match instr.method:
+            case "add":
+                return state | {x}, Operation("add", x, None)
+            case "remove":
+                return state - {x}, Operation("remove", x, None)
+            case "contains":
+                return state, Operation("contains", x, x in state)
+            case _:
+                assert False, f"Unexpected method {instr.method}"
+
+    def machine(self) -> Machine | None:
+        if not inherits_semantics(self, SetSpecification):
+            return None
+        return _SetMachine()
+
+    def canonical_state(self, state: frozenset) -> Hashable | None:
+        return state
+
+    def commutes(self, a: Instruction, b: Instruction) -> bool:
+        if a.method == "contains" and b.method == "contains":
+            return True
+        return a.arg != b.arg
+
+    def partition(self, instr: Instruction) -> Hashable | None:
+        return instr.arg
+
+
+class _QueueMachine(Machine):
+    def __init__(self) -> None:
+        self.items: deque = deque()
+        # the values removed by `deq`, in order
+        self.removed: list = []
+
+    def compile(
+        self, instr: Instruction
+    ) -> tuple[Callable[[], Any], Callable[[], None]]:
+        items, removed = self.items, self.removed
+        match instr.method:
+            case "enq":
+                x = instr.arg
+
+                def enq() -> None:
+                    items.append(x)
+
+                return enq, items.pop
+            case "deq":
+
+                def deq() -> Any:
+                    x = items.popleft() if len(items) > 0 else _EMPTY
+                    removed.append(x)
+                    return None if x is _EMPTY else x
+
+                def undeq() -> None:
+                    x = removed.pop()
+                    if x is not _EMPTY:
+                        items.appendleft(x)
+
+                return deq, undeq
+            case _:
+                assert False, f"Unexpected method {instr.method}"
+
+    def canonical_state(self) -> Hashable | None:
+        state = tuple(self.items)
+        try:
+            hash(state)
+        except TypeError:
+            # unhashable values
+            return None
+        return state
+
+
+class QueueSpecification(Specification):
+    """
+    A FIFO queue, initially empty. `enq(x)` returns `None` and `deq()` returns the
+    oldest value, or `None` if the queue is empty.
+    """
+
+    def start(self):
+        return ()
+
+    def step(self, state: tuple, instr: Instruction) -> tuple[tuple, Operation]:
+        match instr.method:
+            case "enq":
+                return state + (instr.arg,), Operation("enq", instr.arg, None)
+            case "deq":
+                if len(state) == 0:
+                    return state, Operation("deq", instr.arg, None)
+                return state[1:], Operation("deq", instr.arg, state[0])
+            case _:
+                assert False, f"Unexpected method {instr.method}"
+
+    def machine(self) -> Machine | None:
+        if not inherits_semantics(self, QueueSpecification):
+            return None
+        return _QueueMachine()
+
+    def canonical_state(self, state: tuple) -> Hashable | None:
+        try:
+            hash(state)
+        except TypeError:
+            # unhashable values
+            return None
+        return state
+
+    def rank(self, op: Operation) -> int:
+        # a dequeued value needs its enqueue, and the values before it dequeued
+        if op.method == "deq":
+            return 0 if op.ret is not None else 1
+        return 2
+
+
+class _RegisterMachine(Machine):
+    def __init__(self, initial: Any) -> None:
+        self.value = initial
+        # the values overwritten by writes, in order
+        self.saved: list = []
+
+    def compile(
+        self, instr: Instruction
+    ) -> tuple[Callable[[], Any], Callable[[], None]]:
+        saved = self.saved
+        match instr.method:
+            case "wr":
+                x = instr.arg
+
+                def write() -> None:
+                    saved.append(self.value)
+                    self.value = x
+
+                def unwrite() -> None:
+                    self.value = saved.pop()
+
+                return write, unwrite
+            case "rd":
+                return lambda: self.value, no_revert
+            case _:
+                assert False, f"Unexpected method {instr.method}"
+
+    def canonical_state(self) -> Hashable | None:
+        try:
+            hash(self.value)
+        except TypeError:
+            # unhashable values
+            return None
+        return (self.value,)
+
+
+class RegisterSpecification(Specification):
+    """
+    A single register holding `initial` (by default `None`). `wr(x)` returns `None`
+    and `rd()` returns the last value written.
+    """
+
+    def __init__(self, initial: Any = None) -> None:
+        self.initial = initial
+
+    def start(self):
+        return self.initial
+
+    def step(self, state: Any, instr: Instruction) -> tuple[Any, Operation]:
+        match instr.method:
+            case "wr":
+                return instr.arg, Operation("wr", instr.arg, None)
+            case "rd":
+                return state, Operation("rd", instr.arg, state)
+            case _:
+                assert False, f"Unexpected method {instr.method}"
+
+    def machine(self) -> Machine | None:
+        if not inherits_semantics(self, RegisterSpecification):
+            return None
+        return _RegisterMachine(self.initial)
+
+    def canonical_state(self, state: Any) -> Hashable | None:
+        try:
+            hash(state)
+        except TypeError:
+            # unhashable values
+            return None
+        return (state,)
+
+    def commutes(self, a: Instruction, b: Instruction) -> bool:
+        return a.method == "rd" and b.method == "rd"
+
+    def rank(self, op: Operation) -> int:
+        if op.method == "rd":
+            return 0 if op.ret != self.initial else 1
+        return 2
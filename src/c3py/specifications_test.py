@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from c3py.history import History, Instruction, Operation, check_CC, check_CCv
+from c3py.specifications import (
+    CounterSpecification,
+    QueueSpecification,
+    RegisterSpecification,
+    SetSpecification,
+)
+
+INSTRUCTIONS = {
+    CounterSpecification: lambda rng: rng.choice(
+        [Instruction("inc", rng.choice([None, 2])), Instruction("rd", None)]
+    ),
+    SetSpecification: lambda rng: Instruction(
+        rng.choice(["add", "remove", "contains"]), rng.randrange(3)
+    ),
+    QueueSpecification: lambda rng: rng.choice(
+        [Instruction("enq", rng.randrange(3)), Instruction("deq", None)]
+    ),
+    RegisterSpecification: lambda rng: rng.choice(
+        [Instruction("wr", rng.randrange(3)), Instruction("rd", None)]
+    ),
+}
+
+
+@pytest.mark.parametrize("spec_cls", list(INSTRUCTIONS))
+class TestMachine:
+    def test_same_as_step(self, spec_cls):
+        spec = spec_cls()
+        rng = random.Random(0)
+        for _ in range(20):
+            machine = spec.machine()
+            state = spec.start()
+            reverts = []
+            canonical = [machine.canonical_state()]
+            for _ in range(10):
+                instr = INSTRUCTIONS[spec_cls](rng)
+                execute, revert = machine.compile(instr)
+                state, op = spec.step(state, instr)
+                assert execute() == op.ret
+                assert machine.canonical_state() == spec.canonical_state(state)
+                reverts.append(revert)
+                canonical.append(machine.canonical_state())
+            # reverting in reverse order goes through the same states
+            canonical.pop()
+            for revert in reversed(reverts):
+                revert()
+                assert machine.canonical_state() == canonical.pop()
+
+    def test_step_is_fallback(self, spec_cls):
+        class Stepped(spec_cls):
+            def step(self, state, instr):
+                return super().step(state, instr)
+
+        assert spec_cls().machine() is not None
+        assert Stepped().machine() is None
+
+    def test_start_is_fallback(self, spec_cls):
+        class Started(spec_cls):
+            def start(self):
+                return super().start()
+
+        assert Started().machine() is None
+
+
+class TestSpecifications:
+    def test_counter(self):
+        h = History(
+            {
+                "a": [Operation("inc", None), Operation("rd", None, 3)],
+                "b": [Operation("inc", 2), Operation("rd", None, 2)],
+            }
+        )
+        spec = CounterSpecification()
+        assert check_CC(h, spec).is_CC is True
+        # the increment of a.1 is visible to a.2 but not to b.2
+        assert check_CCv(h, spec).is_CCv is True
+        h = History({"a": [Operation("inc", None), Operation("rd", None, 0)]})
+        assert check_CC(h, spec).is_CC is False
+
+    def test_set(self):
+        spec = SetSpecification()
+        h = History(
+            {
+                "a": [Operation("add", 1), Operation("contains", 2, True)],
+                "b": [Operation("add", 2), Operation("contains", 1, False)],
+            }
+        )
+        assert check_CC(h, spec).is_CC is True
+        h = History({"a": [Operation("remove", 1), Operation("contains", 1, True)]})
+        assert check_CC(h, spec).is_CC is False
+
+    def test_queue(self):
+        spec = QueueSpecification()
+        h = History(
+            {
+                "a": [Operation("enq", 1), Operation("deq", None, 1)],
+                "b": [Operation("enq", 2), Operation("deq", None, 2)],
+            }
+        )
+        assert check_CC(h, spec).is_CC is True
+        h = History(
+            {"a": [Operation("enq", 1), Operation("enq", 2), Operation("deq", None, 2)]}
+        )
+        assert check_CC(h, spec).is_CC is False
+
+    def test_register(self):
+        spec = RegisterSpecification(0)
+        h = History(
+            {
+                "a": [Operation("wr", 1), Operation("rd", None, 2)],
+                "b": [Operation("wr", 2), Operation("rd", None, 1)],
+            }
+        )
+        assert check_CC(h, spec).is_CC is True
+        # both writes are arbitrated before both reads
+        assert check_CCv(h, spec).is_CCv is False
+        h = History({"a": [Operation("rd", None, 0)]})
+        assert check_CC(h, spec).is_CC is True
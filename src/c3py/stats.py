@@ -0,0 +1,81 @@
+"""
+Statistics and progress events of checker runs.
+"""
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from c3py.budget import Budget
+
+logger = logging.getLogger(__name__)
+
+# a tracer is called with the name of an event and its data, see `Stats`
+Tracer = Callable[[str, dict[str, Any]], None]
+
+
+@dataclass
+class Stats:
+    """
+    Counters of a checker run, attached to its result as `result.stats`.
+
+    If a `tracer` is given, it is called with progress events:
+
+    - `("phase", {"name", "seconds"})` when a phase (e.g. "saturate" or "search") ends,
+    - `("refinement", {"index", "poset"})` before a causal order is checked,
+    - `("serialization", {"op_id", "satisfied", "cached"})` after the causal past of an
+      operation is serialized,
+    - `("arbitration", {"arbitration"})` after an arbitration is searched for.
+
+    Without a tracer, checkers only update counters.
+    """
+
+    # causal orders checked
+    refinements: int = 0
+    # searches for a serialization of a causal past (or of one of its partitions)
+    serializations: int = 0
+    # calls to `Specification.step`
+    steps: int = 0
+    # serializations found in the cache instead of searched
+    cache_hits: int = 0
+    # configurations pruned because they were known to fail
+    memo_hits: int = 0
+    # results found in a persistent result cache
+    result_cache_hits: int = 0
+    # seconds spent in each phase
+    phases: dict[str, float] = field(default_factory=dict)
+    tracer: Tracer | None = field(default=None, repr=False, compare=False)
+    # the limits of the run, charged with the states it explores
+    budget: "Budget | None" = field(default=None, repr=False, compare=False)
+
+    def counters(self) -> dict[str, Any]:
+        """Returns the counters and phases as a JSON-serializable dict."""
+        return {
+            "refinements": self.refinements,
+            "serializations": self.serializations,
+            "steps": self.steps,
+            "cache_hits": self.cache_hits,
+            "memo_hits": self.memo_hits,
+            "result_cache_hits": self.result_cache_hits,
+            "phases": dict(self.phases),
+        }
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+            if self.tracer is not None:
+                self.tracer("phase", {"name": name, "seconds": seconds})
+
+
+def log_tracer(event: str, data: dict[str, Any]) -> None:
+    """A tracer that logs every event at the debug level."""
+    logger.debug(f"{event}: {data}")
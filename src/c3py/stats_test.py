@@ -0,0 +1,94 @@
+import logging
+
+import pytest
+
+from c3py.cache import ResultCache
+from c3py.history import (
+    History,
+    Operation,
+    RWMemorySpecification,
+    check_all,
+    check_CC,
+    check_CCv,
+    check_CM,
+)
+from c3py.stats import log_tracer
+
+from . import history_test
+
+
+class TestStats:
+    @pytest.mark.parametrize("check", [check_CC, check_CM, check_CCv])
+    def test_counters(self, check):
+        h = history_test.TestHistory().make_history_b()
+        stats = check(h, RWMemorySpecification()).stats
+        assert stats.refinements > 0
+        assert stats.steps > 0
+        assert set(stats.phases) >= {"saturate", "search"}
+
+    def test_inconsistent(self):
+        h = History(
+            {
+                "a": [Operation("rd", "x", 1), Operation("wr", ("y", 1))],
+                "b": [Operation("rd", "y", 1), Operation("wr", ("x", 1))],
+            }
+        )
+        result = check_CC(h, RWMemorySpecification(), saturate=False)
+        assert result.is_CC is False
+        assert result.stats.refinements > 0
+        assert result.stats.serializations > 0
+        # saturation alone rejects the history
+        assert check_CC(h, RWMemorySpecification()).stats.refinements == 0
+
+    def test_check_all_shares_stats(self):
+        h = history_test.TestHistory().make_history_b()
+        cc, cm, ccv = check_all(h, RWMemorySpecification())
+        assert cc.stats is cm.stats is ccv.stats
+        assert cc.stats.refinements > 0
+
+    def test_result_cache(self, tmp_path):
+        h = history_test.TestHistory().make_history_a()
+        cache = ResultCache(tmp_path / "results.sqlite")
+        assert check_CC(h, RWMemorySpecification(), result_cache=cache).stats.steps > 0
+        stats = check_CC(h, RWMemorySpecification(), result_cache=cache).stats
+        assert stats.result_cache_hits == 1
+        assert stats.refinements == 0
+
+
+class TestTracer:
+    def test_events(self):
+        events = []
+        h = history_test.TestHistory().make_history_b()
+        check_CCv(h, RWMemorySpecification(), tracer=lambda *e: events.append(e))
+        names = {name for name, _ in events}
+        assert names == {"phase", "refinement", "arbitration"}
+        phases = [data["name"] for name, data in events if name == "phase"]
+        assert phases == ["saturate", "search", "serializations"]
+
+    def test_serialization_events(self):
+        events = []
+        h = history_test.TestHistory().make_history_b()
+        result = check_CC(
+            h, RWMemorySpecification(), tracer=lambda *e: events.append(e)
+        )
+        serializations = [data for name, data in events if name == "serialization"]
+        assert len(serializations) > 0
+        assert all(data["op_id"] in h.operations for data in serializations)
+        refinements = [data for name, data in events if name == "refinement"]
+        assert len(refinements) == result.stats.refinements
+
+    def test_log_tracer(self, caplog):
+        h = history_test.TestHistory().make_history_a()
+        with caplog.at_level(logging.DEBUG, logger="c3py.stats"):
+            check_CC(h, RWMemorySpecification(), tracer=log_tracer)
+        assert any("refinement" in r.message for r in caplog.records)
+
+    def test_workers(self):
+        events = []
+        h = history_test.TestHistory().make_history_b()
+        result = check_CC(
+            h, RWMemorySpecification(), workers=2, tracer=lambda *e: events.append(e)
+        )
+        assert result.is_CC is True
+        # only the refinements sent to workers are counted
+        assert result.stats.refinements > 0
@@ -0,0 +1,108 @@
+"""
+Symmetries of histories.
+
+A symmetry is a permutation of the operations of a history that maps it to itself: it
+preserves the causal order and maps every operation to one with the same label, up to
+a renaming of values that the specification cannot tell apart (see
+`Specification.rename_values`). If a causal order witnesses CC, CM or CCv, so does its
+image under a symmetry, so checkers only need to try one causal order of every orbit.
+
+Two kinds of symmetries are found, both swapping two processes position by position:
+
+- processes with identical sequences of operations, e.g. clients running the same loop;
+- processes whose values are private to them and whose sequences are identical up to
+  a renaming of these values, e.g. clients writing differentiated values.
+"""
+
+from typing import TYPE_CHECKING, Any, Hashable
+
+if TYPE_CHECKING:
+    from c3py.history import History, Specification
+    from c3py.poset import Poset
+
+
+def _shape(h: "History", spec: "Specification", ops: list[str]):
+    """
+    Returns the operations of `ops` with values renamed to their order of first
+    occurrence, and the values in that order, or `None` if `spec` cannot rename them.
+    """
+    values: dict[Any, int] = {}
+
+    def rename(value):
+        return ("$", values.setdefault(value, len(values)))
+
+    try:
+        renamed = [spec.rename_values(h.label[o], rename) for o in ops]
+    except TypeError:
+        # unhashable values
+        return None
+    if any(op is None for op in renamed):
+        return None
+    return tuple(op[:3] for op in renamed), list(values)
+
+
+def find_symmetries(h: "History", spec: "Specification") -> list[dict[str, str]]:
+    """
+    Returns symmetries of `h` that swap two interchangeable processes, as mappings of
+    the operation ids they move. Interchangeable processes are sorted by name and only
+    neighbors are swapped; these swaps generate every permutation of the processes.
+    """
+    chains: dict[str, list[tuple[int, str]]] = {}
+    for op_id in h.label:
+        process, i = op_id.rsplit(".", 1)
+        chains.setdefault(process, []).append((int(i), op_id))
+    processes = {p: [o for _, o in sorted(chain)] for p, chain in chains.items()}
+
+    shapes = {p: _shape(h, spec, ops) for p, ops in processes.items()}
+    owners: dict[Any, set[str]] = {}
+    for p, shape in shapes.items():
+        if shape is not None:
+            for value in shape[1]:
+                owners.setdefault(value, set()).add(p)
+
+    classes: dict[Hashable, list[str]] = {}
+    for p, ops in sorted(processes.items()):
+        shape = shapes[p]
+        if shape is not None and all(owners[v] == {p} for v in shape[1]):
+            key: Any = ("renamed", shape[0])
+        else:
+            key = ("exact", tuple(h.label[o][:3] for o in ops))
+        try:
+            classes.setdefault(key, []).append(p)
+        except TypeError:
+            # unhashable labels, the process is not compared with others
+            pass
+
+    symmetries = []
+    edges = set(h.poset.edges())
+    for members in classes.values():
+        for p, q in zip(members, members[1:]):
+            swap = {}
+            for a, b in zip(processes[p], processes[q]):
+                swap[a] = b
+                swap[b] = a
+            if all((swap.get(a, a), swap.get(b, b)) in edges for a, b in edges):
+                symmetries.append(swap)
+    return symmetries
+
+
+def is_canonical(
+    co: "Poset", symmetries: list[dict[str, str]], order: dict[str, int]
+) -> bool:
+    """
+    Returns `False` if some symmetry maps `co` to a causal order with a
+    lexicographically smaller edge list (operations numbered by `order`).
+
+    The smallest causal order of every orbit is canonical, so skipping the others loses
+    no witness. Only the given symmetries are tried, not their compositions, so an
+    orbit may have more than one canonical causal order.
+    """
+    if len(symmetries) == 0:
+        return True
+    pairs = list(co.edges())
+    edges = sorted((order[a], order[b]) for a, b in pairs)
+    for swap in symmetries:
+        image = sorted((order[swap.get(a, a)], order[swap.get(b, b)]) for a, b in pairs)
+        if image < edges:
+            return False
+    return True
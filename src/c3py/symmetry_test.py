@@ -0,0 +1,101 @@
+import pytest
+
+from c3py.history import (
+    History,
+    Operation,
+    RWMemorySpecification,
+    Specification,
+    check_all,
+)
+from c3py.poset import BitPoset, Poset
+from c3py.search import refinements
+from c3py.symmetry import find_symmetries
+
+from . import history_test
+
+
+class OpaqueRWMemorySpecification(RWMemorySpecification):
+    def rename_values(self, op, rename):
+        return Specification.rename_values(self, op, rename)
+
+
+def client(value):
+    return [
+        Operation("wr", ("x", value)),
+        Operation("rd", "x", value),
+        Operation("rd", "y", None),
+    ]
+
+
+class TestFindSymmetries:
+    def test_identical_processes(self):
+        h = History({p: client(1) for p in "abc"})
+        symmetries = find_symmetries(h, RWMemorySpecification())
+        assert symmetries == [
+            {
+                "a.1": "b.1",
+                "b.1": "a.1",
+                "a.2": "b.2",
+                "b.2": "a.2",
+                "a.3": "b.3",
+                "b.3": "a.3",
+            },
+            {
+                "b.1": "c.1",
+                "c.1": "b.1",
+                "b.2": "c.2",
+                "c.2": "b.2",
+                "b.3": "c.3",
+                "c.3": "b.3",
+            },
+        ]
+
+    def test_renamed_values(self):
+        h = History({"a": client(1), "b": client(2), "c": client(3)})
+        assert len(find_symmetries(h, RWMemorySpecification())) == 2
+        # the specification does not allow renaming values
+        assert find_symmetries(h, OpaqueRWMemorySpecification()) == []
+
+    def test_shared_values(self):
+        h = History({"a": client(1), "b": client(2), "c": [Operation("rd", "x", 1)]})
+        # a and b are only interchangeable if c reads from neither
+        assert find_symmetries(h, RWMemorySpecification()) == []
+
+    def test_causal_order(self):
+        h = History({p: client(1) for p in "ab"})
+        assert len(find_symmetries(h, RWMemorySpecification())) == 1
+        h.poset.order_try("a.1", "b.1")
+        assert find_symmetries(h, RWMemorySpecification()) == []
+
+
+class TestSymmetryReduction:
+    @pytest.mark.parametrize("poset_cls", [Poset, BitPoset])
+    def test_fewer_refinements(self, poset_cls):
+        h = History({p: client(i)[:2] for i, p in enumerate("abc")}, poset_cls)
+        reduced = sum(1 for _ in refinements(h, RWMemorySpecification(), True))
+        total = sum(1 for _ in refinements(h, RWMemorySpecification(), False))
+        assert reduced < total
+
+    @pytest.mark.parametrize("name", ["a", "b", "c"])
+    def test_same_verdicts(self, name):
+        h = getattr(history_test.TestHistory(), f"make_history_{name}")()
+        spec = RWMemorySpecification()
+        for saturate in [True, False]:
+            results = check_all(h, spec, saturate=saturate)
+            expected = check_all(h, spec, saturate=saturate, symmetry=False)
+            assert [r[0] for r in results] == [r[0] for r in expected]
+
+    def test_identical_clients(self):
+        h = History(
+            {
+                **{
+                    p: [Operation("rd", "x", None), Operation("rd", "x", 1)]
+                    for p in "abc"
+                },
+                "w": [Operation("wr", ("x", 1))],
+            }
+        )
+        spec = RWMemorySpecification()
+        results = check_all(h, spec, saturate=False)
+        expected = check_all(h, spec, saturate=False, symmetry=False)
+        assert [r[0] for r in results] == [r[0] for r in expected] == [True] * 3
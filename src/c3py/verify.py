@@ -0,0 +1,191 @@
+"""
+Verification of the causal order and arbitration that a system claims (see
+`History.with_hints`).
+
+Checking a history searches every refinement of its program order, which is
+exponential. A system that records vector clocks or dependency lists already knows
+which causal order it implemented, so `verify` only checks that one: that it is a
+partial order containing the program order, and that the causal past of every
+operation serializes. If the hint fails, the first operation (in causal order) that
+breaks it is reported, and refinements near the hint can be searched instead.
+"""
+
+from copy import deepcopy
+from typing import Any, NamedTuple
+
+from c3py.history import (
+    CCResult,
+    CCvResult,
+    CMResult,
+    History,
+    Specification,
+    check_CC,
+    check_CCv,
+    check_CM,
+)
+from c3py.poset import Poset
+from c3py.search import check_co_CCv, serialization_CC, serialization_CM
+
+_CHECKS = {"CC": check_CC, "CM": check_CM, "CCv": check_CCv}
+_RESULTS = {"CC": CCResult, "CM": CMResult}
+_SERIALIZATIONS = {"CC": serialization_CC, "CM": serialization_CM}
+
+
+class Verification(NamedTuple):
+    holds: bool
+    # the operation that breaks the hint
+    op_id: str | None
+    # "cycle" if the claimed causal order is cyclic, "arbitration" if the claimed
+    # arbitration is not a linear extension of it, "serialization" if the causal past
+    # of `op_id` cannot be serialized, `None` if the hint holds
+    reason: str | None
+    # the witness given by the hint, or found among nearby refinements
+    result: CCResult | CMResult | CCvResult | None
+
+
+def edges_from_clocks(clocks: dict[str, dict[str, int]]) -> list[tuple[str, str]]:
+    """
+    Returns the causal order given by the vector clocks of operations, as edges.
+
+    `clocks[op_id][process]` is the number of operations of `process` in the causal
+    past of `op_id` (including `op_id` itself). Only the last of them is linked to
+    `op_id`; the program order implies the others.
+    """
+    edges = []
+    for op_id, clock in clocks.items():
+        for process, count in clock.items():
+            if count > 0 and f"{process}.{count}" != op_id:
+                edges.append((f"{process}.{count}", op_id))
+    return edges
+
+
+def edges_from_dependencies(
+    dependencies: dict[str, list[str]],
+) -> list[tuple[str, str]]:
+    """Returns the causal order given by the direct dependencies of operations."""
+    return [(d, op_id) for op_id, deps in dependencies.items() for d in deps]
+
+
+def _claimed_edges(h: History) -> list[tuple[str, str]]:
+    if h.hints is None or h.hints.causal_order is None:
+        return []
+    return h.hints.causal_order
+
+
+def _claimed_order(
+    h: History, edges: list[tuple[str, str]]
+) -> tuple[Poset, str | None]:
+    """
+    Returns the program order of `h` extended with `edges`, and the operation whose
+    incoming edge closes a cycle, if any.
+    """
+    co = deepcopy(h.poset)
+    for a, b in edges:
+        if a not in h.operations or b not in h.operations:
+            raise ValueError(f"unknown operation in claimed edge {(a, b)}")
+        if not co.order_try(a, b):
+            return co, b
+    return co, None
+
+
+def _check_arbitration(co: Poset, arbitration: list[str]) -> str | None:
+    """
+    Returns the first operation of `arbitration` that breaks it as a linear extension
+    of `co`, or `None`.
+    """
+    position: dict[str, int] = {}
+    for op_id in arbitration:
+        if op_id not in co.elements() or op_id in position:
+            return op_id
+        if any(p not in position for p in co.predecessors(op_id) if p != op_id):
+            return op_id
+        position[op_id] = len(position)
+    missing = sorted(co.elements() - set(position))
+    return missing[0] if len(missing) > 0 else None
+
+
+def _verify_hint(
+    h: History, spec: Specification, criterion: str, memoize: bool
+) -> Verification:
+    co, op_id = _claimed_order(h, _claimed_edges(h))
+    if op_id is not None:
+        return Verification(False, op_id, "cycle", None)
+    ch = h.with_poset(co)
+
+    if criterion == "CCv":
+        arb = None if h.hints is None else h.hints.arbitration
+        if arb is None:
+            arb = check_co_CCv(h, co, spec)
+            if arb is None:
+                return Verification(False, None, "arbitration", None)
+        else:
+            op_id = _check_arbitration(co, arb)
+            if op_id is not None:
+                return Verification(False, op_id, "arbitration", None)
+        serializations = {}
+        for op_id in arb:
+            log = ch.causal_arb(op_id, arb)
+            if not spec.satisfies(log):
+                return Verification(False, op_id, "serialization", None)
+            serializations[op_id] = log
+        result = CCvResult(True, ch, [h.label[o] for o in arb], serializations)
+        return Verification(True, None, None, result)
+
+    cache: dict = dict()
+    serializations = {}
+    for op_id in co.topological_sort():
+        log = _SERIALIZATIONS[criterion](h, co, op_id, spec, memoize, cache)
+        if log is None:
+            return Verification(False, op_id, "serialization", None)
+        serializations[op_id] = log
+    result = _RESULTS[criterion](True, ch, serializations)
+    return Verification(True, None, None, result)
+
+
+def verify(
+    h: History,
+    spec: Specification,
+    criterion: str = "CC",
+    nearby: int = 0,
+    memoize: bool = True,
+    **options: Any,
+) -> Verification:
+    """
+    Verifies that the hints of `h` (see `History.with_hints`) witness `criterion`.
+
+    The claimed causal order must be acyclic; it is extended with the program order.
+    For CC and CM, the causal past of every operation must serialize. For CCv, the
+    claimed arbitration must be a linear extension of the causal order and every
+    causal arbitration must satisfy `spec`; without a claimed arbitration, one is
+    searched for. This takes one serialization per operation instead of a search over
+    the refinements of the program order.
+
+    If the hint fails and `nearby` > 0, up to `nearby` times, the claimed edges of the
+    operation that breaks it are dropped (along with the claimed arbitration) and the
+    refinements of what is left of the claim are searched with `check_CC`, `check_CM`
+    or `check_CCv` and `options`. A witness found this way is returned as `result`,
+    but the verification still does not hold; not finding one does not mean that the
+    history violates `criterion`.
+    """
+    assert criterion in _CHECKS, f"Unexpected criterion {criterion}"
+    verification = _verify_hint(h, spec, criterion, memoize)
+    if verification.holds:
+        return verification
+
+    claim = h
+    op_id = verification.op_id
+    for _ in range(nearby):
+        if op_id is None:
+            break
+        edges = [(a, b) for a, b in _claimed_edges(claim) if op_id not in (a, b)]
+        claim = h.with_hints(edges)
+        relaxed = _verify_hint(claim, spec, criterion, memoize)
+        if relaxed.holds:
+            return verification._replace(result=relaxed.result)
+        co, _ = _claimed_order(h, edges)
+        result = _CHECKS[criterion](h.with_poset(co), spec, **options)
+        # a witness, or an unknown verdict if `options` bound the search
+        if result[0] is not False:
+            return verification._replace(result=result)
+        op_id = relaxed.op_id
+    return verification
@@ -0,0 +1,124 @@
+import pytest
+
+from c3py.history import (
+    History,
+    Operation,
+    RWMemorySpecification,
+    check_CC,
+    check_CCv,
+    check_CM,
+)
+from c3py.verify import edges_from_clocks, edges_from_dependencies, verify
+
+from . import history_test
+
+CHECKS = {"CC": check_CC, "CM": check_CM, "CCv": check_CCv}
+
+
+def write_read():
+    return History({"a": [Operation("wr", ("x", 1))], "b": [Operation("rd", "x", 1)]})
+
+
+def two_writes():
+    return History(
+        {
+            "a": [Operation("wr", ("x", 1))],
+            "b": [Operation("wr", ("x", 2))],
+            "c": [Operation("rd", "x", 2)],
+        }
+    )
+
+
+class TestHints:
+    def test_edges_from_clocks(self):
+        clocks = {"a.1": {"a": 1}, "b.1": {"a": 1, "b": 1}, "b.2": {"a": 3, "b": 2}}
+        assert sorted(edges_from_clocks(clocks)) == [("a.1", "b.1"), ("a.3", "b.2")]
+
+    def test_edges_from_dependencies(self):
+        edges = edges_from_dependencies({"b.1": ["a.1"], "c.1": ["a.1", "b.1"]})
+        assert edges == [("a.1", "b.1"), ("a.1", "c.1"), ("b.1", "c.1")]
+
+    def test_with_hints(self):
+        h = write_read()
+        hinted = h.with_hints([("a.1", "b.1")], ["a.1", "b.1"])
+        assert h.hints is None
+        assert hinted.hints.causal_order == [("a.1", "b.1")]
+        assert hinted.hints.arbitration == ["a.1", "b.1"]
+        # the hint is not part of the program order
+        assert not hinted.poset.check("a.1", "b.1")
+
+
+class TestVerify:
+    @pytest.mark.parametrize("criterion", ["CC", "CM", "CCv"])
+    def test_holds(self, criterion):
+        h = write_read().with_hints(edges_from_clocks({"b.1": {"a": 1, "b": 1}}))
+        spec = RWMemorySpecification()
+        verification = verify(h, spec, criterion)
+        assert verification.holds
+        assert verification.result[0] is True
+        for log in verification.result.serializations.values():
+            assert spec.satisfies(log)
+
+    @pytest.mark.parametrize("criterion", ["CC", "CM", "CCv"])
+    @pytest.mark.parametrize("name", ["a", "b", "c"])
+    def test_witness_as_hint(self, criterion, name):
+        h = getattr(history_test.TestHistory(), f"make_history_{name}")()
+        spec = RWMemorySpecification()
+        result = CHECKS[criterion](h, spec)
+        if not result[0]:
+            return
+        arbitration = None
+        if criterion == "CCv":
+            arbitration = [op.op_id for op in result.arbitration]
+        h = h.with_hints(result.causal_history.poset.edges(), arbitration)
+        assert verify(h, spec, criterion).holds
+
+    def test_serialization(self):
+        verification = verify(write_read(), RWMemorySpecification())
+        assert not verification.holds
+        assert verification.op_id == "b.1"
+        assert verification.reason == "serialization"
+        assert verification.result is None
+
+    def test_cycle(self):
+        h = write_read().with_hints([("a.1", "b.1"), ("b.1", "a.1")])
+        verification = verify(h, RWMemorySpecification())
+        assert (verification.op_id, verification.reason) == ("a.1", "cycle")
+
+    def test_unknown_operation(self):
+        h = write_read().with_hints([("a.2", "b.1")])
+        with pytest.raises(ValueError):
+            verify(h, RWMemorySpecification())
+
+    def test_arbitration(self):
+        spec = RWMemorySpecification()
+        edges = [("a.1", "c.1"), ("b.1", "c.1")]
+        h = two_writes().with_hints(edges, ["a.1", "b.1", "c.1"])
+        assert verify(h, spec, "CCv").holds
+        # c.1 would read the write of a.1
+        h = two_writes().with_hints(edges, ["b.1", "a.1", "c.1"])
+        verification = verify(h, spec, "CCv")
+        assert (verification.op_id, verification.reason) == ("c.1", "serialization")
+        # not a linear extension of the causal order
+        h = two_writes().with_hints(edges, ["a.1", "c.1", "b.1"])
+        verification = verify(h, spec, "CCv")
+        assert (verification.op_id, verification.reason) == ("c.1", "arbitration")
+        # the arbitration is searched for if there is no claim
+        assert verify(two_writes().with_hints(edges), spec, "CCv").holds
+
+    def test_nearby(self):
+        spec = RWMemorySpecification()
+        # the claim misses the write that c.1 reads from
+        h = two_writes().with_hints([("a.1", "c.1")])
+        assert verify(h, spec).result is None
+        verification = verify(h, spec, nearby=1)
+        assert not verification.holds
+        assert verification.op_id == "c.1"
+        assert verification.result.is_CC is True
+        assert verification.result.causal_history.poset.check("b.1", "c.1")
+
+    def test_nearby_unknown(self):
+        h = two_writes().with_hints([("a.1", "c.1")])
+        options = {"saturate": False, "max_states": 1}
+        verification = verify(h, RWMemorySpecification(), nearby=1, **options)
+        assert verification.result.is_CC is None